@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Offline Batch API support for the eval runner.
+Writes chat-completion requests into batch-input JSONL files, submits them through a
+pluggable batch client, polls until they finish and reads the outputs back by custom_id.
+Progress is kept in batches.json together with a fingerprint of every rendered request,
+so only a resumed run with the same requests picks up earlier batches.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from jsonl_codec import dump_line, loads
+
+
+# Provider limits (OpenAI): 50,000 requests and 200 MB per input file. Leave headroom.
+MAX_REQUESTS_PER_FILE = 50000
+MAX_BYTES_PER_FILE = 190 * 1024 * 1024
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+STATE_FILENAME = "batches.json"
+
+
+def criterion_key(eval_criteria: Dict) -> str:
+    """Short hash of a criterion's definition (compiled `_` entries left out)."""
+    definition = {key: value for key, value in eval_criteria.items() if not key.startswith("_")}
+    encoded = json.dumps(definition, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def custom_id(execution_id: int, eval_criteria: Dict) -> str:
+    """Keyed by the criterion itself, so adding, removing or reordering criteria cannot mix up answers."""
+    return f"{execution_id}:{criterion_key(eval_criteria)}"
+
+
+def batch_request(request_id: str, model: str, messages: List[Dict], temperature: float = 0) -> Dict:
+    return {
+        "custom_id": request_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {"model": model, "messages": messages, "temperature": temperature},
+    }
+
+
+def write_batch_inputs(
+    requests: Iterable[Dict],
+    work_dir: Path,
+    max_requests: int = MAX_REQUESTS_PER_FILE,
+    max_bytes: int = MAX_BYTES_PER_FILE,
+) -> List[Path]:
+    """Stream requests into input_NNN.jsonl files, starting a new file at either limit."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths: List[Path] = []
+    handle = None
+    count = 0
+    size = 0
+    try:
+        for request in requests:
+            line = dump_line(request)
+            if handle is None or count >= max_requests or size + len(line) > max_bytes:
+                if handle is not None:
+                    handle.close()
+                path = work_dir / f"input_{len(paths):03d}.jsonl"
+                paths.append(path)
+                handle = path.open("wb")
+                count = 0
+                size = 0
+            handle.write(line)
+            count += 1
+            size += len(line)
+    finally:
+        if handle is not None:
+            handle.close()
+    return paths
+
+
+def read_batch_outputs(
+    paths: Iterable[Path],
+) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[Dict]]]:
+    """Map custom_id -> (response text, error message, usage) across output and error files."""
+    outputs: Dict[str, Tuple[Optional[str], Optional[str], Optional[Dict]]] = {}
+    for path in paths:
+        with path.open("rb") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                record = loads(line)
+                request_id = record.get("custom_id")
+                response = record.get("response") or {}
+                error = record.get("error")
+                if error:
+                    message = error.get("message") if isinstance(error, dict) else str(error)
+                    outputs[request_id] = (None, message, None)
+                    continue
+                if response.get("status_code") != 200:
+                    body = response.get("body") or {}
+                    message = (body.get("error") or {}).get("message") or f"HTTP {response.get('status_code')}"
+                    outputs[request_id] = (None, message, None)
+                    continue
+                try:
+                    text = response["body"]["choices"][0]["message"]["content"].strip()
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    outputs[request_id] = (None, "Malformed batch response", None)
+                    continue
+                outputs[request_id] = (text, None, response["body"].get("usage"))
+    return outputs
+
+
+class BatchClient:
+    """Submit/poll interface. Implementations only need these three methods."""
+
+    def submit(self, input_path: Path) -> str:
+        raise NotImplementedError
+
+    def status(self, batch_id: str) -> str:
+        raise NotImplementedError
+
+    def download(self, batch_id: str, work_dir: Path) -> List[Path]:
+        """Write the batch's output (and error) files into work_dir and return their paths."""
+        raise NotImplementedError
+
+
+class OpenAIBatchClient(BatchClient):
+    def __init__(self, client, completion_window: str = "24h"):
+        self.client = client
+        self.completion_window = completion_window
+
+    def submit(self, input_path: Path) -> str:
+        with input_path.open("rb") as handle:
+            uploaded = self.client.files.create(file=handle, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, work_dir: Path) -> List[Path]:
+        batch = self.client.batches.retrieve(batch_id)
+        paths = []
+        for kind, file_id in (("output", batch.output_file_id), ("errors", batch.error_file_id)):
+            if not file_id:
+                continue
+            path = work_dir / f"{kind}_{batch_id}.jsonl"
+            path.write_bytes(self.client.files.content(file_id).read())
+            paths.append(path)
+        return paths
+
+
+class LocalBatchClient(BatchClient):
+    """
+    Stand-in that completes each batch synchronously on submit by calling
+    `responder(model, messages) -> text` for every request line.
+    """
+
+    def __init__(self, responder: Callable[[str, List[Dict]], str]):
+        self.responder = responder
+
+    @staticmethod
+    def output_path(work_dir: Path, batch_id: str) -> Path:
+        return work_dir / f"output_{batch_id}.jsonl"
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"local_{input_path.stem}"
+        output_path = self.output_path(input_path.parent, batch_id)
+        with input_path.open("rb") as source, output_path.open("wb") as sink:
+            for line in source:
+                if not line.strip():
+                    continue
+                request = loads(line)
+                body = request["body"]
+                record = {"id": f"{batch_id}_{request['custom_id']}", "custom_id": request["custom_id"]}
+                try:
+                    text = self.responder(body["model"], body["messages"])
+                    record["response"] = {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": text}}]},
+                    }
+                    record["error"] = None
+                except Exception as e:
+                    record["response"] = None
+                    record["error"] = {"code": "local_error", "message": str(e)}
+                sink.write(dump_line(record))
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def download(self, batch_id: str, work_dir: Path) -> List[Path]:
+        return [self.output_path(work_dir, batch_id)]
+
+
+def load_state(work_dir: Path, fingerprint: str) -> Optional[List[Dict]]:
+    """Batches recorded for exactly these requests, or None (state for other requests is ignored)."""
+    path = work_dir / STATE_FILENAME
+    if not path.exists():
+        return None
+    state = json.loads(path.read_text())
+    if not isinstance(state, dict) or state.get("fingerprint") != fingerprint:
+        return None
+    return state["batches"]
+
+
+def save_state(work_dir: Path, fingerprint: str, batches: List[Dict]) -> None:
+    path = work_dir / STATE_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"fingerprint": fingerprint, "batches": batches}, indent=2))
+    tmp_path.replace(path)
+
+
+def clear_state(work_dir: Path) -> None:
+    """Remove batches.json and the batch input/output files."""
+    if not work_dir.exists():
+        return
+    for path in [work_dir / STATE_FILENAME, *work_dir.glob("*.jsonl")]:
+        path.unlink(missing_ok=True)
+    if not any(work_dir.iterdir()):
+        work_dir.rmdir()
+
+
+def submit_and_wait(
+    batch_client: BatchClient,
+    input_paths: List[Path],
+    work_dir: Path,
+    fingerprint: str,
+    poll_interval: float = 60.0,
+) -> List[Path]:
+    """
+    Submit every input file (once; progress is kept in batches.json so a restarted
+    run with the same requests resumes polling instead of resubmitting) and return
+    all output file paths.
+    """
+    state = load_state(work_dir, fingerprint)
+    if state is None:
+        state = [{"input": path.name, "batch_id": None, "status": None, "outputs": []} for path in input_paths]
+    for entry in state:
+        if entry["batch_id"] is None:
+            entry["batch_id"] = batch_client.submit(work_dir / entry["input"])
+            entry["status"] = "submitted"
+            print(f"  Submitted {entry['input']} as batch {entry['batch_id']}")
+            save_state(work_dir, fingerprint, state)
+
+    while True:
+        pending = [entry for entry in state if entry["status"] not in TERMINAL_STATUSES]
+        for entry in pending:
+            status = batch_client.status(entry["batch_id"])
+            if status != entry["status"]:
+                print(f"  Batch {entry['batch_id']}: {status}")
+            entry["status"] = status
+            if status in TERMINAL_STATUSES:
+                entry["outputs"] = [path.name for path in batch_client.download(entry["batch_id"], work_dir)]
+            save_state(work_dir, fingerprint, state)
+        if all(entry["status"] in TERMINAL_STATUSES for entry in state):
+            break
+        time.sleep(poll_interval)
+
+    return [work_dir / name for entry in state for name in entry["outputs"]]
@@ -24,6 +24,12 @@ else
     EVALS_FILE="prompts/Evals.json"
 fi
 
+# The runner publishes live counts, rates and an ETA to <RUN_ID>_status.json.
+if command -v python3 >/dev/null 2>&1 && python3 scripts/live_metrics.py "$RESULTS_FILE" 2>/dev/null; then
+    exit 0
+fi
+
+# No status file (e.g. a run from before it existed): count finished lines instead.
 if [ ! -f "$RESULTS_FILE" ]; then
     echo "❌ Results file not found. Evaluation may not have started."
     exit 1
@@ -51,29 +57,11 @@ if [ $COMPLETED -eq $TOTAL ]; then
     echo "View results:"
     echo "  cat $RESULTS_FILE | jq '.evals[] | {name: .eval_name, score: .score, passed: .passed}'"
 else
-    if command -v python3 >/dev/null 2>&1; then
-        EVALS_COUNT=$(python3 - <<PY
-import json
-from pathlib import Path
-path = Path("$EVALS_FILE")
-if path.exists():
-    print(len(json.loads(path.read_text())))
-else:
-    print(7)
-PY
-)
-    else
-        EVALS_COUNT=7
-    fi
-    TOTAL_API_CALLS=$((TOTAL * EVALS_COUNT))
-    COMPLETED_API_CALLS=$((COMPLETED * EVALS_COUNT))
-    echo "API Calls: $COMPLETED_API_CALLS / $TOTAL_API_CALLS"
-    
-    # Estimate time remaining
-    if [ $COMPLETED -gt 0 ]; then
-        EST_MINS=$((((TOTAL - COMPLETED) * 20) / 60))
-        echo "Est. time remaining: ~${EST_MINS} minutes"
+    if command -v python3 >/dev/null 2>&1 && [ -f "$EVALS_FILE" ]; then
+        EVALS_COUNT=$(python3 -c 'import json, sys; print(len(json.load(open(sys.argv[1]))))' "$EVALS_FILE")
+        echo "API Calls: $((COMPLETED * EVALS_COUNT)) / $((TOTAL * EVALS_COUNT))"
     fi
+    echo "Est. time remaining: unknown (no live status file for this run)"
 fi
 
 echo "================================"
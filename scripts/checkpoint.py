@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Cell-level checkpoint for eval runs.
+Every finished (execution_id, eval_name) judge result is appended to a sidecar JSONL
+file next to the results file, so a resumed run only issues the calls that are missing.
+"""
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from jsonl_codec import DecodeError, dump_line, loads
+
+# record() writes execution_id first, so a line can be skipped without decoding it.
+RECORD_ID = re.compile(rb'\{"execution_id": ?(-?\d+),')
+
+
+def checkpoint_path(output_path: Path) -> Path:
+    """<stem>.cells.jsonl next to the results file (does not match *_eval_results.jsonl globs)."""
+    return output_path.with_name(output_path.stem + ".cells.jsonl")
+
+
+def is_error_result(eval_result: Optional[Dict]) -> bool:
+    """Failed judge calls are not checkpointed, so a resumed run retries them."""
+    if not eval_result:
+        return True
+    explanation = str(eval_result.get("explanation", ""))
+    return eval_result.get("score") is None and explanation.startswith("Error:")
+
+
+class CellCheckpoint:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.handle = None
+
+    def load(self, skip: Optional[Callable[[int], bool]] = None) -> Dict[int, Dict[str, Dict]]:
+        """
+        Return {execution_id: {eval_name: eval_result}}; a torn final line is ignored.
+        Lines of executions for which `skip` is true are passed over undecoded.
+        """
+        cells: Dict[int, Dict[str, Dict]] = {}
+        if not self.path.exists():
+            return cells
+        with self.path.open("rb") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                if skip is not None:
+                    match = RECORD_ID.match(line)
+                    if match and skip(int(match.group(1))):
+                        continue
+                try:
+                    record = loads(line)
+                except DecodeError:
+                    continue
+                eval_result = record.get("result") or {}
+                cells.setdefault(record["execution_id"], {})[eval_result.get("eval_name")] = eval_result
+        return cells
+
+    def open(self, resume: bool) -> None:
+        if resume and self.path.exists():
+            self._repair_tail()
+            self.handle = self.path.open("ab")
+        else:
+            self.handle = self.path.open("wb")
+
+    def _repair_tail(self) -> None:
+        """Make sure appends start on a fresh line after an interrupted write."""
+        with self.path.open("rb+") as handle:
+            handle.seek(0, 2)
+            if handle.tell() == 0:
+                return
+            handle.seek(-1, 2)
+            if handle.read(1) != b"\n":
+                handle.write(b"\n")
+
+    def record(self, execution_id: int, eval_result: Dict) -> None:
+        if self.handle is None or is_error_result(eval_result):
+            return
+        self.handle.write(dump_line({"execution_id": execution_id, "result": eval_result}))
+        self.handle.flush()
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
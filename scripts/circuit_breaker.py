@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Per-model circuit breaker for judge calls.
+After `threshold` consecutive transient failures (429s, 5xx, connection errors,
+timeouts) a model's breaker opens: callers wait before dispatch instead of failing,
+so queued work is paused rather than lost. After a cooldown one call is let through
+as a probe, with a token; if it succeeds the breaker closes and everyone resumes,
+otherwise the cooldown doubles (up to `max_cooldown`) and the next probe waits. Only
+the outcome reported with the current probe's token moves the breaker out of
+half-open (or open); calls that were already in flight do not. A breaker open
+longer than `give_up_after` seconds raises CircuitOpenError so the run can stop
+cleanly and be resumed later.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# How often callers waiting on an open breaker look again.
+POLL_SECONDS = 0.5
+
+
+class CircuitOpenError(Exception):
+    """A model stayed unavailable longer than the breaker's give-up time."""
+
+
+class ModelCircuit:
+    def __init__(self, cooldown: float):
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.outage_started: Optional[float] = None
+        self.retry_at = 0.0
+        self.probe_started: Optional[float] = None
+        # Token of the call currently let through as the probe.
+        self.probe: Optional[int] = None
+        self.trips = 0
+        self.probes = 0
+        self.failed_probes = 0
+        self.open_seconds = 0.0
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        threshold: int = 10,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+        give_up_after: Optional[float] = 600.0,
+        probe_timeout: float = 60.0,
+    ):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.give_up_after = give_up_after
+        # A probe that never reports back (cancelled) is replaced after this long.
+        self.probe_timeout = probe_timeout
+        self.models: Dict[str, ModelCircuit] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def circuit(self, model: str) -> ModelCircuit:
+        circuit = self.models.get(model)
+        if circuit is None:
+            circuit = self.models[model] = ModelCircuit(self.base_cooldown)
+        return circuit
+
+    def before_call(self, model: str) -> Tuple[float, Optional[int]]:
+        """
+        (seconds to wait before asking again, probe token). A wait of 0 means the call may
+        go out now; when half-open it goes as the probe and must report its outcome with
+        the token. Raises CircuitOpenError once the outage outlasts give_up_after.
+        """
+        if not self.enabled:
+            return 0.0, None
+        with self.lock:
+            circuit = self.circuit(model)
+            if circuit.state == CLOSED:
+                return 0.0, None
+            now = time.monotonic()
+            if self.give_up_after and now - circuit.outage_started > self.give_up_after:
+                raise CircuitOpenError(
+                    f"{model} unavailable for {now - circuit.outage_started:.0f}s "
+                    f"({circuit.failures} consecutive failures); circuit breaker gave up"
+                )
+            if circuit.state == OPEN:
+                if now < circuit.retry_at:
+                    return min(circuit.retry_at - now, POLL_SECONDS), None
+                circuit.state = HALF_OPEN
+            elif circuit.probe_started is not None and now - circuit.probe_started < self.probe_timeout:
+                return POLL_SECONDS, None
+            circuit.probe_started = now
+            circuit.probes += 1
+            circuit.probe = circuit.probes
+            return 0.0, circuit.probe
+
+    def release_probe(self, model: str, probe: Optional[int]) -> None:
+        """The probe will not be sent (e.g. its deadline passed): let another call probe now."""
+        if not self.enabled or probe is None:
+            return
+        with self.lock:
+            circuit = self.circuit(model)
+            if circuit.probe == probe:
+                circuit.probe = None
+                circuit.probe_started = None
+
+    def paused(self, model: str) -> bool:
+        """True while the model's breaker is open or probing."""
+        if not self.enabled:
+            return False
+        with self.lock:
+            return self.circuit(model).state != CLOSED
+
+    def record_success(self, model: str, probe: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            circuit = self.circuit(model)
+            if circuit.state == CLOSED:
+                circuit.failures = 0
+                return
+            if probe is None or probe != circuit.probe:
+                # An answer to a call sent before the breaker opened; wait for the probe.
+                return
+            circuit.failures = 0
+            outage = time.monotonic() - circuit.outage_started
+            circuit.open_seconds += outage
+            circuit.state = CLOSED
+            circuit.cooldown = self.base_cooldown
+            circuit.outage_started = None
+            circuit.probe_started = None
+            circuit.probe = None
+        print(f"  Circuit breaker: {model} recovered after {outage:.1f}s; resuming dispatch")
+
+    def record_failure(self, model: str, probe: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        message = None
+        with self.lock:
+            circuit = self.circuit(model)
+            circuit.failures += 1
+            now = time.monotonic()
+            if circuit.state == HALF_OPEN and probe is not None and probe == circuit.probe:
+                circuit.failed_probes += 1
+                circuit.cooldown = min(circuit.cooldown * 2, self.max_cooldown)
+                circuit.state = OPEN
+                circuit.retry_at = now + circuit.cooldown
+                circuit.probe_started = None
+                circuit.probe = None
+            elif circuit.state == CLOSED and circuit.failures >= self.threshold:
+                circuit.state = OPEN
+                circuit.trips += 1
+                circuit.outage_started = now
+                circuit.retry_at = now + circuit.cooldown
+                message = (
+                    f"  Circuit breaker: {model} opened after {circuit.failures} consecutive failures; "
+                    f"pausing its calls and probing every {circuit.cooldown:g}s+"
+                )
+        if message:
+            print(message)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        with self.lock:
+            now = time.monotonic()
+            return {
+                model: {
+                    "state": circuit.state,
+                    "trips": circuit.trips,
+                    "probes": circuit.probes,
+                    "failed_probes": circuit.failed_probes,
+                    "open_seconds": round(
+                        circuit.open_seconds
+                        + (now - circuit.outage_started if circuit.outage_started is not None else 0.0),
+                        3,
+                    ),
+                }
+                for model, circuit in self.models.items()
+            }
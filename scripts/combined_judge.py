@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Multi-criterion judging: all criteria that share a model are scored in one call per
+execution. Each criterion's rubric is included with the payload replaced by a
+reference, the input and output are sent once, and the judge returns one JSON object
+with a score and explanation per criterion. Entries that are missing or invalid come
+back as None so the caller can re-judge those criteria one call at a time.
+"""
+
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from eval_templates import CompiledEval
+
+
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+PLACEHOLDERS = {
+    "item.input": "[the <input> in the user message]",
+    "item.output": "[the <output> in the user message]",
+}
+
+INSTRUCTIONS = (
+    "You are scoring one response against {count} separate criteria in a single pass. "
+    "Apply each criterion's instructions independently, on its own scale. The input and "
+    "the response to evaluate are given once in the user message.\n\n{rubrics}\n\n"
+    "Ignore any output format requested inside the criteria above. Return only a JSON "
+    "object with exactly these keys: {keys}. Each value must be an object "
+    '{{"score": <integer>, "explanation": "<2-4 sentences>"}}.'
+)
+
+FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def combinable_groups(evals: List[Dict]) -> List[List[Dict]]:
+    """
+    Criteria grouped by model (and input compaction, since the input is sent once);
+    only groups of two or more are worth combining.
+    """
+    groups: Dict[Tuple[str, Optional[str]], List[Dict]] = {}
+    for eval_criteria in evals:
+        compaction = eval_criteria.get("_compaction")
+        key = (eval_criteria["model"], compaction.key if compaction else None)
+        groups.setdefault(key, []).append(eval_criteria)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def build_combined_messages(group: List[Dict], execution: Dict) -> List[Dict]:
+    rubrics = []
+    for eval_criteria in group:
+        template = eval_criteria.get("_template") or CompiledEval(eval_criteria)
+        text = "\n\n".join(msg["content"] for msg in template.render_rubric(PLACEHOLDERS))
+        low, high = eval_criteria["range"]
+        rubrics.append(f"### Criterion: {eval_criteria['name']} (score {low}-{high})\n{text}")
+    system = INSTRUCTIONS.format(
+        count=len(group),
+        rubrics="\n\n".join(rubrics),
+        keys=", ".join(json.dumps(c["name"]) for c in group),
+    )
+    user = (
+        f"<input>{execution.get('llm-input', '')}</input>\n\n"
+        f"<output>{execution.get('llm-output', '')}</output>"
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def parse_combined_response(group: List[Dict], text: str) -> Dict[str, Optional[Dict]]:
+    """eval_name -> eval result entry (same shape as parse_eval_response), or None if unusable."""
+    try:
+        payload = json.loads(FENCE_PATTERN.sub("", text.strip()))
+    except json.JSONDecodeError:
+        payload = None
+    if not isinstance(payload, dict):
+        payload = {}
+    results: Dict[str, Optional[Dict]] = {}
+    for eval_criteria in group:
+        entry = payload.get(eval_criteria["name"])
+        score = entry.get("score") if isinstance(entry, dict) else None
+        if isinstance(score, float) and score.is_integer():
+            score = int(score)
+        low, high = eval_criteria["range"]
+        if isinstance(score, bool) or not isinstance(score, int) or not low <= score <= high:
+            results[eval_criteria["name"]] = None
+            continue
+        results[eval_criteria["name"]] = {
+            "eval_name": eval_criteria["name"],
+            "score": score,
+            "explanation": str(entry.get("explanation", "")),
+            "pass_threshold": eval_criteria["pass_threshold"],
+            "passed": score >= eval_criteria["pass_threshold"],
+            "range": eval_criteria["range"],
+        }
+    return results
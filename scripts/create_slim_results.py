@@ -5,9 +5,10 @@ Extracts only essential fields for efficient review.
 """
 
 import argparse
-import json
 from pathlib import Path
 
+from jsonl_codec import dump_line, iter_jsonl, parsed_input
+
 
 DEFAULT_EXCLUDED_KEYS = {
     # Commonly huge fields in some domains; safe defaults for a template.
@@ -38,71 +39,60 @@ def slim_input_payload(input_data):
     return slimmed
 
 
+def slim_input(raw_input):
+    """Parse a result's input (usually a JSON string) and slim it."""
+    if isinstance(raw_input, (str, dict)):
+        input_data = parsed_input({"input": raw_input})
+    else:
+        input_data = {"raw_input": raw_input}
+    return slim_input_payload(input_data)
+
+
+def slim_result(result):
+    """Slim entry for one full result: output, eval scores/explanations and slimmed input."""
+
+    # Ensure explanations are preserved
+    # (Some may be empty strings if model didn't provide them)
+    slim_evals = []
+    for eval_result in result['evals']:
+        slim_eval = {
+            'eval_name': eval_result['eval_name'],
+            'score': eval_result['score'],
+            'explanation': eval_result.get('explanation', ''),  # Preserve explanations
+            'pass_threshold': eval_result['pass_threshold'],
+            'passed': eval_result['passed'],
+            'range': eval_result['range']
+        }
+        if eval_result.get('compaction'):
+            # What the judge did not see, so the score can be read in context
+            slim_eval['compaction'] = eval_result['compaction']
+        slim_evals.append(slim_eval)
+
+    return {
+        'execution_id': result['execution_id'],
+        'output': result['output'],
+        'input': slim_input(result.get("input")),
+        'evals': slim_evals
+    }
+
+
 def extract_slim_data(full_results_path: str, output_path: str):
     """
     Extract slimmed-down eval results containing:
     - Output (generated summary)
     - Eval scores and explanations
     - Input data (optionally slimmed to remove very large fields)
+    Results are streamed line by line, so memory does not grow with file size.
     """
     
-    slim_results = []
-    
-    with open(full_results_path, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line:
-                continue
-            
-            try:
-                result = json.loads(line)
-                
-                raw_input = result.get("input")
-                if isinstance(raw_input, str):
-                    try:
-                        input_data = json.loads(raw_input)
-                    except json.JSONDecodeError:
-                        input_data = {"raw_input": raw_input}
-                elif isinstance(raw_input, dict):
-                    input_data = raw_input
-                else:
-                    input_data = {"raw_input": raw_input}
-
-                slim_input = slim_input_payload(input_data)
-                
-                # Ensure explanations are preserved
-                # (Some may be empty strings if model didn't provide them)
-                slim_evals = []
-                for eval_result in result['evals']:
-                    slim_evals.append({
-                        'eval_name': eval_result['eval_name'],
-                        'score': eval_result['score'],
-                        'explanation': eval_result.get('explanation', ''),  # Preserve explanations
-                        'pass_threshold': eval_result['pass_threshold'],
-                        'passed': eval_result['passed'],
-                        'range': eval_result['range']
-                    })
-                
-                # Create slim result entry
-                slim_result = {
-                    'execution_id': result['execution_id'],
-                    'output': result['output'],
-                    'input': slim_input,
-                    'evals': slim_evals
-                }
-                
-                slim_results.append(slim_result)
-                
-            except json.JSONDecodeError as e:
-                print(f"Warning: Skipping line {line_num} due to JSON error: {e}")
-                continue
+    count = 0
     
-    # Write slim results
-    with open(output_path, 'w') as f:
-        for result in slim_results:
-            f.write(json.dumps(result) + '\n')
+    with open(output_path, 'wb') as out:
+        for result in iter_jsonl(full_results_path):
+            out.write(dump_line(slim_result(result)))
+            count += 1
     
-    return len(slim_results)
+    return count
 
 
 def resolve_paths(args: argparse.Namespace, base_dir: Path) -> tuple[Path, Path]:
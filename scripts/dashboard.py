@@ -6,10 +6,17 @@ A sleek web interface for viewing evaluation results
 
 from flask import Flask, render_template, jsonify, request, abort, send_file
 import json
+import os
 from pathlib import Path
 from typing import Dict, List, Optional
 import re
 
+from eval_stats import ScoreMatrix
+from input_fields import flatten_scalar_fields
+from jsonl_codec import iter_jsonl, parsed_input
+from live_metrics import format_duration, load_status
+from run_store import RunStore, default_store_path
+
 app = Flask(__name__, 
             template_folder='../dashboard_templates',
             static_folder='../dashboard_static')
@@ -60,52 +67,65 @@ def list_runs() -> List[Dict[str, Optional[str]]]:
     return runs
 
 
-def load_results(results_path: Path) -> List[Dict]:
-    results = []
-    with results_path.open('r') as handle:
-        for line in handle:
-            if line.strip():
-                result = json.loads(line)
-                input_data = result.get("input")
-                if isinstance(input_data, str):
-                    try:
-                        result["input"] = json.loads(input_data)
-                    except json.JSONDecodeError:
-                        result["input"] = {"raw_input": input_data}
-                if isinstance(result.get("input"), dict):
-                    result["input_flat"] = flatten_scalar_fields(result["input"])
-                else:
-                    result["input_flat"] = {}
-                results.append(result)
-    return results
-
-
-def is_scalar(value: object) -> bool:
-    return isinstance(value, (str, int, float, bool))
-
-
-def flatten_scalar_fields(
-    data: Dict,
-    prefix: str = "",
-    depth: int = 0,
-    max_depth: int = 3,
-) -> Dict[str, object]:
-    """Flatten nested dict scalars into dot-path keys; ignore lists to avoid huge fan-out."""
-    if not isinstance(data, dict):
-        return {}
-    if depth >= max_depth:
-        return {}
-    flat: Dict[str, object] = {}
-    for key, value in data.items():
-        path = f"{prefix}.{key}" if prefix else str(key)
-        if is_scalar(value):
-            flat[path] = value
-        elif isinstance(value, dict):
-            flat.update(flatten_scalar_fields(value, path, depth + 1, max_depth))
-        else:
-            # Ignore lists/other structures for identifier columns.
-            continue
-    return flat
+_store: Optional[RunStore] = None
+
+
+def run_store() -> Optional[RunStore]:
+    """The SQLite run store ($EVAL_RUN_STORE or outputs/runs.sqlite), if one exists."""
+    global _store
+    if _store is None:
+        path = Path(os.environ.get("EVAL_RUN_STORE") or default_store_path())
+        if path.exists():
+            _store = RunStore(path)
+    return _store
+
+
+def stored_run(run_id: Optional[str]) -> Optional[RunStore]:
+    store = run_store()
+    return store if run_id and store is not None and store.has_run(run_id) else None
+
+
+def prepare_result(result: Dict) -> Dict:
+    input_data = parsed_input(result)
+    result["input_flat"] = flatten_scalar_fields(input_data) if isinstance(input_data, dict) else {}
+    return result
+
+
+def load_results(results_path: Path, prepare: bool = True) -> List[Dict]:
+    """Results of a JSONL file; inputs are only decoded when `prepare` is set."""
+    return [prepare_result(result) if prepare else result for result in iter_jsonl(results_path)]
+
+
+def load_run_results(active_run: Dict[str, Optional[str]], prepare: bool = True) -> List[Dict]:
+    """Slim results of a run, from the run store when it has the run, else the slim file."""
+    store = stored_run(active_run.get("id"))
+    if store is not None:
+        results = store.load_results(active_run["id"], slim=True)
+        return [prepare_result(result) for result in results] if prepare else results
+    if not active_run.get("slim_path"):
+        return []
+    return load_results(Path(active_run["slim_path"]), prepare)
+
+
+def run_status(active_run: Dict[str, Optional[str]]) -> Optional[Dict]:
+    """Live status the runner publishes for the run (None if it never wrote one)."""
+    if not active_run.get("id"):
+        return None
+    run_dir = Path(__file__).parent.parent / "outputs" / "runs" / active_run["id"]
+    results_path = active_run.get("results_path") or run_dir / f"{active_run['id']}_eval_results.jsonl"
+    return load_status(Path(results_path))
+
+
+def status_summary(status: Optional[Dict]) -> Optional[str]:
+    """One-line progress for the header, or None once the run has finished."""
+    if status is None or status["state"] == "finished":
+        return None
+    evals = status["evals"]
+    percent = evals["done"] * 100 // max(evals["total"], 1)
+    if status["state"] != "running" or status["stale"]:
+        return f"{percent}% ({status['state'] if not status['stale'] else 'no recent updates'})"
+    return f"{percent}% · ETA {format_duration(status['eta_seconds'])}"
+
 
 def slugify(value: str) -> str:
     slug = re.sub(r"[^a-zA-Z0-9]+", "-", value).strip("-").lower()
@@ -182,10 +202,13 @@ def index():
 
     base_dir = Path(__file__).parent.parent
     fallback_path = base_dir / "outputs" / "eval_results_slim.jsonl"
-    results_path = Path(active_run["slim_path"]) if active_run["slim_path"] else fallback_path
-    results = load_results(results_path) if results_path.exists() else []
+    if active_run.get("slim_path") or stored_run(active_run.get("id")):
+        results = load_run_results(active_run)
+    else:
+        results = load_results(fallback_path) if fallback_path.exists() else []
 
     eval_names = [e['eval_name'] for e in results[0]['evals']] if results else []
+    criterion_stats = ScoreMatrix.from_results(results).to_dict()
     input_columns = collect_input_columns(results)
     attach_identifier_values(results, input_columns)
 
@@ -214,15 +237,56 @@ def index():
         prompts_url=prompts_url,
         input_columns=input_columns,
         search_placeholder=search_placeholder,
+        criterion_stats=criterion_stats,
+        run_progress=status_summary(run_status(active_run)),
     )
 
 @app.route('/api/results')
 def api_results():
     selected_run_id = request.args.get("run")
     active_run = resolve_run(selected_run_id)
-    if not active_run.get("slim_path"):
-        return jsonify([])
-    return jsonify(load_results(Path(active_run["slim_path"])))
+    return jsonify(load_run_results(active_run))
+
+
+@app.route('/api/stats')
+def api_stats():
+    selected_run_id = request.args.get("run")
+    active_run = resolve_run(selected_run_id)
+    store = stored_run(active_run.get("id"))
+    if store is not None:
+        return jsonify(ScoreMatrix.from_results(store.iter_scores(active_run["id"])).to_dict())
+    return jsonify(ScoreMatrix.from_results(load_run_results(active_run, prepare=False)).to_dict())
+
+
+@app.route('/api/status')
+def api_status():
+    """The active run's live status (as written to <RUN_ID>_status.json), with a header summary."""
+    active_run = resolve_run(request.args.get("run"))
+    status = run_status(active_run)
+    if status is None:
+        abort(404)
+    return jsonify({**status, "summary": status_summary(status)})
+
+
+@app.route('/api/query')
+def api_query():
+    """
+    Filter one run's eval results through the run store, e.g.
+    /api/query?run=02&eval=Numerical%20fidelity&passed=false&max_score=5
+    """
+    active_run = resolve_run(request.args.get("run"))
+    store = stored_run(active_run.get("id"))
+    if store is None:
+        abort(404)
+    passed = request.args.get("passed")
+    return jsonify(store.query(
+        active_run["id"],
+        eval_name=request.args.get("eval"),
+        passed=None if passed is None else passed.lower() in ("1", "true", "yes"),
+        min_score=request.args.get("min_score", type=float),
+        max_score=request.args.get("max_score", type=float),
+        limit=request.args.get("limit", type=int),
+    ))
 
 
 @app.route('/meta-analysis/<run_id>')
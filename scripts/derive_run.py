@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Derive a run from an earlier one after Evals.json changes.
+Each criterion definition is hashed without its pass threshold. Results of criteria
+whose hash is unchanged are carried over for executions whose input/output match;
+a threshold-only change just recomputes `passed`. Added or modified criteria are judged.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from checkpoint import is_error_result
+from duplicates import execution_fingerprint
+from jsonl_codec import DecodeError, loads
+
+
+UNCHANGED = "unchanged"
+THRESHOLD = "threshold"
+MODIFIED = "modified"
+ADDED = "added"
+
+
+def criterion_hash(criterion: Dict) -> str:
+    """sha256 of the criterion definition, ignoring pass_threshold (and key order)."""
+    definition = {key: value for key, value in criterion.items() if key != "pass_threshold"}
+    encoded = json.dumps(definition, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def criteria_hashes(evals: List[Dict]) -> Dict[str, str]:
+    return {criterion["name"]: criterion_hash(criterion) for criterion in evals}
+
+
+def compare_criteria(previous: List[Dict], current: List[Dict]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Classify each current criterion as unchanged, threshold (only pass_threshold
+    differs), modified or added. Also returns the names of removed criteria.
+    """
+    previous_by_name = {criterion["name"]: criterion for criterion in previous}
+    changes = {}
+    for criterion in current:
+        before = previous_by_name.get(criterion["name"])
+        if before is None:
+            changes[criterion["name"]] = ADDED
+        elif criterion_hash(before) != criterion_hash(criterion):
+            changes[criterion["name"]] = MODIFIED
+        elif before.get("pass_threshold") != criterion.get("pass_threshold"):
+            changes[criterion["name"]] = THRESHOLD
+        else:
+            changes[criterion["name"]] = UNCHANGED
+    removed = [name for name in previous_by_name if name not in changes]
+    return changes, removed
+
+
+class DerivedRun:
+    """Carried-over results of an earlier run, keyed like the resume cells."""
+
+    def __init__(self, run_id: str, changes: Dict[str, str], removed: List[str], same_executions: bool):
+        self.run_id = run_id
+        self.changes = changes
+        self.removed = removed
+        self.same_executions = same_executions
+        self.cells: Dict[int, Dict[str, Dict]] = {}
+        self.mismatched = 0
+
+    @property
+    def reusable(self) -> List[str]:
+        return [name for name, change in self.changes.items() if change in (UNCHANGED, THRESHOLD)]
+
+    @property
+    def carried(self) -> int:
+        return sum(len(done) for done in self.cells.values())
+
+    def to_dict(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "criteria": self.changes,
+            "removed": self.removed,
+            "same_executions": self.same_executions,
+            "carried_results": self.carried,
+            "mismatched_executions": self.mismatched,
+        }
+
+
+def load_derived_run(
+    previous_dir: Path,
+    evals: List[Dict],
+    executions: Iterable[Tuple[int, Dict]],
+    executions_sha256: str,
+    input_token_budget: Optional[int] = None,
+) -> DerivedRun:
+    """
+    Compare `evals` with the previous run's <RUN_ID>_Evals.json and collect the
+    results it can reuse. If the previous manifest's executions sha256 equals
+    `executions_sha256` every result is reused by id; otherwise each execution's
+    input/output is checked against the previous result with the same id. A changed
+    run-wide `input_token_budget` counts as a modification of the criteria it applies to.
+    """
+    run_id = previous_dir.name
+    prefix = f"{run_id}_"
+    previous_evals = json.loads((previous_dir / f"{prefix}Evals.json").read_text())
+    manifest_path = previous_dir / f"{prefix}run_manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    previous_sha256 = manifest.get("inputs", {}).get("executions", {}).get("sha256")
+    changes, removed = compare_criteria(previous_evals, evals)
+    if manifest.get("inputs", {}).get("evals", {}).get("input_token_budget") != input_token_budget:
+        for criterion in evals:
+            own_budget = (criterion.get("input_compaction") or {}).get("max_tokens")
+            if own_budget is None and changes[criterion["name"]] in (UNCHANGED, THRESHOLD):
+                changes[criterion["name"]] = MODIFIED
+    derived = DerivedRun(run_id, changes, removed, previous_sha256 == executions_sha256)
+    reusable = set(derived.reusable)
+    if not reusable:
+        return derived
+
+    fingerprints: Dict[int, str] = {}
+    with (previous_dir / f"{prefix}eval_results.jsonl").open("rb") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            try:
+                result = loads(line)
+            except DecodeError:
+                continue
+            done = {
+                eval_result["eval_name"]: dict(eval_result, carried_from=run_id)
+                for eval_result in result.get("evals", [])
+                if not is_error_result(eval_result) and eval_result.get("eval_name") in reusable
+            }
+            if not done:
+                continue
+            execution_id = result.get("execution_id")
+            derived.cells[execution_id] = done
+            if not derived.same_executions:
+                fingerprints[execution_id] = execution_fingerprint(result.get("input"), result.get("output"))
+
+    if not derived.same_executions:
+        matched = set()
+        for execution_id, execution in executions:
+            fingerprint = fingerprints.get(execution_id)
+            if fingerprint is None:
+                continue
+            if fingerprint == execution_fingerprint(execution.get("llm-input"), execution.get("llm-output")):
+                matched.add(execution_id)
+            else:
+                derived.mismatched += 1
+        derived.cells = {
+            execution_id: done for execution_id, done in derived.cells.items() if execution_id in matched
+        }
+    return derived
+
+
+def print_derived(derived: DerivedRun) -> None:
+    print(f"\nDeriving from run {derived.run_id}:")
+    for name, change in derived.changes.items():
+        print(f"  {name}: {change}")
+    for name in derived.removed:
+        print(f"  {name}: removed")
+    if derived.mismatched:
+        print(f"  {derived.mismatched} executions differ from run {derived.run_id} and will be re-judged")
+    print(f"  Carrying over {derived.carried} results")
+
+
+def previous_run_dir(runs_dir: Path, run_id: str) -> Optional[Path]:
+    run_id = run_id.zfill(2) if run_id.isdigit() else run_id
+    candidate = runs_dir / run_id
+    return candidate if candidate.is_dir() else None
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Duplicate execution detection.
+Executions with identical (llm-input, llm-output) pairs are fingerprinted in one pass;
+only the first of each is judged and its result is copied to the later ids, in
+execution order, with `copied_from` naming the execution it was judged as.
+"""
+
+import hashlib
+import json
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def execution_fingerprint(item_input, item_output) -> str:
+    """Hash of one execution's llm-input/llm-output (equally the input/output of its result)."""
+    encoded = json.dumps([item_input, item_output], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class DuplicateIndex:
+    def __init__(self, first_seen: Dict[int, int], total: int):
+        # duplicate execution_id -> first execution_id in the file with the same pair
+        self.first_seen = first_seen
+        self.total = total
+        self.restrict(lambda execution_id: True)
+
+    @classmethod
+    def scan(cls, executions: Iterable[Tuple[int, Dict]]) -> "DuplicateIndex":
+        first: Dict[str, int] = {}
+        first_seen: Dict[int, int] = {}
+        total = 0
+        for execution_id, execution in executions:
+            total += 1
+            fingerprint = execution_fingerprint(execution.get("llm-input"), execution.get("llm-output"))
+            source = first.setdefault(fingerprint, execution_id)
+            if source != execution_id:
+                first_seen[execution_id] = source
+        return cls(first_seen, total)
+
+    def restrict(self, judged: Callable[[int], bool]) -> None:
+        """
+        Fan out only among ids evaluated in this run (its shard or sample, not already
+        written): the first judged id of each group is judged, the rest are copied.
+        """
+        groups: Dict[int, List[int]] = {}
+        for duplicate, source in sorted(self.first_seen.items()):
+            groups.setdefault(source, [source]).append(duplicate)
+        self.canonical: Dict[int, int] = {}
+        for members in groups.values():
+            judged_members = [execution_id for execution_id in members if judged(execution_id)]
+            for duplicate in judged_members[1:]:
+                self.canonical[duplicate] = judged_members[0]
+        self.queue: deque = deque(sorted(self.canonical))
+        self.remaining: Counter = Counter(self.canonical.values())
+        self.kept: Dict[int, Dict] = {}
+
+    @property
+    def saved_executions(self) -> int:
+        return len(self.canonical)
+
+    def source(self, execution_id: int) -> Optional[int]:
+        return self.canonical.get(execution_id)
+
+    def keep(self, result: Dict) -> None:
+        """Hold a judged result while duplicates of it are still to be written."""
+        if self.remaining.get(result["execution_id"]):
+            self.kept[result["execution_id"]] = result
+
+    def copies_before(self, execution_id: Optional[int] = None) -> Iterator[Dict]:
+        """Copies for queued duplicates with a smaller id than `execution_id` (all if None)."""
+        while self.queue and (execution_id is None or self.queue[0] < execution_id):
+            duplicate = self.queue.popleft()
+            source_id = self.canonical[duplicate]
+            source = self.kept[source_id]
+            self.remaining[source_id] -= 1
+            if not self.remaining[source_id]:
+                del self.kept[source_id]
+            copy = dict(source, execution_id=duplicate, copied_from=source_id)
+            copy["evals"] = [dict(eval_result) for eval_result in source["evals"]]
+            yield copy
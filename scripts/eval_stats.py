@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Per-criterion statistics for eval results.
+ScoreMatrix is an executions x criteria matrix of scores and pass flags filled in one
+pass over the results; means, pass rates, score histograms and bootstrap confidence
+intervals are all read from it. Columns are plain `array`s, viewed through NumPy when it
+is installed. Bootstrap resamples are multinomial draws over the distinct scores, so they
+cost O(resamples x distinct scores) rather than O(resamples x executions).
+
+RunningScores gives the same statistics from running sums and score histograms, in
+O(criteria x distinct scores) memory, for a run's live summary; the matrix is for
+offline reports that hold a whole run's results anyway.
+"""
+
+import math
+import random
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from profiling import percentile
+
+try:
+    import numpy as np
+except ImportError:  # optional
+    np = None
+
+
+NOT_JUDGED = -1
+BOOTSTRAP_RESAMPLES = 1000
+
+
+def score_label(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def binomial(rng: random.Random, trials: int, p: float) -> int:
+    """Binomial draw without NumPy: exact (geometric gaps) for small means, normal approximation otherwise."""
+    if hasattr(rng, "binomialvariate"):  # Python 3.12+
+        return rng.binomialvariate(trials, p)
+    q = min(p, 1 - p)
+    if q <= 0:
+        return 0 if p <= 0 else trials
+    if trials * q < 30:
+        count = position = 0
+        log_miss = math.log(1 - q)
+        while True:
+            position += int(math.log(1 - rng.random()) / log_miss) + 1
+            if position > trials:
+                break
+            count += 1
+    else:
+        count = round(rng.gauss(trials * q, math.sqrt(trials * q * (1 - q))))
+        count = max(0, min(trials, count))
+    return count if q == p else trials - count
+
+
+def multinomial(rng: random.Random, trials: int, weights: List[int]) -> List[int]:
+    """Counts per bin for `trials` draws with probabilities proportional to `weights`."""
+    counts = []
+    remaining_weight = sum(weights)
+    for weight in weights[:-1]:
+        count = binomial(rng, trials, weight / remaining_weight) if trials else 0
+        counts.append(count)
+        trials -= count
+        remaining_weight -= weight
+    counts.append(trials)
+    return counts
+
+
+COUNT_FIELDS = (
+    "score_sum", "scored", "passed", "total",
+    "weighted_score_sum", "weighted_scored", "weighted_passed", "weighted_total",
+)
+
+
+class CriterionStats(ABC):
+    """Statistics shared by ScoreMatrix and RunningScores, read from counts() and histogram()."""
+
+    criteria: List[str]
+    weighted: bool
+
+    @abstractmethod
+    def counts(self, eval_name: str) -> Dict[str, float]:
+        """Running sums: score_sum, scored, passed, total and their weighted_ variants."""
+
+    @abstractmethod
+    def histogram(self, eval_name: str) -> Dict[float, int]:
+        """Score -> number of executions with that score."""
+
+    def avg_score(self, eval_name: str) -> float:
+        counts = self.counts(eval_name)
+        return counts["score_sum"] / counts["scored"] if counts["scored"] else 0
+
+    def pass_rate(self, eval_name: str) -> float:
+        counts = self.counts(eval_name)
+        return counts["passed"] / counts["total"] if counts["total"] else 0
+
+    def weighted_avg_score(self, eval_name: str) -> float:
+        counts = self.counts(eval_name)
+        return counts["weighted_score_sum"] / counts["weighted_scored"] if counts["weighted_scored"] else 0
+
+    def weighted_pass_rate(self, eval_name: str) -> float:
+        counts = self.counts(eval_name)
+        return counts["weighted_passed"] / counts["weighted_total"] if counts["weighted_total"] else 0
+
+    def bootstrap_ci(
+        self,
+        eval_name: str,
+        statistic: str = "pass_rate",
+        confidence: float = 0.95,
+        resamples: int = BOOTSTRAP_RESAMPLES,
+        seed: int = 0,
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Percentile bootstrap interval of the pass rate or average score (unweighted).
+        Resampling n executions is a multinomial draw over the distinct values, so
+        only the histogram is needed. None without data.
+        """
+        if statistic == "pass_rate":
+            counts = self.counts(eval_name)
+            histogram = {1.0: counts["passed"], 0.0: counts["total"] - counts["passed"]}
+        elif statistic == "avg_score":
+            histogram = self.histogram(eval_name)
+        else:
+            raise ValueError(f"Unknown statistic {statistic!r}")
+        values = [value for value, count in histogram.items() if count]
+        weights = [histogram[value] for value in values]
+        samples = sum(weights)
+        if not samples:
+            return None
+        if np is not None:
+            draws = np.random.default_rng(seed).multinomial(
+                samples, np.array(weights) / samples, size=resamples
+            )
+            means = np.sort(draws @ np.array(values, dtype=np.float64) / samples).tolist()
+        else:
+            rng = random.Random(seed)
+            means = sorted(
+                sum(value * count for value, count in zip(values, multinomial(rng, samples, weights))) / samples
+                for _ in range(resamples)
+            )
+        tail = (1 - confidence) / 2 * 100
+        return percentile(means, tail), percentile(means, 100 - tail)
+
+    def criterion_dict(self, eval_name: str, intervals: bool = True) -> Dict:
+        counts = self.counts(eval_name)
+        stats = {
+            "avg_score": self.avg_score(eval_name),
+            "pass_rate": self.pass_rate(eval_name),
+            "failures": counts["total"] - counts["passed"],
+            "total": counts["total"],
+            "histogram": {score_label(value): count for value, count in self.histogram(eval_name).items()},
+        }
+        if self.weighted:
+            # Population estimates from stratified sampling weights.
+            stats["weighted_avg_score"] = self.weighted_avg_score(eval_name)
+            stats["weighted_pass_rate"] = self.weighted_pass_rate(eval_name)
+        if intervals:
+            for statistic in ("pass_rate", "avg_score"):
+                interval = self.bootstrap_ci(eval_name, statistic)
+                stats[f"{statistic}_ci"] = [round(bound, 4) for bound in interval] if interval else None
+        return stats
+
+    def to_dict(self, intervals: bool = True) -> Dict[str, Dict]:
+        return {eval_name: self.criterion_dict(eval_name, intervals) for eval_name in self.criteria}
+
+
+class ScoreMatrix(CriterionStats):
+    def __init__(self):
+        self.criteria: List[str] = []
+        self.execution_ids: List[Optional[int]] = []
+        self.weights = array("d")
+        # One column per criterion, one entry per execution: score (nan when missing) and
+        # passed (1/0, NOT_JUDGED when the execution has no result for the criterion).
+        self.scores: List[array] = []
+        self.passed: List[array] = []
+        self.column: Dict[str, int] = {}
+        # Set once any result carries a stratified `sampling_weight`.
+        self.weighted = False
+        self._counts: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> "ScoreMatrix":
+        matrix = cls()
+        for result in results:
+            matrix.add(result)
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.execution_ids)
+
+    def _column(self, eval_name: str) -> int:
+        index = self.column.get(eval_name)
+        if index is None:
+            index = self.column[eval_name] = len(self.criteria)
+            self.criteria.append(eval_name)
+            self.scores.append(array("d", [math.nan]) * len(self))
+            self.passed.append(array("b", [NOT_JUDGED]) * len(self))
+        return index
+
+    def add(self, result: Dict) -> None:
+        row = len(self)
+        self.execution_ids.append(result.get("execution_id"))
+        weight = result.get("sampling_weight")
+        if weight is not None:
+            self.weighted = True
+        self.weights.append(1.0 if weight is None else weight)
+        for scores, passed in zip(self.scores, self.passed):
+            scores.append(math.nan)
+            passed.append(NOT_JUDGED)
+        for eval_result in result.get("evals", []):
+            if not eval_result:
+                continue
+            index = self._column(eval_result.get("eval_name"))
+            score = eval_result.get("score")
+            self.scores[index][row] = math.nan if score is None else score
+            self.passed[index][row] = 1 if eval_result.get("passed") else 0
+        self._counts.clear()
+
+    def counts(self, eval_name: str) -> Dict[str, float]:
+        """Plain and sampling-weighted sums for one criterion (cached until the next add)."""
+        cached = self._counts.get(eval_name)
+        if cached is not None:
+            return cached
+        index = self.column[eval_name]
+        if np is not None:
+            scores = np.frombuffer(self.scores[index], dtype=np.float64)
+            passed = np.frombuffer(self.passed[index], dtype=np.int8)
+            weights = np.frombuffer(self.weights, dtype=np.float64)
+            scored = ~np.isnan(scores)
+            judged = passed != NOT_JUDGED
+            ok = passed == 1
+            counts = {
+                "score_sum": float(scores[scored].sum()),
+                "scored": int(scored.sum()),
+                "passed": int(ok.sum()),
+                "total": int(judged.sum()),
+                "weighted_score_sum": float((scores[scored] * weights[scored]).sum()),
+                "weighted_scored": float(weights[scored].sum()),
+                "weighted_passed": float(weights[ok].sum()),
+                "weighted_total": float(weights[judged].sum()),
+            }
+        else:
+            counts = dict.fromkeys(COUNT_FIELDS, 0)
+            for score, passed, weight in zip(self.scores[index], self.passed[index], self.weights):
+                if passed == NOT_JUDGED:
+                    continue
+                counts["total"] += 1
+                counts["weighted_total"] += weight
+                if passed:
+                    counts["passed"] += 1
+                    counts["weighted_passed"] += weight
+                if score == score:  # not nan
+                    counts["score_sum"] += score
+                    counts["scored"] += 1
+                    counts["weighted_score_sum"] += score * weight
+                    counts["weighted_scored"] += weight
+        self._counts[eval_name] = counts
+        return counts
+
+    def histogram(self, eval_name: str) -> Dict[float, int]:
+        """Number of executions at each score, in score order."""
+        column = self.scores[self.column[eval_name]]
+        if np is not None:
+            scores = np.frombuffer(column, dtype=np.float64)
+            values, counts = np.unique(scores[~np.isnan(scores)], return_counts=True)
+            return {float(value): int(count) for value, count in zip(values, counts)}
+        counter = Counter(score for score in column if score == score)
+        return {value: counter[value] for value in sorted(counter)}
+
+
+class RunningScores(CriterionStats):
+    """Per-criterion sums and score histograms, updated one result at a time."""
+
+    def __init__(self):
+        self.criteria: List[str] = []
+        self.sums: Dict[str, Dict[str, float]] = {}
+        self.histograms: Dict[str, Counter] = {}
+        self.weighted = False
+
+    def add(self, result: Dict) -> None:
+        weight = result.get("sampling_weight")
+        if weight is not None:
+            self.weighted = True
+        else:
+            weight = 1.0
+        for eval_result in result.get("evals", []):
+            if not eval_result:
+                continue
+            eval_name = eval_result.get("eval_name")
+            counts = self.sums.get(eval_name)
+            if counts is None:
+                self.criteria.append(eval_name)
+                counts = self.sums[eval_name] = dict.fromkeys(COUNT_FIELDS, 0)
+                self.histograms[eval_name] = Counter()
+            counts["total"] += 1
+            counts["weighted_total"] += weight
+            if eval_result.get("passed"):
+                counts["passed"] += 1
+                counts["weighted_passed"] += weight
+            score = eval_result.get("score")
+            if score is not None:
+                counts["score_sum"] += score
+                counts["scored"] += 1
+                counts["weighted_score_sum"] += score * weight
+                counts["weighted_scored"] += weight
+                self.histograms[eval_name][float(score)] += 1
+
+    def counts(self, eval_name: str) -> Dict[str, float]:
+        return self.sums[eval_name]
+
+    def histogram(self, eval_name: str) -> Dict[float, int]:
+        counter = self.histograms[eval_name]
+        return {value: counter[value] for value in sorted(counter)}
+
+    def to_state(self) -> Dict:
+        """JSON-safe copy of the sums and histograms (histograms as [score, count] pairs)."""
+        return {
+            "weighted": self.weighted,
+            "criteria": [
+                [eval_name, dict(self.sums[eval_name]), sorted(self.histograms[eval_name].items())]
+                for eval_name in self.criteria
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "RunningScores":
+        """Inverse of to_state; raises KeyError or ValueError on a malformed state."""
+        scores = cls()
+        scores.weighted = bool(state["weighted"])
+        for eval_name, sums, histogram in state["criteria"]:
+            scores.criteria.append(eval_name)
+            scores.sums[eval_name] = {field: sums[field] for field in COUNT_FIELDS}
+            scores.histograms[eval_name] = Counter({float(value): count for value, count in histogram})
+        return scores
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Precompiled eval message templates.
+Each criterion's `input` messages are parsed once into literal and variable segments,
+so rendering a judge call is a single join instead of repeated str.replace passes.
+Optionally, a variable that appears in several messages is sent in only one of them.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from input_compaction import CompactionSpec
+
+
+# Template variable -> execution field (the same two variables replace_template_variables handles).
+TEMPLATE_VARIABLES = {
+    "item.input": "llm-input",
+    "item.output": "llm-output",
+}
+
+VARIABLE_PATTERN = re.compile(r"\{\{(item\.input|item\.output)\}\}")
+
+DEDUPED_REFERENCE = "[{variable} is provided in the {role} message]"
+
+Segment = Union[str, Tuple[str]]
+
+
+def role_for(role: str) -> str:
+    return role if role != "developer" else "system"
+
+
+def parse_segments(template: str) -> List[Segment]:
+    """Split a template into literal strings and 1-tuples naming a variable."""
+    segments: List[Segment] = []
+    position = 0
+    for match in VARIABLE_PATTERN.finditer(template):
+        if match.start() > position:
+            segments.append(template[position:match.start()])
+        segments.append((match.group(1),))
+        position = match.end()
+    if position < len(template):
+        segments.append(template[position:])
+    return segments
+
+
+class CompiledEval:
+    """Compiled messages for one criterion, plus running counts of duplicated payload."""
+
+    def __init__(self, eval_criteria: Dict, dedupe_payload: bool = False):
+        self.name = eval_criteria["name"]
+        self.dedupe_payload = dedupe_payload
+        self.messages: List[Tuple[str, List[Segment]]] = [
+            (role_for(msg["role"]), parse_segments(msg["content"]))
+            for msg in eval_criteria["input"]
+        ]
+        # Keep each variable in the last message that uses it; earlier copies are duplicates.
+        self.keep_in: Dict[str, int] = {}
+        self.occurrences: Dict[str, int] = {}
+        for index, (_, segments) in enumerate(self.messages):
+            for segment in segments:
+                if isinstance(segment, tuple):
+                    self.keep_in[segment[0]] = index
+                    self.occurrences[segment[0]] = self.occurrences.get(segment[0], 0) + 1
+        self.duplicates = {
+            variable: count - sum(
+                1 for segment in self.messages[self.keep_in[variable]][1]
+                if segment == (variable,)
+            )
+            for variable, count in self.occurrences.items()
+        }
+        self.rendered_chars = 0
+        self.duplicate_chars = 0
+
+    def render(self, execution: Dict) -> List[Dict]:
+        values = {
+            variable: execution.get(field, "") for variable, field in TEMPLATE_VARIABLES.items()
+        }
+        messages = []
+        for index, (role, segments) in enumerate(self.messages):
+            parts = []
+            for segment in segments:
+                if not isinstance(segment, tuple):
+                    parts.append(segment)
+                    continue
+                variable = segment[0]
+                if self.dedupe_payload and index != self.keep_in[variable]:
+                    keep_role = self.messages[self.keep_in[variable]][0]
+                    parts.append(DEDUPED_REFERENCE.format(variable=variable, role=keep_role))
+                else:
+                    parts.append(values[variable])
+            content = "".join(parts)
+            self.rendered_chars += len(content)
+            messages.append({"role": role, "content": content})
+        self.duplicate_chars += sum(
+            len(values[variable]) * count for variable, count in self.duplicates.items()
+        )
+        return messages
+
+    def render_rubric(self, placeholders: Dict[str, str]) -> List[Dict]:
+        """Render with each variable replaced by a fixed placeholder (no payload, not counted)."""
+        return [
+            {
+                "role": role,
+                "content": "".join(
+                    placeholders[segment[0]] if isinstance(segment, tuple) else segment
+                    for segment in segments
+                ),
+            }
+            for role, segments in self.messages
+        ]
+
+    def savings(self) -> Dict[str, int]:
+        """Estimated tokens (~4 chars each) spent on, or saved from, duplicated payload."""
+        return {
+            "rendered_tokens": self.rendered_chars // 4,
+            "duplicate_tokens": self.duplicate_chars // 4,
+        }
+
+
+def compile_evals(
+    evals: List[Dict],
+    dedupe_payload: bool = False,
+    input_token_budget: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Return copies of the criteria with their compiled template attached under `_template`
+    and their input compaction spec (or None) under `_compaction`.
+    """
+    return [
+        {
+            **eval_criteria,
+            "_template": CompiledEval(eval_criteria, dedupe_payload),
+            "_compaction": CompactionSpec.for_criterion(eval_criteria, input_token_budget),
+        }
+        for eval_criteria in evals
+    ]
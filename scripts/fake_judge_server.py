@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Local fake OpenAI-compatible judge server for offline benchmarks.
+Answers POST /v1/chat/completions with a score-shaped response after a sampled delay,
+and can inject HTTP 500s and 429s (with retry-after-ms). GET /stats returns counters.
+
+Point the runner at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any API key.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Combined multi-criterion calls (see combined_judge.py) name their JSON keys in the prompt.
+COMBINED_KEYS_PATTERN = re.compile(r"exactly these keys: (.*?)\. Each value")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution in seconds:
+      fixed:0.2 | uniform:0.05,0.5 | exponential:0.2 (mean) | lognormal:0.3,0.5 (median, sigma)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    try:
+        if kind == "fixed":
+            (delay,) = values
+            return lambda rng: delay
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "exponential":
+            (mean,) = values
+            return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: median * rng.lognormvariate(0, sigma)
+    except ValueError:
+        pass
+    raise ValueError(f"Unknown latency spec {spec!r}")
+
+
+class FakeJudgeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: str = "fixed:0.2",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_ms: int = 200,
+        seed: int = 0,
+        latency_per_1k_chars: float = 0.0,
+    ):
+        super().__init__(address, FakeJudgeHandler)
+        self.latency_spec = latency
+        self.sample_latency = parse_latency(latency)
+        # Extra delay proportional to prompt length, so long prompts are slow calls.
+        self.latency_per_1k_chars = latency_per_1k_chars
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after_ms = retry_after_ms
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats)
+
+    def draw(self) -> Tuple[str, float, int]:
+        """Pick the outcome ('ok', 'error' or 'rate_limited'), delay and score for one request."""
+        with self.lock:
+            self.stats["requests"] += 1
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                outcome = "rate_limited"
+            elif roll < self.rate_limit_rate + self.error_rate:
+                outcome = "errors"
+            else:
+                outcome = "ok"
+            self.stats[outcome] += 1
+            delay = max(0.0, self.sample_latency(self.rng)) if outcome != "rate_limited" else 0.0
+            return outcome, delay, self.rng.randint(5, 10)
+
+
+class FakeJudgeHandler(BaseHTTPRequestHandler):
+    server: FakeJudgeServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        try:
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this request (e.g. a hedged duplicate was cancelled).
+            self.close_connection = True
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send(200, self.server.snapshot())
+        else:
+            self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body or b"{}")
+        outcome, delay, score = self.server.draw()
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+        if outcome == "rate_limited":
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached (injected)", "type": "requests", "code": "rate_limit_exceeded"}},
+                {"retry-after-ms": str(self.server.retry_after_ms)},
+            )
+            return
+        time.sleep(delay + prompt_chars / 1000 * self.server.latency_per_1k_chars)
+        if outcome == "errors":
+            self._send(500, {"error": {"message": "Internal error (injected)", "type": "server_error"}})
+            return
+        text = f"## Score\nScore: {score}\n\n## Explanation\nSynthetic judgement from the fake judge server."
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+            match = COMBINED_KEYS_PATTERN.search(prompt)
+            keys = json.loads(f"[{match.group(1)}]") if match else ["result"]
+            with self.server.lock:
+                scores = [self.server.rng.randint(5, 10) for _ in keys]
+            text = json.dumps({
+                key: {"score": key_score, "explanation": "Synthetic judgement."}
+                for key, key_score in zip(keys, scores)
+            })
+        self._send(200, {
+            "id": f"chatcmpl-fake-{self.server.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4 + 1,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": prompt_chars // 4 + 1 + len(text) // 4,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        })
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **config) -> FakeJudgeServer:
+    """Start the server on a background thread (port 0 picks a free port)."""
+    server = FakeJudgeServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI-compatible judge for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0.2", help="fixed:S | uniform:LO,HI | exponential:MEAN | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429.")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="retry-after-ms header sent with injected 429s.")
+    parser.add_argument("--latency-per-1k-chars", type=float, default=0.0, help="Extra seconds of latency per 1000 prompt characters.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeJudgeServer(
+        (args.host, args.port),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_ms=args.retry_after_ms,
+        seed=args.seed,
+        latency_per_1k_chars=args.latency_per_1k_chars,
+    )
+    print(f"Fake judge listening on http://{args.host}:{server.server_port}/v1 (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
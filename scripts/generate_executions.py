@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Weekly Portfolio Briefing executions for benchmarking.
+Each line has the usual {"llm-input": "<JSON string>", "llm-output": "<briefing>"} shape;
+holdings, news items and output length are adjustable so payload size can be swept.
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict
+
+from jsonl_codec import dump_line
+
+
+SECTORS = ["Technology", "Healthcare", "Financials", "Energy", "Consumer", "Industrials", "Utilities"]
+CURRENCIES = ["USD", "EUR", "GBP"]
+FILLER = (
+    "Moves were broadly in line with the provided market context, and no single "
+    "holding dominated the week. "
+)
+
+
+def make_input(rng: random.Random, index: int, holdings: int, news: int) -> Dict:
+    start_value = round(rng.uniform(5_000, 500_000), 2)
+    rows = []
+    for position in range(holdings):
+        weight = rng.uniform(0.5, 10)
+        weekly_return = rng.uniform(-6, 6)
+        rows.append({
+            "symbol": f"SYM{position:03d}",
+            "name": f"Synthetic Holding {position}",
+            "sector": rng.choice(SECTORS),
+            "weight_pct": round(weight, 2),
+            "weekly_return_pct": round(weekly_return, 2),
+            "contribution_pct": round(weight * weekly_return / 100, 3),
+        })
+    portfolio_return = round(sum(row["contribution_pct"] for row in rows), 2)
+    news_items = []
+    for item in range(news):
+        linked = rng.sample([row["symbol"] for row in rows], k=min(2, len(rows)))
+        news_items.append({
+            "id": f"news-{index}-{item}",
+            "headline": f"Synthetic sector update {item}",
+            "summary": (
+                f"Shares in {', '.join(linked)} moved after a routine company update. "
+                "Analysts described the news as incremental. No guidance was changed."
+            ),
+            "linked_holdings": linked,
+            "confidence": rng.choice(["high", "medium", "low"]),
+        })
+    return {
+        "briefing_info": {
+            "user_id": f"user-{index:06d}",
+            "week_ending": "2025-01-31",
+            "portfolio_currency": rng.choice(CURRENCIES),
+        },
+        "portfolio_summary": {
+            "starting_value": start_value,
+            "ending_value": round(start_value * (1 + portfolio_return / 100), 2),
+            "portfolio_return_pct": portfolio_return,
+        },
+        "holdings": rows,
+        "market_context": {
+            "benchmark": "Global Equity Index",
+            "benchmark_return_pct": round(rng.uniform(-3, 3), 2),
+            "volatility_proxy": round(rng.uniform(10, 30), 1),
+            "rates_move_bps": rng.randint(-25, 25),
+        },
+        "news_digest": news_items,
+    }
+
+
+def make_output(payload: Dict, output_chars: int) -> str:
+    summary = payload["portfolio_summary"]
+    ranked = sorted(payload["holdings"], key=lambda row: abs(row["contribution_pct"]), reverse=True)
+    lines = [
+        "## This week",
+        f"Your portfolio returned {summary['portfolio_return_pct']:.2f}%, moving from "
+        f"{summary['starting_value']:.2f} to {summary['ending_value']:.2f}.",
+        "",
+        "## Top movers",
+    ]
+    for row in ranked[:3]:
+        lines.append(f"- {row['symbol']}: {row['weekly_return_pct']:+.2f}% ({row['contribution_pct']:+.3f} pts)")
+    lines += ["", "## Context", ""]
+    base = "\n".join(lines)
+    text = base
+    while len(text) < output_chars:
+        text += FILLER
+    return text[:max(output_chars, len(base))]
+
+
+def generate(output_path: Path, count: int, holdings: int, news: int, output_chars: int, seed: int) -> int:
+    rng = random.Random(seed)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as handle:
+        for index in range(count):
+            payload = make_input(rng, index, holdings, news)
+            execution = {
+                "llm-input": json.dumps(payload),
+                "llm-output": make_output(payload, output_chars),
+            }
+            handle.write(dump_line(execution))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic executions for benchmarks.")
+    parser.add_argument("--output-path", required=True, help="Executions JSONL to write.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of executions.")
+    parser.add_argument("--holdings", type=int, default=10, help="Holdings per input (drives input size).")
+    parser.add_argument("--news", type=int, default=4, help="News digest items per input.")
+    parser.add_argument("--output-chars", type=int, default=1500, help="Approximate briefing length in characters.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same file).")
+    args = parser.parse_args()
+
+    count = generate(Path(args.output_path), args.count, args.holdings, args.news, args.output_chars, args.seed)
+    print(f"Wrote {count} executions to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Hedged judge requests.
+Request latencies are tracked per model over a sliding window. Once a model has
+enough samples, a request still running at the chosen latency percentile gets one
+duplicate; the first successful answer is kept and the other request is cancelled.
+Duplicates are capped at `budget` x requests so a slow provider is not hit twice as hard,
+and the caller can refuse one (e.g. when no concurrency slot is free for it).
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from profiling import percentile
+
+
+WINDOW = 500
+MIN_SAMPLES = 20
+# Extra hedges allowed before the budget rate applies (lets small runs hedge at all).
+BURST = 2
+
+
+class ModelLatency:
+    def __init__(self):
+        self.samples: Deque[float] = deque(maxlen=WINDOW)
+        self.ordered: Optional[list] = None
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saved_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.ordered = None
+
+    def sorted_samples(self) -> list:
+        if self.ordered is None:
+            self.ordered = sorted(self.samples)
+        return self.ordered
+
+    def expected_remaining(self, elapsed: float) -> float:
+        """Mean extra time of past requests that were still running after `elapsed` seconds."""
+        slower = [seconds for seconds in self.sorted_samples() if seconds > elapsed]
+        return sum(slower) / len(slower) - elapsed if slower else 0.0
+
+
+class HedgePolicy:
+    def __init__(self, percentile: float = 95.0, budget: float = 0.05, min_samples: int = MIN_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.models: Dict[str, ModelLatency] = {}
+
+    def model(self, model: str) -> ModelLatency:
+        stats = self.models.get(model)
+        if stats is None:
+            stats = self.models[model] = ModelLatency()
+        return stats
+
+    def delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to `model` (None until enough samples)."""
+        stats = self.model(model)
+        if len(stats.samples) < self.min_samples:
+            return None
+        return percentile(stats.sorted_samples(), self.percentile)
+
+    def allow(self, model: str) -> bool:
+        stats = self.model(model)
+        return stats.hedges < self.budget * stats.requests + BURST
+
+    async def run(
+        self,
+        model: str,
+        request: Callable[[], Awaitable],
+        before_hedge: Optional[Callable[[], Awaitable[bool]]] = None,
+        after_hedge: Optional[Callable[[], None]] = None,
+    ) -> Tuple[object, Optional[str]]:
+        """
+        Await `request()`, hedging it once if it outlives the model's latency percentile.
+        Returns (response, None | "primary" | "hedge": which request answered when hedged).
+        `before_hedge` is awaited before the duplicate is sent (e.g. to take a concurrency
+        and a rate-limit slot); when it returns False there is no duplicate. `after_hedge`
+        is called once a duplicate that was sent finishes or is cancelled (to free its slot).
+        """
+        stats = self.model(model)
+        stats.requests += 1
+        wait = self.delay(model)
+        started = time.perf_counter()
+        if wait is None:
+            response = await request()
+            stats.observe(time.perf_counter() - started)
+            return response, None
+        primary = asyncio.ensure_future(request())
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=wait)
+            if done or not self.allow(model) or (before_hedge is not None and not await before_hedge()):
+                response = await primary
+                stats.observe(time.perf_counter() - started)
+                return response, None
+            stats.hedges += 1
+            hedge = asyncio.ensure_future(request())
+            if after_hedge is not None:
+                hedge.add_done_callback(lambda _: after_hedge())
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary when both finish together.
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    elapsed = time.perf_counter() - started
+                    if task is primary:
+                        stats.observe(elapsed)
+                        return task.result(), "primary"
+                    # The primary took at least `elapsed` (recorded as its latency, a lower
+                    # bound); the saving is estimated from past requests that slow.
+                    stats.hedge_wins += 1
+                    stats.saved_seconds += stats.expected_remaining(elapsed)
+                    stats.observe(elapsed)
+                    return task.result(), "hedge"
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {
+            model: {
+                "requests": stats.requests,
+                "hedges": stats.hedges,
+                "hedge_rate": round(stats.hedges / stats.requests, 4) if stats.requests else 0.0,
+                "hedge_wins": stats.hedge_wins,
+                "threshold_seconds": round(self.delay(model) or 0.0, 4),
+                "estimated_saved_seconds": round(stats.saved_seconds, 3),
+            }
+            for model, stats in self.models.items()
+        }
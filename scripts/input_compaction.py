@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Per-criterion compaction of `llm-input` before it is rendered into a judge prompt.
+A criterion's optional `input_compaction` block in Evals.json (or a run-wide
+--input-token-budget) can project the input to the fields it needs, drop keys,
+cap list lengths, and then shrink the largest lists and strings until the input
+fits a token budget. Everything removed is reported on the eval result and
+summarised in a `_compaction_note` key the judge can see.
+
+    "input_compaction": {
+        "fields": ["briefing_info", "holdings[].ticker", "holdings[].weight_pct"],
+        "exclude": ["news[].body"],
+        "max_list_items": 50,
+        "max_tokens": 3000
+    }
+"""
+
+import hashlib
+import heapq
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from input_fields import parse_input
+
+
+NOTE_KEY = "_compaction_note"
+# Strings shorter than this are never truncated to meet the budget.
+MIN_STRING_CHARS = 200
+TRUNCATED_SUFFIX = " ...[truncated]"
+NOTE_PREFIX = "Parts of this input were omitted or shortened before judging: "
+NOTE_SUFFIX = ". Do not penalise the output for referring to them."
+# Compacted inputs kept for criteria with the same spec (one execution's worth is enough).
+COMPACT_CACHE_SIZE = 64
+COMPACT_CACHE: OrderedDict = OrderedDict()
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, as in the payload-savings estimate."""
+    return len(text) // 4
+
+
+def split_path(path: str) -> List[str]:
+    """'holdings[].ticker' -> ['holdings', '[]', 'ticker']."""
+    parts = []
+    for key in path.split("."):
+        if key.endswith("[]"):
+            parts.extend([key[:-2], "[]"])
+        else:
+            parts.append(key)
+    return parts
+
+
+def path_tree(paths: List[str]) -> Dict:
+    """Nested dict of path parts; True marks a path kept (or removed) whole."""
+    tree: Dict = {}
+    for path in paths:
+        node = tree
+        parts = split_path(path)
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def join_path(prefix: str, key: str) -> str:
+    if key == "[]":
+        return f"{prefix}[]"
+    return f"{prefix}.{key}" if prefix else key
+
+
+class CompactionSpec:
+    def __init__(
+        self,
+        fields: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_list_items: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ):
+        self.fields = list(fields or [])
+        self.exclude = list(exclude or [])
+        self.max_list_items = max_list_items
+        self.max_tokens = max_tokens
+        # Running totals for the run summary.
+        self.inputs = 0
+        self.compacted = 0
+        self.input_tokens = 0
+        self.sent_tokens = 0
+
+    @classmethod
+    def for_criterion(cls, eval_criteria: Dict, token_budget: Optional[int] = None) -> Optional["CompactionSpec"]:
+        """The criterion's spec, with `token_budget` as the default max_tokens; None if neither is set."""
+        config = dict(eval_criteria.get("input_compaction") or {})
+        if token_budget is not None:
+            config.setdefault("max_tokens", token_budget)
+        return cls(**config) if config else None
+
+    @property
+    def key(self) -> str:
+        """Identifies the spec, so criteria with equal specs can share one compacted input."""
+        return json.dumps(
+            [self.fields, self.exclude, self.max_list_items, self.max_tokens], sort_keys=True
+        )
+
+    def compact(self, raw_input: str, count: bool = True) -> Tuple[str, Optional[Dict]]:
+        """Compacted llm-input and a report of what was dropped (None when sent unchanged)."""
+        compacted, report = compact_cached(raw_input, self.key)
+        if count:
+            self.tally(raw_input, report)
+        return compacted, report
+
+    def tally(self, raw_input: str, report: Optional[Dict]) -> None:
+        """Count one input toward the summary; `report` is what compacting it dropped."""
+        self.inputs += 1
+        if report is None:
+            tokens = estimate_tokens(raw_input)
+            self.input_tokens += tokens
+            self.sent_tokens += tokens
+            return
+        self.compacted += 1
+        self.input_tokens += report["input_tokens"]
+        self.sent_tokens += report["sent_tokens"]
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "inputs": self.inputs,
+            "compacted": self.compacted,
+            "input_tokens": self.input_tokens,
+            "sent_tokens": self.sent_tokens,
+        }
+
+
+def project(value, tree: Dict, path: str, dropped: Dict[str, Dict]):
+    """Keep only the paths in `tree`; dropped paths are recorded once (list items share a path)."""
+    if isinstance(value, list) and "[]" in tree:
+        sub = tree["[]"]
+        return [item if sub is True else project(item, sub, f"{path}[]", dropped) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kept = {}
+    for key, item in value.items():
+        sub = tree.get(key)
+        item_path = join_path(path, key)
+        if sub is None:
+            dropped.setdefault(item_path, {"path": item_path, "reason": "not_projected"})
+        elif sub is True:
+            kept[key] = item
+        else:
+            kept[key] = project(item, sub, item_path, dropped)
+    return kept
+
+
+def exclude(value, tree: Dict, path: str, dropped: Dict[str, Dict]):
+    if isinstance(value, list) and "[]" in tree:
+        sub = tree["[]"]
+        if sub is True:
+            dropped.setdefault(f"{path}[]", {"path": f"{path}[]", "reason": "excluded"})
+            return []
+        return [exclude(item, sub, f"{path}[]", dropped) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kept = {}
+    for key, item in value.items():
+        sub = tree.get(key)
+        item_path = join_path(path, key)
+        if sub is True:
+            dropped.setdefault(item_path, {"path": item_path, "reason": "excluded"})
+        elif sub is None:
+            kept[key] = item
+        else:
+            kept[key] = exclude(item, sub, item_path, dropped)
+    return kept
+
+
+def cap_lists(value, limit: int, path: str, dropped: Dict[str, Dict]):
+    if isinstance(value, list):
+        if len(value) > limit:
+            dropped[path] = {"path": path, "reason": "list_cap", "kept": limit, "items": len(value)}
+            value = value[:limit]
+        return [cap_lists(item, limit, f"{path}[{index}]", dropped) for index, item in enumerate(value)]
+    if isinstance(value, dict):
+        return {key: cap_lists(item, limit, join_path(path, key), dropped) for key, item in value.items()}
+    return value
+
+
+def measure(value, path: str, parent, key, chain: List, candidates: List[Dict]) -> int:
+    """
+    Serialized chars of `value`, adding each list of 2+ items and long string to
+    `candidates` with its `chain` of enclosing candidate lists (and item index).
+    """
+    if isinstance(value, list):
+        record = {"path": path, "parent": parent, "key": key, "chain": chain} if len(value) > 1 else None
+        if record is not None:
+            candidates.append(record)
+        items = [
+            measure(item, f"{path}[{index}]", value, index, chain + [(record, index)] if record else chain, candidates)
+            for index, item in enumerate(value)
+        ]
+        chars = 2 + sum(items) + 2 * max(len(items) - 1, 0)
+        if record is not None:
+            record["items"] = items
+            record["size"] = chars
+        return chars
+    if isinstance(value, dict):
+        chars = 2 + 2 * max(len(value) - 1, 0)
+        for name, item in value.items():
+            chars += len(json.dumps(name, ensure_ascii=False)) + 2
+            chars += measure(item, join_path(path, name), value, name, chain, candidates)
+        return chars
+    chars = len(json.dumps(value, ensure_ascii=False))
+    if isinstance(value, str) and len(value) > MIN_STRING_CHARS and parent is not None:
+        # Lists are ranked by their serialized size, strings by their length.
+        candidates.append({"path": path, "parent": parent, "key": key, "chain": chain, "chars": chars, "size": len(value)})
+    return chars
+
+
+def fit_budget(data, max_tokens: int, dropped: Dict[str, Dict]):
+    """
+    Shorten the largest list (or long string) until the input, with its note, fits
+    `max_tokens`: just enough from its end, but never more than half at a time.
+    The input is measured once; each cut then updates the sizes of the lists that
+    enclose it, so nothing is serialized again.
+    """
+    candidates: List[Dict] = []
+    data_chars = measure(data, "", None, None, [], candidates)
+    # The note's length, kept up to date as entries are added or replaced.
+    cuts = {path: len(describe(entry)) for path, entry in dropped.items() if entry["reason"] != "not_projected"}
+    cut_chars = sum(cuts.values())
+
+    def cut(path: str, entry: Dict) -> None:
+        nonlocal cut_chars
+        dropped[path] = entry
+        chars = len(describe(entry))
+        cut_chars += chars - cuts.get(path, 0)
+        cuts[path] = chars
+
+    heap = [(-record["size"], order, record) for order, record in enumerate(candidates)]
+    heapq.heapify(heap)
+    while heap:
+        note_chars = len(NOTE_PREFIX) + cut_chars + 2 * (len(cuts) - 1) + len(NOTE_SUFFIX) + len(NOTE_KEY) + 8
+        excess = data_chars + (note_chars if cuts else 0) - max_tokens * 4
+        if excess <= 0:
+            break
+        size, order, record = heapq.heappop(heap)
+        if any(index >= len(enclosing["parent"][enclosing["key"]]) for enclosing, index in record["chain"]):
+            continue  # cut off with an enclosing list
+        if -size != record["size"]:
+            heapq.heappush(heap, (-record["size"], order, record))
+            continue
+        path, parent, key = record["path"], record["parent"], record["key"]
+        value = parent[key]
+        entry = dropped.get(path) or {}
+        if isinstance(value, list):
+            items = record["items"]
+            keep = len(value)
+            while keep > max(1, len(value) // 2) and excess > 0:
+                keep -= 1
+                excess -= items[keep] + 2
+            removed = sum(items[keep:]) + 2 * (len(value) - keep)
+            cut(path, {"path": path, "reason": "budget", "kept": keep, "items": entry.get("items", len(value))})
+            # In place, so the records of the kept items still point at their parent.
+            del value[keep:]
+            del items[keep:]
+            record["size"] -= removed
+            shrinkable = keep > 1
+        else:
+            original = value[: -len(TRUNCATED_SUFFIX)] if value.endswith(TRUNCATED_SUFFIX) else value
+            keep = max(len(original) // 2, len(original) - excess - len(TRUNCATED_SUFFIX))
+            parent[key] = original[:keep] + TRUNCATED_SUFFIX
+            cut(path, {
+                "path": path, "reason": "budget", "kept_chars": keep, "chars": entry.get("chars", len(original))
+            })
+            chars = len(json.dumps(parent[key], ensure_ascii=False))
+            removed = record["chars"] - chars
+            record["chars"] = chars
+            record["size"] = len(parent[key])
+            shrinkable = record["size"] > MIN_STRING_CHARS
+        for enclosing, index in record["chain"]:
+            enclosing["items"][index] -= removed
+            enclosing["size"] -= removed
+        data_chars -= removed
+        if shrinkable:
+            heapq.heappush(heap, (-record["size"], order, record))
+    return data
+
+
+def note(dropped: Dict[str, Dict]) -> str:
+    """What the judge is told was cut (fields left out by projection are not mentioned)."""
+    cut = [describe(entry) for entry in dropped.values() if entry["reason"] != "not_projected"]
+    if not cut:
+        return ""
+    return NOTE_PREFIX + "; ".join(cut) + NOTE_SUFFIX
+
+
+def describe(entry: Dict) -> str:
+    if "items" in entry:
+        return f"{entry['path']} (kept {entry['kept']} of {entry['items']} items)"
+    if "chars" in entry:
+        return f"{entry['path']} (first {entry['kept_chars']} of {entry['chars']} characters)"
+    return f"{entry['path']} ({entry['reason'].replace('_', ' ')})"
+
+
+def compact_cached(raw_input: str, spec_key: str) -> Tuple[str, Optional[Dict]]:
+    """
+    Compaction is deterministic per (input, spec), so criteria sharing a spec share the
+    work. Entries are keyed by a digest of the input, so inputs are not kept alive.
+    """
+    key = (hashlib.blake2b(raw_input.encode("utf-8"), digest_size=16).digest(), spec_key)
+    cached = COMPACT_CACHE.get(key)
+    if cached is None:
+        cached = COMPACT_CACHE[key] = compact_input(raw_input, spec_key)
+        if len(COMPACT_CACHE) > COMPACT_CACHE_SIZE:
+            COMPACT_CACHE.popitem(last=False)
+    else:
+        COMPACT_CACHE.move_to_end(key)
+    compacted, report = cached
+    return (raw_input, None) if report is None else (compacted, report)
+
+
+def compact_input(raw_input: str, spec_key: str) -> Tuple[Optional[str], Optional[Dict]]:
+    """(compacted input, report), or (None, None) when nothing was dropped."""
+    fields, exclude_paths, max_list_items, max_tokens = json.loads(spec_key)
+    data = parse_input(raw_input)
+    if not data:
+        return None, None
+    dropped: Dict[str, Dict] = {}
+    if fields:
+        data = project(data, path_tree(fields), "", dropped)
+    if exclude_paths:
+        data = exclude(data, path_tree(exclude_paths), "", dropped)
+    if max_list_items is not None:
+        data = cap_lists(data, max_list_items, "", dropped)
+    if max_tokens is not None:
+        data = fit_budget(data, max_tokens, dropped)
+    if not dropped:
+        return None, None
+    if note(dropped):
+        data[NOTE_KEY] = note(dropped)
+    compacted = json.dumps(data, ensure_ascii=False)
+    report = {
+        "input_tokens": estimate_tokens(raw_input),
+        "sent_tokens": estimate_tokens(compacted),
+        "dropped": list(dropped.values()),
+    }
+    return compacted, report
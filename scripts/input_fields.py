@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Dot-path access to fields of an execution's parsed `llm-input`.
+Shared by the dashboard (identifier columns) and stratified sampling.
+"""
+
+from typing import Dict, List
+
+from jsonl_codec import DecodeError, loads
+
+
+def is_scalar(value: object) -> bool:
+    return isinstance(value, (str, int, float, bool))
+
+
+def flatten_scalar_fields(
+    data: Dict,
+    prefix: str = "",
+    depth: int = 0,
+    max_depth: int = 3,
+) -> Dict[str, object]:
+    """Flatten nested dict scalars into dot-path keys; ignore lists to avoid huge fan-out."""
+    if not isinstance(data, dict):
+        return {}
+    if depth >= max_depth:
+        return {}
+    flat: Dict[str, object] = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if is_scalar(value):
+            flat[path] = value
+        elif isinstance(value, dict):
+            flat.update(flatten_scalar_fields(value, path, depth + 1, max_depth))
+        else:
+            # Ignore lists/other structures for identifier columns.
+            continue
+    return flat
+
+
+
+def parse_input(raw_input: object) -> Dict:
+    """Parse a stringified `llm-input`; anything that is not a JSON object becomes {}."""
+    if isinstance(raw_input, str):
+        try:
+            raw_input = loads(raw_input)
+        except DecodeError:
+            return {}
+    return raw_input if isinstance(raw_input, dict) else {}
+
+
+def list_field_values(data: Dict, path: str) -> List[object]:
+    """
+    Scalars reached by a path through one list, e.g. 'holdings[].sector' -> every
+    holding's sector. (flatten_scalar_fields skips lists, so these are read separately.)
+    """
+    list_path, _, item_path = path.partition("[].")
+    items = data
+    for key in list_path.split("."):
+        items = items.get(key) if isinstance(items, dict) else None
+    if not isinstance(items, list):
+        return []
+    values = []
+    for item in items:
+        value = item
+        for key in item_path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if is_scalar(value):
+            values.append(value)
+    return values
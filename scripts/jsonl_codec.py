@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Shared JSON codec for JSONL results, executions and checkpoints.
+Uses orjson, else msgspec, when installed and falls back to the standard library.
+Lines are encoded to bytes (files are written in binary mode), so callers can count
+bytes without re-encoding. The fast backends write compact separators and raw UTF-8;
+every backend reads what the others wrote.
+
+A result's `input` (an execution's `llm-input`) is a JSON string. Records keep it as
+a string until parsed_input is asked for it, so passes that only need scores never
+decode inputs.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError.
+    DecodeError = (json.JSONDecodeError,)
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dump_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    DecodeError = (json.JSONDecodeError, msgspec.DecodeError)
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder()
+    loads = _decoder.decode
+    dumps = _encoder.encode
+
+    def dump_line(obj: Any) -> bytes:
+        return _encoder.encode(obj) + b"\n"
+else:
+    BACKEND = "json"
+    DecodeError = (json.JSONDecodeError,)
+    loads = json.loads
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def dump_line(obj: Any) -> bytes:
+        return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def iter_jsonl(path: Union[str, Path], label: str = "line") -> Iterator[Dict]:
+    """Decode each non-blank line, warning about (and skipping) lines that are not JSON."""
+    with open(path, "rb") as handle:
+        for line_num, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except DecodeError as e:
+                print(f"Warning: Skipping {label} {line_num} due to JSON error: {e}")
+
+
+def parsed_input(record: Dict, key: str = "input") -> Any:
+    """
+    The record's input, decoding a stringified `llm-input` on first use and caching
+    the parsed form on the record. A string that is not JSON becomes {"raw_input": ...}.
+    """
+    value = record.get(key)
+    if isinstance(value, str):
+        try:
+            value = loads(value)
+        except DecodeError:
+            value = {"raw_input": value}
+        record[key] = value
+    return value
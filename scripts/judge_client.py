@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Judge client used by the eval runner.
+Wraps the sync and async OpenAI clients behind a single model + messages interface,
+with per-model pacing and retries for throttled or transient failures, optional
+deadlines per call (and per execution, via `deadline`), and a per-model circuit breaker.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from circuit_breaker import CircuitBreaker
+from hedging import HedgePolicy
+from judge_cache import JudgeCache, cache_key
+from live_metrics import LiveMetrics
+from profiling import RunProfiler
+from rate_limiter import RETRYABLE_ERRORS, RateLimiter, RetryPolicy, estimate_tokens
+from scheduling import CallScheduler
+from usage import extract_usage
+
+
+@dataclass
+class JudgeResponse:
+    text: str
+    model: str = ""
+    attempts: int = 1
+    wait_seconds: float = 0.0
+    latency_seconds: float = 0.0
+    usage: Optional[Dict[str, int]] = None
+    cached: bool = False
+    # Which request answered when the call was hedged ("primary" or "hedge").
+    hedge: Optional[str] = None
+
+    def call_info(self) -> Dict:
+        info = {
+            "model": self.model,
+            "attempts": self.attempts,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "latency_seconds": round(self.latency_seconds, 3),
+        }
+        if self.cached:
+            info["cached"] = True
+        if self.hedge:
+            info["hedged"] = self.hedge
+        return info
+
+
+class DeadlineExceeded(Exception):
+    """A judge call ran out of time (its own timeout or its execution's)."""
+
+
+class EmptyResponse(Exception):
+    """The judge answered without any text (a refusal or a content filter)."""
+
+
+class Deadline:
+    """An execution's time budget; the clock starts when its first judge call is dispatched."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.at: Optional[float] = None
+
+    def start(self) -> float:
+        """time.monotonic() deadline, fixed on the first call."""
+        if self.at is None:
+            self.at = time.monotonic() + self.seconds
+        return self.at
+
+
+TIMEOUT_ERRORS = (openai.APITimeoutError, asyncio.TimeoutError)
+
+
+class JudgeCallError(Exception):
+    """A judge call that failed for good, after any retries."""
+
+    def __init__(
+        self,
+        error: Exception,
+        model: str,
+        attempts: int,
+        wait_seconds: float,
+        latency_seconds: float,
+    ):
+        super().__init__(str(error))
+        self.error = error
+        self.model = model
+        self.attempts = attempts
+        self.wait_seconds = wait_seconds
+        self.latency_seconds = latency_seconds
+
+    def call_info(self) -> Dict:
+        info = {
+            "model": self.model,
+            "attempts": self.attempts,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "latency_seconds": round(self.latency_seconds, 3),
+            "error": type(self.error).__name__,
+        }
+        if isinstance(self.error, DeadlineExceeded):
+            info["timed_out"] = True
+        return info
+
+
+@dataclass
+class CallState:
+    """One judge call's progress across its attempts, shared by the sync and async loops."""
+
+    model: str
+    estimated: int
+    started: float
+    # time.monotonic() deadline of the whole call, or None.
+    deadline: Optional[float]
+    attempts: int = 0
+    retries: int = 0
+    waited: float = 0.0
+    last_error: Optional[Exception] = None
+    # Breaker token when the current attempt goes out as the half-open probe.
+    probe: Optional[int] = None
+    request_started: float = 0.0
+
+
+def total_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def sampling_params(temperature: float, response_format: Optional[Dict] = None) -> Dict:
+    """Request params that affect the response (and so the cache key)."""
+    params: Dict = {"temperature": temperature}
+    if response_format is not None:
+        params["response_format"] = response_format
+    return params
+
+
+class JudgeClient:
+    """Makes judge calls. Clients are created lazily so importing stays cheap."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache: Optional[JudgeCache] = None,
+        profiler: Optional[RunProfiler] = None,
+        hedger: Optional[HedgePolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        call_timeout: Optional[float] = None,
+        execution_timeout: Optional[float] = None,
+        metrics: Optional[LiveMetrics] = None,
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.limiter = limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self.profiler = profiler or RunProfiler()
+        self.hedger = hedger
+        self.breaker = breaker or CircuitBreaker(threshold=0)
+        # Seconds a call may take, across throttling, retries and backoff.
+        self.call_timeout = call_timeout
+        # Seconds all of one execution's calls may take (see execution_deadline).
+        self.execution_timeout = execution_timeout
+        self.metrics = metrics or LiveMetrics()
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+
+    # Retries are handled here (so they can honour the shared limiter), not by the SDK.
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return self._async_client
+
+    def execution_deadline(self) -> Optional[Deadline]:
+        """A fresh deadline shared by one execution's calls, or None."""
+        if self.execution_timeout is None:
+            return None
+        return Deadline(self.execution_timeout)
+
+    def _deadline(self, started: float, deadline: Optional[Deadline]) -> Optional[float]:
+        """The earlier of the execution's deadline and this call's own timeout."""
+        at = deadline.start() if deadline is not None else None
+        if self.call_timeout is None:
+            return at
+        own = started + self.call_timeout
+        return own if at is None else min(own, at)
+
+    def _start(self, model: str, messages: List[Dict], deadline: Optional[Deadline]) -> CallState:
+        started = time.monotonic()
+        return CallState(model, estimate_tokens(messages), started, self._deadline(started, deadline))
+
+    def _expired(self, call: CallState, last_error: Optional[Exception]) -> Optional[JudgeCallError]:
+        """The error to raise if the call's deadline has passed, else None."""
+        if call.deadline is None or time.monotonic() < call.deadline:
+            return None
+        # The attempt will not be sent (or reported): another call may probe.
+        self.breaker.release_probe(call.model, call.probe)
+        message = f"judge call deadline exceeded after {time.monotonic() - call.started:.1f}s"
+        if last_error is not None and not isinstance(last_error, TIMEOUT_ERRORS):
+            message += f" (last error: {last_error})"
+        return JudgeCallError(
+            DeadlineExceeded(message), call.model, call.attempts, call.waited, time.monotonic() - call.started
+        )
+
+    def _until(self, deadline: Optional[float], delay: float) -> float:
+        """`delay`, cut short at the deadline."""
+        if deadline is None:
+            return delay
+        return max(0.0, min(delay, deadline - time.monotonic()))
+
+    def _wait_breaker(self, call: CallState) -> None:
+        """Sleep while the model's breaker is open; a call let through as the probe keeps its token."""
+        while True:
+            delay, call.probe = self.breaker.before_call(call.model)
+            delay = self._until(call.deadline, delay)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+            call.waited += delay
+
+    async def _wait_breaker_async(self, call: CallState) -> None:
+        while True:
+            delay, call.probe = self.breaker.before_call(call.model)
+            delay = self._until(call.deadline, delay)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+            call.waited += delay
+
+    def _record_outcome(self, call: CallState, error: Optional[Exception]) -> bool:
+        """
+        Report a request's outcome to the breaker. Returns True when the failure happened
+        while the breaker is open, so the call should wait it out without spending a retry.
+        Requests cut off by a deadline are not reported: the caller chose that limit.
+        """
+        if error is None or not isinstance(error, RETRYABLE_ERRORS):
+            # Answered (even if with a client error): the model is reachable.
+            self.breaker.record_success(call.model, call.probe)
+            return False
+        self.breaker.record_failure(call.model, call.probe)
+        return self.breaker.paused(call.model)
+
+    def _dispatch(self, call: CallState) -> None:
+        """The breaker and limiter let the attempt go: raise if the deadline passed meanwhile."""
+        expired = self._expired(call, call.last_error)
+        if expired is not None:
+            raise expired
+        call.attempts += 1
+        call.request_started = time.perf_counter()
+
+    def _failed(self, call: CallState, error: Exception) -> Optional[float]:
+        """
+        What to do after a failed attempt: raises the call's final error, or returns the
+        seconds to back off before the next attempt (None: wait out the open breaker
+        without spending a retry).
+        """
+        self.profiler.record_latency(call.model, time.perf_counter() - call.request_started)
+        call.last_error = error
+        expired = self._expired(call, error)
+        if expired is not None:
+            raise expired from error
+        if self._record_outcome(call, error):
+            return None
+        call.retries += 1
+        if not self.retry_policy.should_retry(error, call.retries):
+            raise JudgeCallError(
+                error, call.model, call.attempts, call.waited, time.monotonic() - call.started
+            ) from error
+        delay = self._until(call.deadline, self._backoff(call.model, error, call.retries))
+        call.waited += delay
+        return delay
+
+    def _succeeded(self, call: CallState, key: Optional[str], response, hedge: Optional[str] = None) -> JudgeResponse:
+        self.profiler.record_latency(call.model, time.perf_counter() - call.request_started)
+        self._record_outcome(call, None)
+        self.limiter.settle(call.model, call.estimated, total_tokens(response))
+        choice = response.choices[0]
+        if choice.message.content is None:
+            # The model answered, so the breaker and limiter above stand; retrying would refuse again.
+            raise JudgeCallError(
+                EmptyResponse(f"judge returned no content (finish_reason: {choice.finish_reason})"),
+                call.model,
+                call.attempts,
+                call.waited,
+                time.monotonic() - call.started,
+            )
+        text = choice.message.content.strip()
+        self.store(key, call.model, text)
+        return JudgeResponse(
+            text=text,
+            model=call.model,
+            attempts=call.attempts,
+            wait_seconds=call.waited,
+            latency_seconds=time.monotonic() - call.started,
+            usage=extract_usage(getattr(response, "usage", None)),
+            hedge=hedge,
+        )
+
+    def _backoff(self, model: str, error: Exception, attempt: int) -> float:
+        delay = self.retry_policy.delay(error, attempt)
+        if getattr(error, "status_code", None) == 429:
+            self.limiter.pause(model, delay)
+        return delay
+
+    async def _create_async(
+        self,
+        model: str,
+        messages: List[Dict],
+        estimated: int,
+        temperature: float,
+        response_format: Optional[Dict],
+        scheduler: Optional[CallScheduler] = None,
+    ):
+        """
+        One async request, hedged when a HedgePolicy is set; returns (response, hedge).
+        A duplicate needs a free slot of the call's `scheduler`, so hedging never takes
+        the run past its concurrency.
+        """
+        def request():
+            return self.async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                **sampling_params(temperature, response_format),
+            )
+
+        if self.hedger is None:
+            return await request(), None
+
+        async def take_slot() -> bool:
+            if scheduler is not None and not scheduler.try_acquire():
+                return False
+            try:
+                # The duplicate counts against the model's quotas like any other request.
+                await self.limiter.acquire_async(model, estimated)
+            except BaseException:
+                free_slot()
+                raise
+            return True
+
+        def free_slot() -> None:
+            if scheduler is not None:
+                scheduler.give_back()
+
+        return await self.hedger.run(model, request, take_slot, free_slot)
+
+    def cached_response(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float = 0,
+        response_format: Optional[Dict] = None,
+    ):
+        """Return (key, cached response) for a call; key is None when caching is off."""
+        if self.cache is None:
+            return None, None
+        with self.profiler.stage("cache"):
+            key = cache_key(model, messages, sampling_params(temperature, response_format))
+            text = self.cache.get(key)
+        if text is None:
+            return key, None
+        return key, JudgeResponse(text=text, model=model, attempts=0, cached=True)
+
+    def store(self, key: Optional[str], model: str, text: str) -> None:
+        if key is not None:
+            self.cache.put(key, model, text)
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float = 0,
+        response_format: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> JudgeResponse:
+        """
+        One judge call, retried on transient failures. The execution's `deadline` and
+        call_timeout bound the whole call; past them, JudgeCallError wraps DeadlineExceeded.
+        Raises CircuitOpenError if the model's breaker gives up.
+        """
+        key, hit = self.cached_response(model, messages, temperature, response_format)
+        if hit is not None:
+            self.metrics.cache_hit()
+            return hit
+        self.metrics.call_started()
+        try:
+            response = self._complete(key, model, messages, temperature, response_format, deadline)
+        except JudgeCallError as e:
+            self._count_failure(e)
+            raise
+        except BaseException:
+            self.metrics.call_cancelled()
+            raise
+        self.metrics.call_ended(response.attempts, response.usage)
+        return response
+
+    def _count_failure(self, error: JudgeCallError) -> None:
+        self.metrics.call_ended(
+            error.attempts, failed=True, timed_out=isinstance(error.error, DeadlineExceeded)
+        )
+
+    def _complete(
+        self,
+        key: Optional[str],
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        response_format: Optional[Dict],
+        deadline: Optional[Deadline],
+    ) -> JudgeResponse:
+        call = self._start(model, messages, deadline)
+        while True:
+            with self.profiler.stage("throttle"):
+                self._wait_breaker(call)
+                call.waited += self.limiter.acquire(model, call.estimated)
+            self._dispatch(call)
+            timeout = {"timeout": call.deadline - time.monotonic()} if call.deadline is not None else {}
+            try:
+                with self.profiler.stage("request"):
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        **sampling_params(temperature, response_format),
+                        **timeout,
+                    )
+            except Exception as e:
+                delay = self._failed(call, e)
+                if delay is not None:
+                    with self.profiler.stage("backoff"):
+                        time.sleep(delay)
+                continue
+            return self._succeeded(call, key, response)
+
+    async def complete_async(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float = 0,
+        response_format: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None,
+        scheduler: Optional[CallScheduler] = None,
+    ) -> JudgeResponse:
+        """
+        Async variant of complete; a request still running at the deadline is cancelled.
+        `scheduler` is the one whose slot the caller holds (hedge duplicates need another).
+        """
+        key, hit = self.cached_response(model, messages, temperature, response_format)
+        if hit is not None:
+            self.metrics.cache_hit()
+            return hit
+        self.metrics.call_started()
+        try:
+            response = await self._complete_async(
+                key, model, messages, temperature, response_format, deadline, scheduler
+            )
+        except JudgeCallError as e:
+            self._count_failure(e)
+            raise
+        except BaseException:
+            self.metrics.call_cancelled()
+            raise
+        self.metrics.call_ended(response.attempts, response.usage)
+        return response
+
+    async def _complete_async(
+        self,
+        key: Optional[str],
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        response_format: Optional[Dict],
+        deadline: Optional[Deadline],
+        scheduler: Optional[CallScheduler] = None,
+    ) -> JudgeResponse:
+        call = self._start(model, messages, deadline)
+        while True:
+            with self.profiler.stage("throttle"):
+                await self._wait_breaker_async(call)
+                call.waited += await self.limiter.acquire_async(model, call.estimated)
+            self._dispatch(call)
+            try:
+                with self.profiler.stage("request"):
+                    # wait_for cancels the request (and any hedge duplicate) at the deadline.
+                    response, hedge = await asyncio.wait_for(
+                        self._create_async(model, messages, call.estimated, temperature, response_format, scheduler),
+                        call.deadline - time.monotonic() if call.deadline is not None else None,
+                    )
+            except Exception as e:
+                delay = self._failed(call, e)
+                if delay is not None:
+                    with self.profiler.stage("backoff"):
+                        await asyncio.sleep(delay)
+                continue
+            return self._succeeded(call, key, response, hedge)
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.close()
+
+    async def aclose(self) -> None:
+        """Close the async client; it is bound to the event loop that created it."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
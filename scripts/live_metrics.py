@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Live metrics for a running eval.
+The judge client counts calls as they start and finish (in flight, completed, errors,
+retries, timeouts, tokens) and the runner counts eval results as they are written.
+Every couple of seconds the counters are turned into EWMA rates and an ETA, written
+atomically to <RUN_ID>_status.json next to the results file and, with --metrics-port,
+served in Prometheus text format at http://127.0.0.1:PORT/metrics (JSON at /status).
+
+Print the progress of a run (check_progress.sh does this):
+    python scripts/live_metrics.py outputs/runs/03/03_eval_results.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from profiling import profile_path_for
+from sharding import shard_dir
+
+
+STATUS_SUFFIX = "status.json"
+INTERVAL = 2.0
+# EWMA time constant: throughput older than about this many seconds has faded out.
+TAU = 30.0
+# A running status not updated for this long probably belongs to a dead process.
+STALE_SECONDS = 60.0
+
+
+def status_path_for(output_path: Path) -> Path:
+    """<RUN_ID>_status.json for <RUN_ID>_eval_results.jsonl, else <stem>_status.json."""
+    return profile_path_for(output_path, STATUS_SUFFIX)
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Ewma:
+    """Exponentially weighted rate; irregular update intervals are weighted by their length."""
+
+    def __init__(self, tau: float = TAU):
+        self.tau = tau
+        self.value: Optional[float] = None
+
+    def update(self, rate: float, seconds: float) -> float:
+        if self.value is None:
+            self.value = rate
+        else:
+            self.value += (1 - math.exp(-seconds / self.tau)) * (rate - self.value)
+        return self.value
+
+
+class LiveMetrics:
+    def __init__(self, interval: float = INTERVAL, tau: float = TAU):
+        self.interval = interval
+        self.tau = tau
+        self.lock = threading.Lock()
+        self.calls_completed = 0
+        self.calls_in_flight = 0
+        self.errors = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.executions_done = 0
+        self.executions_total = 0
+        self.evals_done = 0
+        self.evals_total = 0
+        self.run_id: Optional[str] = None
+        self.state = "idle"
+        self.started_at: Optional[str] = None
+        self.started: Optional[float] = None
+        self.status_path: Optional[Path] = None
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.ticker: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.reset_rates()
+
+    def reset_rates(self) -> None:
+        self.rates = {name: Ewma(self.tau) for name in ("calls", "tokens", "evals")}
+        # (monotonic time, count) each rate was last updated from.
+        self.last: Dict[str, Tuple[float, float]] = {}
+
+    # Judge client hooks.
+
+    def call_started(self) -> None:
+        with self.lock:
+            self.calls_in_flight += 1
+
+    def call_ended(
+        self,
+        attempts: int,
+        usage: Optional[Dict[str, int]] = None,
+        failed: bool = False,
+        timed_out: bool = False,
+    ) -> None:
+        with self.lock:
+            self.calls_in_flight -= 1
+            self.calls_completed += 1
+            self.retries += max(attempts - 1, 0)
+            self.errors += failed
+            self.timeouts += timed_out
+            if usage:
+                self.prompt_tokens += usage.get("prompt_tokens", 0)
+                self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def call_cancelled(self) -> None:
+        with self.lock:
+            self.calls_in_flight -= 1
+
+    def cache_hit(self) -> None:
+        with self.lock:
+            self.cache_hits += 1
+
+    # Runner hooks.
+
+    def written(self, evals: int) -> None:
+        """One execution's results were written."""
+        with self.lock:
+            self.executions_done += 1
+            self.evals_done += evals
+
+    def start(
+        self,
+        run_id: str,
+        executions_total: int,
+        evals_total: int,
+        executions_done: int = 0,
+        evals_done: int = 0,
+        status_path: Optional[Path] = None,
+        port: Optional[int] = None,
+    ) -> None:
+        """Begin publishing: a status file refreshed every `interval` seconds, plus an HTTP endpoint if `port`."""
+        with self.lock:
+            self.run_id = run_id
+            self.executions_total = executions_total
+            self.evals_total = evals_total
+            self.executions_done = executions_done
+            self.evals_done = evals_done
+            self.state = "running"
+            self.started_at = utc_now()
+            self.started = time.monotonic()
+            self.status_path = status_path
+            self.reset_rates()
+        if port is not None:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.metrics = self
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"Live metrics: http://127.0.0.1:{self.server.server_port}/metrics")
+        self.stopping.clear()
+        self.ticker = threading.Thread(target=self._tick_loop, daemon=True)
+        self.ticker.start()
+        self.tick()
+
+    @contextmanager
+    def publish(self, *args, **kwargs) -> Iterator["LiveMetrics"]:
+        """start(...) for the duration of a block; the final status says whether it finished."""
+        self.start(*args, **kwargs)
+        try:
+            yield self
+        except BaseException:
+            self.stop("stopped")
+            raise
+        self.stop("finished")
+
+    def stop(self, state: str = "finished") -> None:
+        if self.ticker is None:
+            return
+        self.stopping.set()
+        self.ticker.join()
+        self.ticker = None
+        with self.lock:
+            self.state = state
+        self.tick()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def _tick_loop(self) -> None:
+        while not self.stopping.wait(self.interval):
+            self.tick()
+
+    def tick(self) -> None:
+        """Fold the counts since the last tick into the rates and rewrite the status file."""
+        now = time.monotonic()
+        with self.lock:
+            counts = {
+                "calls": self.calls_completed,
+                "tokens": self.prompt_tokens + self.completion_tokens,
+                "evals": self.evals_done,
+            }
+            for name, rate in self.rates.items():
+                at, count = self.last.get(name, (now, counts[name]))
+                if rate.value is None and counts[name] == count:
+                    # Nothing measured yet: the first rate spans the whole warm-up.
+                    self.last.setdefault(name, (at, count))
+                    continue
+                if now > at:
+                    rate.update((counts[name] - count) / (now - at), now - at)
+                self.last[name] = (now, counts[name])
+        if self.status_path is not None:
+            write_status(self.status_path, self.snapshot())
+
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining evals over the measured eval rate (the call rate until results are written)."""
+        remaining = self.evals_total - self.evals_done
+        if remaining <= 0:
+            return 0.0
+        rate = self.rates["evals"].value or self.rates["calls"].value
+        return remaining / rate if rate else None
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            eta = self.eta_seconds()
+            return {
+                "run": self.run_id,
+                "state": self.state,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": utc_now(),
+                "elapsed_seconds": round(time.monotonic() - self.started, 1) if self.started else 0.0,
+                "executions": {"done": self.executions_done, "total": self.executions_total},
+                "evals": {"done": self.evals_done, "total": self.evals_total},
+                "calls": {
+                    "completed": self.calls_completed,
+                    "in_flight": self.calls_in_flight,
+                    "errors": self.errors,
+                    "retries": self.retries,
+                    "timeouts": self.timeouts,
+                    "cache_hits": self.cache_hits,
+                },
+                "tokens": {"prompt": self.prompt_tokens, "completion": self.completion_tokens},
+                "rates": {
+                    f"{name}_per_second": round(rate.value or 0.0, 3) for name, rate in self.rates.items()
+                },
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+            }
+
+
+# (name, type, help, value from a status snapshot)
+PROMETHEUS_METRICS = [
+    ("eval_run_judge_calls_total", "counter", "Judge calls finished, including failed ones.",
+     lambda s: s["calls"]["completed"]),
+    ("eval_run_judge_calls_in_flight", "gauge", "Judge calls started and not yet finished.",
+     lambda s: s["calls"]["in_flight"]),
+    ("eval_run_judge_call_errors_total", "counter", "Judge calls that failed after any retries.",
+     lambda s: s["calls"]["errors"]),
+    ("eval_run_judge_call_retries_total", "counter", "Retried judge call attempts.",
+     lambda s: s["calls"]["retries"]),
+    ("eval_run_judge_call_timeouts_total", "counter", "Judge calls cut off by their deadline.",
+     lambda s: s["calls"]["timeouts"]),
+    ("eval_run_cache_hits_total", "counter", "Judge calls answered from the response cache.",
+     lambda s: s["calls"]["cache_hits"]),
+    ("eval_run_prompt_tokens_total", "counter", "Prompt tokens used by judge calls.",
+     lambda s: s["tokens"]["prompt"]),
+    ("eval_run_completion_tokens_total", "counter", "Completion tokens used by judge calls.",
+     lambda s: s["tokens"]["completion"]),
+    ("eval_run_judge_calls_per_second", "gauge", "EWMA of finished judge calls per second.",
+     lambda s: s["rates"]["calls_per_second"]),
+    ("eval_run_tokens_per_second", "gauge", "EWMA of judge tokens per second.",
+     lambda s: s["rates"]["tokens_per_second"]),
+    ("eval_run_evals_per_second", "gauge", "EWMA of eval results written per second.",
+     lambda s: s["rates"]["evals_per_second"]),
+    ("eval_run_evals_done", "gauge", "Eval results written.", lambda s: s["evals"]["done"]),
+    ("eval_run_evals_planned", "gauge", "Eval results the run will write.", lambda s: s["evals"]["total"]),
+    ("eval_run_executions_done", "gauge", "Executions written.", lambda s: s["executions"]["done"]),
+    ("eval_run_executions_planned", "gauge", "Executions the run will write.",
+     lambda s: s["executions"]["total"]),
+    ("eval_run_eta_seconds", "gauge", "Estimated seconds until the run finishes (NaN until measured).",
+     lambda s: s["eta_seconds"] if s["eta_seconds"] is not None else float("nan")),
+]
+
+
+def prometheus_text(status: Dict) -> str:
+    labels = '{run="%s"}' % str(status.get("run") or "").replace("\\", "\\\\").replace('"', '\\"')
+    lines = []
+    for name, kind, help_text, value in PROMETHEUS_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name}{labels} {value(status)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = self.server.metrics.snapshot()
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/metrics":
+            self._send(200, prometheus_text(status), "text/plain; version=0.0.4")
+        elif path == "/status":
+            self._send(200, json.dumps(status), "application/json")
+        else:
+            self._send(404, "not found\n", "text/plain")
+
+    def _send(self, code: int, body: str, content_type: str) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def write_status(path: Path, status: Dict) -> None:
+    """Replace the status file atomically, so readers never see a partial write."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(status, indent=2))
+    os.replace(tmp_path, path)
+
+
+def read_status(path: Path) -> Optional[Dict]:
+    try:
+        status = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    updated = datetime.fromisoformat(status["updated_at"])
+    status["age_seconds"] = round((datetime.now(timezone.utc) - updated).total_seconds(), 1)
+    status["stale"] = status["state"] == "running" and status["age_seconds"] > STALE_SECONDS
+    return status
+
+
+def combine_statuses(statuses: List[Dict]) -> Dict:
+    """Sum shard workers' statuses into one (shards not yet started are not counted)."""
+    live = [status for status in statuses if status["state"] == "running" and not status["stale"]]
+    if all(status["state"] == "finished" for status in statuses):
+        state = "finished"
+    else:
+        state = "running" if live else "stopped"
+    combined: Dict = {
+        "run": statuses[0]["run"],
+        "state": state,
+        "shards": len(statuses),
+        "age_seconds": min(status["age_seconds"] for status in statuses),
+        "stale": not live and state == "running",
+    }
+    for section in ("executions", "evals", "calls", "tokens", "rates"):
+        combined[section] = {
+            key: round(sum(status[section][key] for status in statuses), 3)
+            for key in statuses[0][section]
+        }
+    remaining = combined["evals"]["total"] - combined["evals"]["done"]
+    rate = combined["rates"]["evals_per_second"] or combined["rates"]["calls_per_second"]
+    combined["eta_seconds"] = 0.0 if remaining <= 0 else round(remaining / rate, 1) if rate else None
+    return combined
+
+
+def load_status(output_path: Path) -> Optional[Dict]:
+    """A run's live status, or its shard workers' statuses combined; None if none was written."""
+    status = read_status(status_path_for(output_path))
+    if status is not None:
+        return status
+    shards = shard_dir(output_path)
+    statuses = [
+        status for status in (read_status(path) for path in sorted(shards.glob(f"*_{STATUS_SUFFIX}")))
+        if status is not None
+    ] if shards.is_dir() else []
+    return combine_statuses(statuses) if statuses else None
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown (no throughput measured yet)"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m {secs}s"
+
+
+def print_status(status: Dict) -> None:
+    executions, evals, calls = status["executions"], status["evals"], status["calls"]
+    rates = status["rates"]
+    percent = evals["done"] * 100 // max(evals["total"], 1)
+    print("================================")
+    print("Evaluation Progress" + (f" ({status['shards']} shards)" if status.get("shards") else ""))
+    print("================================")
+    print(f"State:     {status['state']}" + (f" (no update for {status['age_seconds']:.0f}s)" if status["stale"] else ""))
+    print(f"Completed: {executions['done']} / {executions['total']} executions")
+    print(f"Evals:     {evals['done']} / {evals['total']} ({percent}%)")
+    print(f"Calls:     {calls['completed']} done, {calls['in_flight']} in flight, {calls['cache_hits']} cached")
+    print(f"Errors:    {calls['errors']} failed, {calls['retries']} retries, {calls['timeouts']} timeouts")
+    print(f"Rate:      {rates['calls_per_second']:.2f} calls/s, {rates['tokens_per_second']:.0f} tokens/s (EWMA)")
+    if status["state"] == "finished":
+        print("✅ Evaluation complete!")
+    else:
+        print(f"Est. time remaining: {format_duration(status['eta_seconds'])}")
+    print("================================")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the live status of an eval run.")
+    parser.add_argument("results_path", help="The run's eval results file (e.g. outputs/runs/03/03_eval_results.jsonl).")
+    parser.add_argument("--json", action="store_true", help="Print the status as JSON.")
+    args = parser.parse_args()
+    status = load_status(Path(args.results_path))
+    if status is None:
+        print(f"No live status for {args.results_path}", file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(status, indent=2))
+    else:
+        print_status(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,31 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 import shutil
+import subprocess
+import sys
+import time
 from typing import Dict, List, Optional
 
-from run_evals import run_evaluations
+from circuit_breaker import CircuitOpenError
+from profiling import RunProfiler
+from run_evals import (
+    RunningSummary,
+    build_judge_client,
+    build_sampler,
+    build_strata,
+    default_cache_path,
+    iter_executions,
+    load_evals,
+    merge_shards,
+    run_evaluations,
+    run_shards,
+    write_profile,
+)
+from sharding import DEFAULT_LEASE_TTL, missing_shards, prepare_shard_dir
 from create_slim_results import extract_slim_data
+from derive_run import criteria_hashes, load_derived_run, previous_run_dir, print_derived
+from run_store import RunStore, default_store_path
+from usage import load_prices
 
 
 def sha256_file(path: Path) -> str:
@@ -46,27 +67,106 @@ def parse_eval_models(evals_path: Path) -> List[Dict[str, str]]:
 
 
 def summarize_results(results: List[Dict]) -> Dict[str, Dict[str, float]]:
-    summary = {}
-    if not results:
-        return summary
-    eval_names = [e["eval_name"] for e in results[0].get("evals", [])]
-    for eval_name in eval_names:
-        scores = []
-        passed = 0
-        total = 0
-        for result in results:
-            for eval_result in result.get("evals", []):
-                if eval_result.get("eval_name") == eval_name:
-                    score = eval_result.get("score")
-                    if score is not None:
-                        scores.append(score)
-                    if eval_result.get("passed"):
-                        passed += 1
-                    total += 1
-        avg_score = sum(scores) / len(scores) if scores else 0
-        pass_rate = (passed / total) if total else 0
-        summary[eval_name] = {"avg_score": avg_score, "pass_rate": pass_rate}
-    return summary
+    summary = RunningSummary()
+    for result in results:
+        summary.add(result)
+    return summary.to_dict()
+
+
+def shard_worker_command(
+    args: argparse.Namespace,
+    evals_path: Path,
+    executions_path: Path,
+    results_path: Path,
+) -> List[str]:
+    """run_evals.py command that claims free shards of this run (also usable on other hosts)."""
+    command = [
+        sys.executable, str(Path(__file__).parent / "run_evals.py"),
+        "--evals-path", str(evals_path),
+        "--executions-path", str(executions_path),
+        "--output-path", str(results_path),
+        "--shard", f"any/{args.shards}",
+        "--lease-ttl", str(args.lease_ttl),
+        "--concurrency", str(args.concurrency),
+        "--max-retries", str(args.max_retries),
+    ]
+    if args.rate_limits:
+        command += ["--rate-limits", args.rate_limits]
+    command += ["--no-cache"] if args.no_cache else ["--cache-path", args.cache_path]
+    if args.dedupe_payload:
+        command.append("--dedupe-payload")
+    if args.input_token_budget is not None:
+        command += ["--input-token-budget", str(args.input_token_budget)]
+    if args.hedge_percentile is not None:
+        command += ["--hedge-percentile", str(args.hedge_percentile), "--hedge-budget", str(args.hedge_budget)]
+    if args.call_timeout is not None:
+        command += ["--call-timeout", str(args.call_timeout)]
+    if args.execution_timeout is not None:
+        command += ["--execution-timeout", str(args.execution_timeout)]
+    command += [
+        "--breaker-failures", str(args.breaker_failures),
+        "--breaker-cooldown", str(args.breaker_cooldown),
+        "--breaker-give-up", str(args.breaker_give_up),
+    ]
+    if args.longest_first:
+        command.append("--longest-first")
+    if args.schedule_window is not None:
+        command += ["--schedule-window", str(args.schedule_window)]
+    if args.combine_criteria:
+        command.append("--combine-criteria")
+    if args.dedupe_executions:
+        command.append("--dedupe-executions")
+    if args.prices:
+        command += ["--prices", args.prices]
+    if args.profile or args.profile_cprofile:
+        command.append("--profile-cprofile" if args.profile_cprofile else "--profile")
+    return command
+
+
+def run_sharded(
+    args: argparse.Namespace,
+    evals_path: Path,
+    executions_path: Path,
+    results_path: Path,
+    judge_client,
+    prices: Dict[str, Dict[str, float]],
+    store: Optional[RunStore] = None,
+    run_id: Optional[str] = None,
+) -> RunningSummary:
+    """
+    Start local shard workers, then wait for every shard (including any claimed by
+    workers on other hosts), taking over shards whose lease has expired, and merge.
+    """
+    prepare_shard_dir(results_path, args.shards)
+    command = shard_worker_command(args, evals_path, executions_path, results_path)
+    print(f"Starting {args.shard_workers} shard worker(s) for {args.shards} shards. "
+          f"To add a host, run on it:\n  {' '.join(command[1:])}")
+    workers = [subprocess.Popen(command) for _ in range(args.shard_workers)]
+    for worker in workers:
+        worker.wait()
+    while missing_shards(results_path, args.shards):
+        # Leased shards whose worker stopped heartbeating are picked up here.
+        run_shards(
+            evals_path,
+            executions_path,
+            results_path,
+            f"any/{args.shards}",
+            args.lease_ttl,
+            concurrency=args.concurrency,
+            judge_client=judge_client,
+            dedupe_payload=args.dedupe_payload,
+            input_token_budget=args.input_token_budget,
+            longest_first=args.longest_first,
+            schedule_window=args.schedule_window,
+            prices=prices,
+            combine=args.combine_criteria,
+            dedupe_executions=args.dedupe_executions,
+        )
+        missing = missing_shards(results_path, args.shards)
+        if missing:
+            print(f"Waiting for shards {', '.join(map(str, missing))} held by other workers...")
+            time.sleep(min(30.0, args.lease_ttl / 4))
+    return merge_shards(evals_path, results_path, args.shards, prices, store, run_id)
 
 
 def write_manifest(
@@ -76,11 +176,17 @@ def write_manifest(
     system_prompt_path: Path,
     user_prompt_path: Path,
     evals_path: Path,
-    results: List[Dict],
+    summary: RunningSummary,
     started_at: str,
     finished_at: str,
     source_executions_path: str,
-) -> None:
+    shards: Optional[int] = None,
+    sampling: Optional[Dict] = None,
+    stratification: Optional[Dict] = None,
+    derived_from: Optional[Dict] = None,
+    input_token_budget: Optional[int] = None,
+    hedging: Optional[Dict] = None,
+) -> Dict:
     manifest = {
         "run_id": run_id,
         "started_at": started_at,
@@ -89,7 +195,7 @@ def write_manifest(
             "executions": {
                 "path": str(executions_path),
                 "sha256": sha256_file(executions_path),
-                "count": len(results),
+                "count": summary.executions,
                 "source_path": source_executions_path,
             },
             "prompts": {
@@ -106,11 +212,30 @@ def write_manifest(
                 "path": str(evals_path),
                 "sha256": sha256_file(evals_path),
                 "models": parse_eval_models(evals_path),
+                "criteria": criteria_hashes(load_evals(evals_path)),
+                "input_token_budget": input_token_budget,
             },
         },
-        "summary": summarize_results(results),
+        "summary": summary.to_dict(),
+        "usage": summary.usage_dict(),
     }
+    if summary.copied:
+        manifest["duplicates"] = {
+            "copied_executions": summary.copied,
+            "calls_saved": round(summary.calls_saved),
+        }
+    if shards:
+        manifest["shards"] = shards
+    if sampling:
+        manifest["sampling"] = sampling
+    if stratification:
+        manifest["stratification"] = stratification
+    if derived_from:
+        manifest["derived_from"] = derived_from
+    if hedging:
+        manifest["hedging"] = hedging
     manifest_path.write_text(json.dumps(manifest, indent=2))
+    return manifest
 
 
 def main() -> None:
@@ -120,8 +245,8 @@ def main() -> None:
     base_dir = Path(__file__).parent.parent
     parser.add_argument(
         "--executions-path",
-        required=True,
-        help="Path to the incoming executions JSONL file.",
+        default=None,
+        help="Path to the incoming executions JSONL file (with --derive-from, defaults to that run's executions).",
     )
     parser.add_argument(
         "--system-prompt-path",
@@ -143,15 +268,246 @@ def main() -> None:
         default=None,
         help="Optional run ID (two digits). If not provided, auto-increment.",
     )
+    parser.add_argument(
+        "--derive-from",
+        default=None,
+        help="Earlier run ID to derive from: results of criteria unchanged in Evals.json are carried over "
+             "(threshold-only changes just recompute passed); only added or modified criteria are judged.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum judge calls in flight. Values above 1 use the async client.",
+    )
+    parser.add_argument(
+        "--rate-limits",
+        default=None,
+        help='Optional JSON file of per-model budgets, e.g. {"gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}}.',
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=6,
+        help="Retries per judge call for 429s and transient API errors.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=str(default_cache_path()),
+        help="SQLite file caching judge responses by (model, messages, sampling params).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the judge; do not read or write the response cache.",
+    )
+    parser.add_argument(
+        "--dedupe-payload",
+        action="store_true",
+        help="Send each template variable (e.g. {{item.input}}) in only one message per judge call.",
+    )
+    parser.add_argument(
+        "--input-token-budget",
+        type=int,
+        default=None,
+        help="Compact each llm-input to about this many tokens before judging "
+             "(criteria with input_compaction.max_tokens in Evals.json keep their own).",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        help="With --concurrency, send one duplicate of a judge request still running at this "
+             "latency percentile of its model (learned during the run), keeping the first answer.",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.05,
+        help="Maximum duplicate requests as a fraction of requests per model (default: 0.05).",
+    )
+    parser.add_argument(
+        "--call-timeout",
+        type=float,
+        default=None,
+        help="Seconds a judge call may take, including throttling, retries and backoff; "
+             "a call past it is cancelled and scored as an error.",
+    )
+    parser.add_argument(
+        "--execution-timeout",
+        type=float,
+        default=None,
+        help="Seconds all judge calls for one execution may take together.",
+    )
+    parser.add_argument(
+        "--breaker-failures",
+        type=int,
+        default=10,
+        help="Consecutive transient failures of a model that open its circuit breaker, pausing "
+             "its calls while one probe call at a time checks for recovery (0 disables; default: 10).",
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=5.0,
+        help="Seconds before the first probe of an open breaker; doubles per failed probe up to 60s.",
+    )
+    parser.add_argument(
+        "--breaker-give-up",
+        type=float,
+        default=600.0,
+        help="Stop the run when a breaker stays open this long (0 waits indefinitely; default: 600).",
+    )
+    parser.add_argument(
+        "--longest-first",
+        action="store_true",
+        help="With --concurrency, dispatch the judge calls with the longest rendered prompts first.",
+    )
+    parser.add_argument(
+        "--schedule-window",
+        type=int,
+        default=None,
+        help="Executions in flight at once (default: 2x concurrency, 16x with --longest-first). "
+             "Results are held in memory until earlier executions finish.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live run metrics in Prometheus text format at http://127.0.0.1:PORT/metrics "
+             "(JSON at /status). A <RUN_ID>_status.json file is written either way; "
+             "shard workers only write their own status files.",
+    )
+    parser.add_argument(
+        "--prices",
+        default=None,
+        help='Optional JSON price table (USD per 1M tokens), e.g. {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6}}.',
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-stage timings and per-model request latency percentiles to <RUN_ID>_profile.json.",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        action="store_true",
+        help="With --profile, also dump a cProfile of the CPU-bound stages to <RUN_ID>_profile.pstats.",
+    )
+    parser.add_argument(
+        "--run-store",
+        nargs="?",
+        const=str(default_store_path()),
+        default=None,
+        metavar="PATH",
+        help="Also write executions, results and the manifest to a SQLite run store (default outputs/runs.sqlite).",
+    )
+    parser.add_argument(
+        "--dedupe-executions",
+        action="store_true",
+        help="Judge only the first execution with a given llm-input/llm-output pair and copy its "
+             "result to later ones (copied_from).",
+    )
+    parser.add_argument(
+        "--combine-criteria",
+        action="store_true",
+        help="Score all criteria that share a model in one JSON-mode call per execution "
+             "(per-criterion calls only for entries that come back missing or invalid).",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Judge executions in random order and stop each criterion once its pass-rate interval is narrow enough.",
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.1,
+        help="With --sample, target full width of each criterion's pass-rate interval (0.1 = +/-5 points).",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="With --sample, confidence level of the Wilson interval.",
+    )
+    parser.add_argument(
+        "--max-samples",
+        type=int,
+        default=None,
+        help="With --sample, stop a criterion after this many judged executions regardless of width.",
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=0,
+        help="With --sample, seed for the random execution order.",
+    )
+    parser.add_argument(
+        "--strata-fields",
+        default=None,
+        help="Comma-separated llm-input dot paths to stratify on, e.g. briefing_info.portfolio_currency,holdings[].sector.",
+    )
+    parser.add_argument(
+        "--stratum-quota",
+        type=int,
+        default=50,
+        help="With --strata-fields, executions drawn per stratum (all of a smaller stratum).",
+    )
+    parser.add_argument(
+        "--quotas",
+        default=None,
+        help='With --strata-fields, optional JSON of per-stratum quotas keyed by label, e.g. {"EUR | Energy": 200}.',
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Split the run into N shards claimed through lease files (see run_evals.py --shard).",
+    )
+    parser.add_argument(
+        "--shard-workers",
+        type=int,
+        default=None,
+        help="Local worker processes for --shards (default: one per shard).",
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=DEFAULT_LEASE_TTL,
+        help="Seconds without a heartbeat before a shard lease may be taken over.",
+    )
     args = parser.parse_args()
-
-    executions_path = Path(args.executions_path)
-    if not executions_path.exists():
-        raise FileNotFoundError(f"Executions file not found: {executions_path}")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.shards is not None and args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.shards:
+        args.shard_workers = args.shard_workers or args.shards
+    if args.sample and args.shards:
+        parser.error("--sample cannot be combined with --shards")
+    if args.strata_fields and (args.sample or args.shards):
+        parser.error("--strata-fields cannot be combined with --sample or --shards")
+    if args.derive_from and (args.sample or args.shards):
+        parser.error("--derive-from cannot be combined with --sample or --shards")
+    if not args.executions_path and not args.derive_from:
+        parser.error("--executions-path is required unless --derive-from is given")
 
     runs_dir = base_dir / "outputs" / "runs"
     runs_dir.mkdir(parents=True, exist_ok=True)
 
+    previous_dir = None
+    if args.derive_from:
+        previous_dir = previous_run_dir(runs_dir, args.derive_from)
+        if previous_dir is None:
+            raise FileNotFoundError(f"Run folder not found: {runs_dir / args.derive_from}")
+
+    if args.executions_path:
+        executions_path = Path(args.executions_path)
+    else:
+        executions_path = previous_dir / f"{previous_dir.name}_executions.jsonl"
+    if not executions_path.exists():
+        raise FileNotFoundError(f"Executions file not found: {executions_path}")
+
     run_id = args.run_id or next_run_id(runs_dir)
     if not run_id.isdigit():
         raise ValueError("run-id must be numeric")
@@ -171,9 +527,14 @@ def main() -> None:
     run_results = run_dir / f"{prefix}eval_results.jsonl"
     run_slim_results = run_dir / f"{prefix}eval_results_slim.jsonl"
     run_manifest = run_dir / f"{prefix}run_manifest.json"
+    run_profile = run_dir / f"{prefix}profile.json"
 
     source_executions_path = str(executions_path)
-    shutil.move(str(executions_path), run_executions)
+    if args.executions_path:
+        shutil.move(str(executions_path), run_executions)
+    else:
+        # Reusing the earlier run's executions: leave its snapshot in place.
+        shutil.copy2(executions_path, run_executions)
 
     system_prompt_path = Path(args.system_prompt_path)
     user_prompt_path = Path(args.user_prompt_path)
@@ -184,28 +545,108 @@ def main() -> None:
     shutil.copy2(evals_path, run_evals)
 
     started_at = datetime.now(timezone.utc).isoformat()
-    results = run_evaluations(run_evals, run_executions, run_results)
-    extract_slim_data(str(run_results), str(run_slim_results))
-    finished_at = datetime.now(timezone.utc).isoformat()
-
-    write_manifest(
-        run_manifest,
-        run_id,
-        run_executions,
-        run_system_prompt,
-        run_user_prompt,
-        run_evals,
-        results,
-        started_at,
-        finished_at,
-        source_executions_path,
+    profiler = RunProfiler(args.profile or args.profile_cprofile, args.profile_cprofile)
+    judge_client = build_judge_client(
+        args.rate_limits,
+        args.max_retries,
+        None if args.no_cache else args.cache_path,
+        profiler,
+        args.hedge_percentile,
+        args.hedge_budget,
+        args.call_timeout,
+        args.execution_timeout,
+        args.breaker_failures,
+        args.breaker_cooldown,
+        args.breaker_give_up,
     )
+    prices = load_prices(args.prices)
+    sampler = build_sampler(args)
+    strata = build_strata(args, run_executions)
+    store = RunStore(Path(args.run_store)) if args.run_store else None
+    try:
+        derived = None
+        if previous_dir is not None:
+            with profiler.stage("load"):
+                derived = load_derived_run(
+                    previous_dir,
+                    load_evals(run_evals),
+                    iter_executions(run_executions),
+                    sha256_file(run_executions),
+                    args.input_token_budget,
+                )
+            print_derived(derived)
+        try:
+            if args.shards:
+                summary = run_sharded(
+                    args, run_evals, run_executions, run_results, judge_client, prices, store, run_id
+                )
+            else:
+                summary = run_evaluations(
+                    run_evals,
+                    run_executions,
+                    run_results,
+                    concurrency=args.concurrency,
+                    judge_client=judge_client,
+                    dedupe_payload=args.dedupe_payload,
+                    input_token_budget=args.input_token_budget,
+                    longest_first=args.longest_first,
+                    schedule_window=args.schedule_window,
+                    metrics_port=args.metrics_port,
+                    prices=prices,
+                    sampler=sampler,
+                    strata=strata,
+                    combine=args.combine_criteria,
+                    dedupe_executions=args.dedupe_executions,
+                    carried=derived.cells if derived else None,
+                    store=store,
+                    run_id=run_id,
+                )
+        except CircuitOpenError as e:
+            raise SystemExit(
+                f"\nStopped: {e}. Finished judge calls are checkpointed; continue with:\n"
+                f"  python {Path(__file__).parent / 'run_evals.py'} --evals-path {run_evals} "
+                f"--executions-path {run_executions} --output-path {run_results} --resume"
+            )
+        finally:
+            judge_client.close()
+        with profiler.stage("write"):
+            extract_slim_data(str(run_results), str(run_slim_results))
+        write_profile(profiler, run_profile)
+        finished_at = datetime.now(timezone.utc).isoformat()
+
+        manifest = write_manifest(
+            run_manifest,
+            run_id,
+            run_executions,
+            run_system_prompt,
+            run_user_prompt,
+            run_evals,
+            summary,
+            started_at,
+            finished_at,
+            source_executions_path,
+            args.shards,
+            sampler.to_dict() if sampler else None,
+            strata.to_dict() if strata else None,
+            derived.to_dict() if derived else None,
+            args.input_token_budget,
+            judge_client.hedger.to_dict() if judge_client.hedger else None,
+        )
+        if store is not None:
+            store.set_manifest(run_id, manifest)
+    finally:
+        if store is not None:
+            store.close()
 
 
     print(f"\nRun complete: {run_dir}")
     print(f"Results: {run_results}")
     print(f"Slim results: {run_slim_results}")
     print(f"Manifest: {run_manifest}")
+    if profiler.enabled:
+        print(f"Profile: {run_profile}")
+    if store is not None:
+        print(f"Run store: {store.path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Hot-path profiling for eval runs.
+Accumulates per-stage timings (load, render, request, parse, write, ...) and per-model
+request latency percentiles, and can capture a cProfile of the CPU-bound stages.
+"""
+
+import cProfile
+import json
+import math
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# Stages that run on the CPU (as opposed to waiting on the network or a limiter).
+CPU_STAGES = {"load", "render", "parse", "write", "cache"}
+
+_NULL_STAGE = nullcontext()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def profile_path_for(output_path: Path, suffix: str = "profile.json") -> Path:
+    """<RUN_ID>_profile.json for <RUN_ID>_eval_results.jsonl, else <stem>_profile.json."""
+    name = output_path.name
+    if name.endswith("eval_results.jsonl"):
+        return output_path.with_name(name[: -len("eval_results.jsonl")] + suffix)
+    return output_path.with_name(f"{output_path.stem}_{suffix}")
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler: "RunProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        cpu = self.profiler.cprofile is not None and self.name in CPU_STAGES
+        if cpu:
+            self.profiler.cprofile.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.started)
+        if self.profiler.cprofile is not None and self.name in CPU_STAGES:
+            self.profiler.cprofile.disable()
+        return False
+
+
+class RunProfiler:
+    """Disabled by default, in which case every hook is a no-op."""
+
+    def __init__(self, enabled: bool = False, cprofile: bool = False):
+        self.enabled = enabled
+        self.cprofile = cProfile.Profile() if enabled and cprofile else None
+        self.stages: Dict[str, List[float]] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.started = time.perf_counter()
+        self.extra: Dict[str, object] = {}
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        if self.enabled:
+            self.latencies.setdefault(model, []).append(seconds)
+
+    def timed_iter(self, items: Iterable, name: str) -> Iterator:
+        """Yield from `items`, charging the time spent producing each one to `name`."""
+        if not self.enabled:
+            yield from items
+            return
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, time.perf_counter() - started)
+                return
+            self.add(name, time.perf_counter() - started)
+            yield item
+
+    def to_dict(self) -> Dict:
+        stages = {
+            name: {
+                "total_seconds": round(total, 4),
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3) if count else 0,
+            }
+            for name, (total, count) in self.stages.items()
+        }
+        latency = {}
+        for model, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency[model] = {
+                "count": len(ordered),
+                "mean": round(sum(ordered) / len(ordered), 4),
+                "p50": round(percentile(ordered, 50), 4),
+                "p95": round(percentile(ordered, 95), 4),
+                "p99": round(percentile(ordered, 99), 4),
+                "max": round(ordered[-1], 4),
+            }
+        profile = {
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": stages,
+            "request_latency_seconds": latency,
+        }
+        profile.update(self.extra)
+        return profile
+
+    def write(self, path: Path) -> Optional[Path]:
+        """Write the JSON profile (and <name>.pstats if cProfile was on); return the pstats path."""
+        if not self.enabled:
+            return None
+        pstats_path = None
+        if self.cprofile is not None:
+            pstats_path = path.with_suffix(".pstats")
+            self.cprofile.dump_stats(str(pstats_path))
+            self.extra["cprofile"] = str(pstats_path)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return pstats_path
+
+
+# Shared disabled profiler for callers that were not handed one.
+NULL_PROFILER = RunProfiler()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Per-model request/token pacing and retry backoff for judge calls.
+
+Rate limits file format (JSON), keyed by the `model` values used in Evals.json:
+    {"gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}}
+Models without an entry are not paced, but throttled calls are still retried.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import openai
+
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """Cheap prompt size estimate (~4 characters per token)."""
+    return sum(len(str(msg.get("content", ""))) for msg in messages) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute / 60` units per second.
+    Reservations may drive the balance negative; the caller waits it off.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units and return how many seconds to wait before using them."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def credit(self, amount: float) -> None:
+        """Return (or, if negative, take) units after the real cost is known."""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """RPM/TPM buckets per model, plus a shared pause when the API says back off."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.requests: Dict[str, TokenBucket] = {}
+        self.tokens: Dict[str, TokenBucket] = {}
+        self.paused_until: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        for model, budget in (limits or {}).items():
+            if budget.get("rpm"):
+                self.requests[model] = TokenBucket(float(budget["rpm"]))
+            if budget.get("tpm"):
+                self.tokens[model] = TokenBucket(float(budget["tpm"]))
+
+    def reserve(self, model: str, tokens: int) -> float:
+        delay = 0.0
+        if model in self.requests:
+            delay = max(delay, self.requests[model].reserve(1))
+        if model in self.tokens:
+            delay = max(delay, self.tokens[model].reserve(tokens))
+        with self.lock:
+            paused = self.paused_until.get(model, 0.0) - time.monotonic()
+        return max(delay, paused)
+
+    def acquire(self, model: str, tokens: int) -> float:
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, model: str, tokens: int) -> float:
+        delay = self.reserve(model, tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def settle(self, model: str, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the response reports real usage."""
+        if actual is None or model not in self.tokens:
+            return
+        self.tokens[model].credit(estimated - actual)
+
+    def pause(self, model: str, seconds: float) -> None:
+        """Hold every call to `model` for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self.lock:
+            until = time.monotonic() + seconds
+            self.paused_until[model] = max(self.paused_until.get(model, 0.0), until)
+
+
+def load_rate_limits(path: Optional[Path]) -> Dict[str, Dict[str, float]]:
+    if not path:
+        return {}
+    with Path(path).open("r") as handle:
+        return json.load(handle)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read Retry-After / retry-after-ms from the error's HTTP response, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt <= self.max_retries and isinstance(error, RETRYABLE_ERRORS)
+
+    def delay(self, error: Exception, attempt: int) -> float:
+        """Honour Retry-After when given, otherwise full-jitter exponential backoff."""
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Resume index for a results file.
+As each result line is written, a fixed-size record (execution_id, end byte offset,
+complete flag) is appended to <stem>.index, after a header holding a fingerprint of
+the criteria being written. A resumed run walks these records instead of parsing the
+results file, so finding the finished prefix costs O(completed executions). Now and
+then (and when the run stops) the running summary's state is saved to <stem>.summary
+as JSON, replaced atomically, so only the lines written after the last snapshot are
+parsed again.
+
+A torn last record is ignored, and lines written after the last record (the run
+stopped between the two writes) are read from the results file. The prefix ends at
+the first incomplete line (e.g. one with a failed call); that line and the ones after
+it are judged again, reusing their checkpointed cells. When the index is
+missing, written for other criteria, or does not match the file, the caller falls
+back to a full scan and rewrites the index.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from checkpoint import is_error_result
+from jsonl_codec import DecodeError, dumps, loads
+
+
+MAGIC = b"EVIX"
+VERSION = 1
+# magic, version, criteria fingerprint
+HEADER = struct.Struct("<4sI8s")
+# execution_id, end offset of its line, flags
+RECORD = struct.Struct("<qQB")
+COMPLETE = 1
+SNAPSHOT_SECONDS = 60.0
+
+
+def index_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.stem + ".index")
+
+
+def summary_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.stem + ".summary")
+
+
+def discard_index(output_path: Path) -> None:
+    """Drop the index of a results file that was replaced wholesale (e.g. by a shard merge)."""
+    index_path(output_path).unlink(missing_ok=True)
+    summary_path(output_path).unlink(missing_ok=True)
+
+
+def expected_criteria(evals: List[Dict]) -> List[Tuple[str, float]]:
+    return [(c["name"], c["pass_threshold"]) for c in evals]
+
+
+def is_complete(result: Dict, expected: List[Tuple[str, float]]) -> bool:
+    """The line has exactly the current criteria, in order, and no failed calls."""
+    evals_done = [e for e in result.get("evals", []) if e]
+    return (
+        [(e.get("eval_name"), e.get("pass_threshold")) for e in evals_done] == expected
+        and not any(is_error_result(e) for e in evals_done)
+    )
+
+
+class ResultsIndex:
+    def __init__(self, output_path: Path, evals: List[Dict]):
+        self.path = index_path(output_path)
+        self.summary_path = summary_path(output_path)
+        self.expected = expected_criteria(evals)
+        self.fingerprint = hashlib.sha256(json.dumps(self.expected).encode("utf-8")).digest()[:8]
+        self.handle = None
+        self.offset = 0
+        self.records = 0
+        self.snapshot_at = time.monotonic()
+
+    def _header(self) -> Optional[Tuple[Tuple, bytes]]:
+        """(header fields, records) of the index file, or None if it is missing or torn."""
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        return HEADER.unpack_from(data), data
+
+    def other_criteria(self) -> bool:
+        """The index was written for a different set of criteria."""
+        found = self._header()
+        return found is not None and found[0][:2] == (MAGIC, VERSION) and found[0][2] != self.fingerprint
+
+    def prefix(self, member, mark: Optional[int] = None) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        (records, end offset, records ending exactly at `mark` or None) for the leading
+        records that are complete lines of the executions member(0), member(1), ... in
+        order; the first other record ends the prefix. None when there is no usable
+        index; a torn final record is dropped.
+        """
+        found = self._header()
+        if found is None or found[0] != (MAGIC, VERSION, self.fingerprint):
+            return None
+        body = found[1][HEADER.size:]
+        count = 0
+        end = 0
+        marked = 0 if mark == 0 else None
+        for execution_id, offset, flags in RECORD.iter_unpack(body[: len(body) - len(body) % RECORD.size]):
+            if offset <= end:
+                return None
+            if not flags & COMPLETE or execution_id != member(count):
+                break
+            count += 1
+            end = offset
+            if offset == mark:
+                marked = count
+        return count, end, marked
+
+    def load_snapshot(self) -> Optional[Tuple[int, int, Dict]]:
+        """
+        (offset, executions, summary state) of the last snapshot for these criteria. The
+        state is checked (and its version matched) by RunningSummary.from_state.
+        """
+        try:
+            snapshot = loads(self.summary_path.read_bytes())
+        except (OSError, *DecodeError):
+            return None
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("version") != VERSION
+            or snapshot.get("fingerprint") != self.fingerprint.hex()
+        ):
+            return None
+        try:
+            return snapshot["offset"], snapshot["executions"], snapshot["state"]
+        except KeyError:
+            return None
+
+    def reopen(self, records: int, offset: int) -> None:
+        """Continue an index whose first `records` records (ending at `offset`) are valid."""
+        self.handle = self.path.open("rb+")
+        self.handle.truncate(HEADER.size + records * RECORD.size)
+        self.handle.seek(0, 2)
+        self.records = records
+        self.offset = offset
+
+    def rewrite(self, records: Iterable[Tuple[int, int]] = ()) -> None:
+        """Start the index over, atomically, with complete (execution_id, end offset) records."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(HEADER.pack(MAGIC, VERSION, self.fingerprint))
+        os.replace(tmp_path, self.path)
+        self.summary_path.unlink(missing_ok=True)
+        self.reopen(0, 0)
+        self.extend(records)
+
+    def _write(self, execution_id: int, offset: int, flags: int) -> None:
+        self.handle.write(RECORD.pack(execution_id, offset, flags))
+        self.records += 1
+        self.offset = offset
+
+    def extend(self, records: Iterable[Tuple[int, int]]) -> None:
+        for execution_id, offset in records:
+            self._write(execution_id, offset, COMPLETE)
+        self.handle.flush()
+
+    def append(self, result: Dict, length: int) -> None:
+        """Record a result line of `length` bytes just written after the previous one."""
+        flags = COMPLETE if is_complete(result, self.expected) else 0
+        self._write(result["execution_id"], self.offset + length, flags)
+        self.handle.flush()
+
+    def snapshot(self, summary, force: bool = False) -> None:
+        """
+        Save the state of the summary of the lines written so far (at most every
+        SNAPSHOT_SECONDS unless forced), from its to_state().
+        """
+        now = time.monotonic()
+        if self.handle is None or (not force and now - self.snapshot_at < SNAPSHOT_SECONDS):
+            return
+        self.snapshot_at = now
+        tmp_path = self.summary_path.with_name(self.summary_path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(dumps({
+                "version": VERSION,
+                "fingerprint": self.fingerprint.hex(),
+                "offset": self.offset,
+                "executions": summary.executions,
+                "state": summary.to_state(),
+            }))
+        os.replace(tmp_path, self.summary_path)
+
+    @contextmanager
+    def writing(self, summary):
+        """Snapshot `summary` and close the index when the run stops, however it stops."""
+        try:
+            yield self
+        finally:
+            if self.handle is not None:
+                self.snapshot(summary, force=True)
+                self.close()
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
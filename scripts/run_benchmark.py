@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for run_evaluations.
+Generates synthetic executions (or uses a given file), starts the fake judge server,
+runs the evaluator once per concurrency level in a fresh process, and records evals/sec,
+peak memory and request latency percentiles to a JSON file for comparing releases.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from fake_judge_server import start_server
+from generate_executions import generate
+
+
+SCHEMA_VERSION = 1
+
+
+def git_commit(base_dir: Path) -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=base_dir, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(config: Dict, queue) -> None:
+    """Child process: run one evaluation pass against the fake server and report metrics."""
+    from hedging import HedgePolicy
+    from judge_client import JudgeClient
+    from profiling import RunProfiler
+    from rate_limiter import RateLimiter, RetryPolicy
+    from run_evals import run_evaluations
+
+    profiler = RunProfiler(enabled=True)
+    judge_client = JudgeClient(
+        limiter=RateLimiter({}),
+        retry_policy=RetryPolicy(max_retries=config["max_retries"]),
+        profiler=profiler,
+        hedger=HedgePolicy(config["hedge_percentile"]) if config["hedge_percentile"] is not None else None,
+    )
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        summary = run_evaluations(
+            Path(config["evals_path"]),
+            Path(config["executions_path"]),
+            Path(config["output_path"]),
+            concurrency=config["concurrency"],
+            judge_client=judge_client,
+            longest_first=config["longest_first"],
+        )
+    wall = time.perf_counter() - started
+    judge_client.close()
+    evals = sum(stats["total"] for stats in summary.criteria.values())
+    profile = profiler.to_dict()
+    queue.put({
+        "concurrency": config["concurrency"],
+        "executions": summary.executions,
+        "evals": evals,
+        "failed_evals": sum(stats["total"] - stats["scored"] for stats in summary.criteria.values()),
+        "retries": summary.retries,
+        "wall_seconds": round(wall, 3),
+        "evals_per_second": round(evals / wall, 2) if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "request_latency_seconds": profile["request_latency_seconds"],
+        "stages": profile["stages"],
+        "schedule": profile.get("schedule"),
+        "hedging": profile.get("hedging"),
+    })
+
+
+def run_benchmark(args: argparse.Namespace, base_dir: Path) -> Dict:
+    server = start_server(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_ms=args.retry_after_ms,
+        seed=args.seed,
+        latency_per_1k_chars=args.latency_per_1k_chars,
+    )
+    # Children inherit these; load_dotenv() in run_evals does not override them.
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark-fake-key"
+
+    context = multiprocessing.get_context("spawn")
+    scenarios: List[Dict] = []
+    with tempfile.TemporaryDirectory(prefix="eval_benchmark_") as work_dir:
+        work_dir = Path(work_dir)
+        executions_path = Path(args.executions_path) if args.executions_path else work_dir / "executions.jsonl"
+        if not args.executions_path:
+            generate(executions_path, args.count, args.holdings, args.news, args.output_chars, args.seed)
+        for concurrency in args.concurrency:
+            server.reset_stats()
+            config = {
+                "evals_path": args.evals_path,
+                "executions_path": str(executions_path),
+                "output_path": str(work_dir / f"c{concurrency}_eval_results.jsonl"),
+                "concurrency": concurrency,
+                "max_retries": args.max_retries,
+                "longest_first": args.longest_first,
+                "hedge_percentile": args.hedge_percentile,
+            }
+            queue = context.Queue()
+            process = context.Process(target=run_scenario, args=(config, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            result["server"] = server.snapshot()
+            scenarios.append(result)
+            latency = [stats["p99"] for stats in result["request_latency_seconds"].values()]
+            print(
+                f"  concurrency={concurrency:<4} {result['evals_per_second']:>9.1f} evals/s  "
+                f"peak RSS {result['peak_rss_mb']:.0f} MB  "
+                f"p99 {max(latency, default=0):.3f}s  retries {result['retries']}"
+            )
+    server.shutdown()
+    server.server_close()
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "label": args.label,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "git_commit": git_commit(base_dir),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "evals_path": args.evals_path,
+            "executions": args.executions_path or {
+                "count": args.count,
+                "holdings": args.holdings,
+                "news": args.news,
+                "output_chars": args.output_chars,
+                "seed": args.seed,
+            },
+            "server": {
+                "latency": args.latency,
+                "error_rate": args.error_rate,
+                "rate_limit_rate": args.rate_limit_rate,
+                "retry_after_ms": args.retry_after_ms,
+                "latency_per_1k_chars": args.latency_per_1k_chars,
+            },
+            "max_retries": args.max_retries,
+            "longest_first": args.longest_first,
+            "hedge_percentile": args.hedge_percentile,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def main():
+    base_dir = Path(__file__).parent.parent
+    parser = argparse.ArgumentParser(description="Benchmark run_evaluations against a fake judge server.")
+    parser.add_argument("--evals-path", default=str(base_dir / "prompts" / "Evals.json"))
+    parser.add_argument("--executions-path", default=None, help="Use this executions file instead of generating one.")
+    parser.add_argument("--count", type=int, default=200, help="Synthetic executions to generate.")
+    parser.add_argument("--holdings", type=int, default=10, help="Holdings per synthetic input.")
+    parser.add_argument("--news", type=int, default=4, help="News items per synthetic input.")
+    parser.add_argument("--output-chars", type=int, default=1500, help="Synthetic briefing length.")
+    parser.add_argument(
+        "--concurrency",
+        default="1,8,32",
+        help="Comma-separated concurrency levels; one scenario each.",
+    )
+    parser.add_argument("--latency", default="lognormal:0.2,0.5", help="Fake judge latency distribution (see fake_judge_server.py).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake judge calls answered with HTTP 500.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of fake judge calls answered with HTTP 429.")
+    parser.add_argument("--retry-after-ms", type=int, default=200)
+    parser.add_argument("--latency-per-1k-chars", type=float, default=0.0, help="Extra fake judge latency per 1000 prompt characters.")
+    parser.add_argument("--longest-first", action="store_true", help="Dispatch the longest judge prompts first.")
+    parser.add_argument("--hedge-percentile", type=float, default=None, help="Hedge judge requests slower than this latency percentile.")
+    parser.add_argument("--max-retries", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="", help="Free-form label stored with the results (e.g. a release tag).")
+    parser.add_argument(
+        "--output-path",
+        default=None,
+        help="Results JSON (default: outputs/benchmarks/benchmark_<UTC timestamp>.json).",
+    )
+    args = parser.parse_args()
+    try:
+        args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    except ValueError:
+        parser.error("--concurrency must be a comma-separated list of integers")
+    if any(value < 1 for value in args.concurrency):
+        parser.error("--concurrency values must be at least 1")
+
+    output_path = Path(args.output_path) if args.output_path else (
+        base_dir / "outputs" / "benchmarks"
+        / f"benchmark_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    print(f"Benchmarking run_evaluations ({args.latency}, error rate {args.error_rate}, 429 rate {args.rate_limit_rate})")
+    report = run_benchmark(args, base_dir)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+    print(f"Results saved to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
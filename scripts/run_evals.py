@@ -5,19 +5,74 @@ Runs eval criteria from an Evals.json file against executions JSONL input/output
 """
 
 import argparse
+import asyncio
+import hashlib
 import json
 import os
+import socket
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import re
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from batch_mode import (
+    BatchClient,
+    OpenAIBatchClient,
+    batch_request,
+    STATE_FILENAME,
+    clear_state,
+    custom_id,
+    load_state,
+    read_batch_outputs,
+    submit_and_wait,
+    write_batch_inputs,
+)
+from checkpoint import CellCheckpoint, checkpoint_path, is_error_result
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from combined_judge import (
+    JSON_RESPONSE_FORMAT,
+    build_combined_messages,
+    combinable_groups,
+    parse_combined_response,
+)
+from duplicates import DuplicateIndex
+from eval_stats import RunningScores
+from eval_templates import CompiledEval, compile_evals
+from hedging import HedgePolicy
+from judge_cache import JudgeCache
+from judge_client import Deadline, JudgeCallError, JudgeClient, JudgeResponse
+from jsonl_codec import DecodeError, dump_line, iter_jsonl, loads
+from live_metrics import status_path_for
+from profiling import NULL_PROFILER, RunProfiler, profile_path_for
+from sampling import SequentialSampler, shuffled_order
+from scheduling import CallScheduler, prompt_chars
+from stratify import StratifiedSample, stratify
+from sharding import (
+    DEFAULT_LEASE_TTL,
+    LeaseLostError,
+    ShardLease,
+    in_shard,
+    iter_merged_results,
+    missing_shards,
+    parse_shard,
+    prepare_shard_dir,
+    shard_dir,
+    shard_member,
+    shard_name,
+    shard_output_path,
+    shard_size,
+)
+from rate_limiter import RateLimiter, RetryPolicy, load_rate_limits
+from results_index import ResultsIndex, discard_index, expected_criteria, is_complete
+from run_store import RunStore, default_store_path, run_id_for
+from usage import DEFAULT_PRICES, UsageTotals, extract_usage, load_prices, split_usage
+
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared judge client (sync + async OpenAI clients are created lazily)
+judge = JudgeClient()
 
 
 def load_evals(evals_path: str) -> List[Dict]:
@@ -26,21 +81,211 @@ def load_evals(evals_path: str) -> List[Dict]:
         return json.load(f)
 
 
-def load_executions(executions_path: str) -> List[Dict]:
-    """Load input-output pairs from merged JSONL file"""
-    executions = []
+def iter_executions(executions_path: str) -> Iterator[Tuple[int, Dict]]:
+    """Lazily yield (execution_id, execution) pairs; ids number the valid lines from 1."""
+    execution_id = 0
     with open(executions_path, 'r') as f:
         for line_num, line in enumerate(f, 1):
             line = line.strip()
             if not line:
                 continue
             try:
-                executions.append(json.loads(line))
-            except json.JSONDecodeError as e:
+                execution = loads(line)
+            except DecodeError as e:
                 print(f"Warning: Skipping line {line_num} due to JSON error: {e}")
                 print(f"  First 100 chars: {line[:100]}")
                 continue
-    return executions
+            execution_id += 1
+            yield execution_id, execution
+
+
+def load_executions(executions_path: str) -> List[Dict]:
+    """Load input-output pairs from merged JSONL file"""
+    return [execution for _, execution in iter_executions(executions_path)]
+
+
+def index_executions(executions_path: str) -> List[int]:
+    """Byte offset of every line iter_executions yields; execution i starts at offsets[i - 1]."""
+    offsets = []
+    offset = 0
+    with open(executions_path, 'rb') as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                loads(line)
+            except DecodeError:
+                continue
+            offsets.append(start)
+    return offsets
+
+
+def iter_executions_by_id(
+    executions_path: str,
+    offsets: List[int],
+    execution_ids: Iterable[int],
+) -> Iterator[Tuple[int, Dict]]:
+    """Yield (execution_id, execution) in the given id order, seeking to each line."""
+    with open(executions_path, 'rb') as f:
+        for execution_id in execution_ids:
+            f.seek(offsets[execution_id - 1])
+            yield execution_id, loads(f.readline())
+
+
+def count_executions(executions_path: str) -> int:
+    """Count non-blank lines without parsing them (used for progress reporting)."""
+    count = 0
+    with open(executions_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                count += 1
+    return count
+
+
+class RunningSummary:
+    """
+    Run aggregates updated one result at a time, so results need not be kept: scores
+    and pass flags go into per-criterion sums and histograms (RunningScores), calls
+    and token usage into running totals.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self.executions = 0
+        self.scores = RunningScores()
+        self.calls = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+        # Calls that failed because their (or their execution's) deadline passed.
+        self.timeouts = 0.0
+        self.prices = prices if prices is not None else DEFAULT_PRICES
+        self.usage_by_criterion: Dict[str, UsageTotals] = {}
+        self.usage_by_model: Dict[str, UsageTotals] = {}
+        self.usage_total = UsageTotals()
+        # Results reused from an earlier run (derived runs); they made no call here.
+        self.carried = 0
+        # Executions copied from an identical execution, and the judge calls that saved.
+        self.copied = 0
+        self.calls_saved = 0.0
+
+    # Bump when the fields saved by to_state change; older snapshots are then ignored.
+    STATE_VERSION = 1
+    STATE_FIELDS = ("executions", "calls", "retries", "wait_seconds", "timeouts", "carried", "copied", "calls_saved")
+
+    def to_state(self) -> Dict:
+        """The aggregates as plain JSON values, for a results-index snapshot."""
+        state = {field: getattr(self, field) for field in self.STATE_FIELDS}
+        state.update({
+            "version": self.STATE_VERSION,
+            "prices": self.prices,
+            "scores": self.scores.to_state(),
+            "usage_by_criterion": [[name, totals.to_state()] for name, totals in self.usage_by_criterion.items()],
+            "usage_by_model": [[name, totals.to_state()] for name, totals in self.usage_by_model.items()],
+            "usage_total": self.usage_total.to_state(),
+        })
+        return state
+
+    @classmethod
+    def from_state(
+        cls, state: Dict, prices: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Optional["RunningSummary"]:
+        """
+        A summary rebuilt from to_state, or None when the state is from another version,
+        is malformed, or was priced differently (the caller then re-reads the results).
+        """
+        summary = cls(prices)
+        if not isinstance(state, dict) or state.get("version") != cls.STATE_VERSION:
+            return None
+        if state.get("prices") != summary.prices:
+            return None
+        try:
+            for field in cls.STATE_FIELDS:
+                setattr(summary, field, state[field])
+            summary.scores = RunningScores.from_state(state["scores"])
+            summary.usage_by_criterion = {
+                name: UsageTotals.from_state(totals) for name, totals in state["usage_by_criterion"]
+            }
+            summary.usage_by_model = {
+                name: UsageTotals.from_state(totals) for name, totals in state["usage_by_model"]
+            }
+            summary.usage_total = UsageTotals.from_state(state["usage_total"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return summary
+
+    @property
+    def criteria(self) -> Dict[str, Dict[str, float]]:
+        return self.scores.sums
+
+    @property
+    def weighted(self) -> bool:
+        return self.scores.weighted
+
+    @staticmethod
+    def calls_of(result: Dict) -> Iterator[Dict]:
+        """Eval results, each followed by the share of an unusable combined call it stands in for."""
+        for eval_result in result.get("evals", []):
+            if not eval_result:
+                continue
+            yield eval_result
+            share = eval_result.get("combined_share")
+            if share is not None and not eval_result.get("carried_from"):
+                yield {**share, "eval_name": eval_result.get("eval_name")}
+
+    def add(self, result: Dict) -> None:
+        self.executions += 1
+        self.scores.add(result)
+        copied = result.get("copied_from") is not None
+        self.copied += copied
+        for eval_result in self.calls_of(result):
+            call = eval_result.get("call", {})
+            # Results of one combined call share its call, retries and wait.
+            share = 1 / call.get("combined", 1)
+            if copied:
+                # The call is counted on the execution this result was copied from.
+                if not eval_result.get("carried_from") and not call.get("cached"):
+                    self.calls_saved += share
+                continue
+            if eval_result.get("carried_from"):
+                self.carried += 1
+                continue
+            self.calls += share
+            self.retries += max(call.get("attempts", 1) - 1, 0) * share
+            self.wait_seconds += call.get("wait_seconds", 0.0) * share
+            if call.get("timed_out"):
+                self.timeouts += share
+            model = call.get("model") or "unknown"
+            for totals in (
+                self.usage_by_criterion.setdefault(eval_result.get("eval_name"), UsageTotals()),
+                self.usage_by_model.setdefault(model, UsageTotals()),
+                self.usage_total,
+            ):
+                totals.add(eval_result, self.prices)
+
+    def avg_score(self, eval_name: str) -> float:
+        return self.scores.avg_score(eval_name) if eval_name in self.scores.sums else 0
+
+    def pass_rate(self, eval_name: str) -> float:
+        return self.scores.pass_rate(eval_name) if eval_name in self.scores.sums else 0
+
+    def weighted_avg_score(self, eval_name: str) -> float:
+        return self.scores.weighted_avg_score(eval_name) if eval_name in self.scores.sums else 0
+
+    def weighted_pass_rate(self, eval_name: str) -> float:
+        return self.scores.weighted_pass_rate(eval_name) if eval_name in self.scores.sums else 0
+
+    def to_dict(self) -> Dict[str, Dict]:
+        summary = self.scores.to_dict()
+        for eval_name, stats in summary.items():
+            stats["usage"] = self.usage_by_criterion.get(eval_name, UsageTotals()).to_dict()
+        return summary
+
+    def usage_dict(self) -> Dict[str, Dict]:
+        return {
+            "by_model": {model: totals.to_dict() for model, totals in self.usage_by_model.items()},
+            "total": self.usage_total.to_dict(),
+        }
 
 
 def replace_template_variables(template: str, item_input: str, item_output: str) -> str:
@@ -52,89 +297,699 @@ def replace_template_variables(template: str, item_input: str, item_output: str)
     return template
 
 
-def run_eval(eval_criteria: Dict, execution: Dict) -> Dict:
-    """Run a single evaluation criterion against one execution"""
-    
-    # Extract input and output
-    item_input = execution.get("llm-input", "")
-    item_output = execution.get("llm-output", "")
-    
-    # Build messages for the API call
-    messages = []
-    for msg in eval_criteria["input"]:
-        content = replace_template_variables(msg["content"], item_input, item_output)
-        messages.append({
-            "role": msg["role"] if msg["role"] != "developer" else "system",
-            "content": content
-        })
-    
-    # Make API call
-    try:
-        response = client.chat.completions.create(
-            model=eval_criteria["model"],
-            messages=messages,
-            temperature=0
-        )
-        
-        result_text = response.choices[0].message.content.strip()
-        
-        # Parse result based on eval type
-        # For score_model, try to extract integer or JSON
-        if eval_criteria["type"] == "score_model":
-            # Check if response is JSON (for evals that request JSON output)
-            try:
-                result_json = json.loads(result_text)
-                if isinstance(result_json, dict) and "result" in result_json:
-                    score = result_json["result"]
-                    explanation = result_json.get("explanation", "")
-                else:
-                    score = result_json
-                    explanation = ""
-            except json.JSONDecodeError:
-                # Try to extract integer from text
-                match = re.search(r'\b(\d+)\b', result_text)
-                if match:
-                    score = int(match.group(1))
-                    explanation = result_text
-                else:
-                    score = None
-                    explanation = result_text
-            
-            return {
-                "eval_name": eval_criteria["name"],
-                "score": score,
-                "explanation": explanation,
-                "pass_threshold": eval_criteria["pass_threshold"],
-                "passed": score >= eval_criteria["pass_threshold"] if score is not None else None,
-                "range": eval_criteria["range"]
-            }
-    
-    except Exception as e:
+def build_messages(eval_criteria: Dict, execution: Dict) -> List[Dict]:
+    """Render the criterion's message templates for one execution."""
+    # Criteria from compile_evals carry a precompiled template; plain dicts compile on the fly.
+    template = eval_criteria.get("_template") or CompiledEval(eval_criteria)
+    return template.render(execution)
+
+
+def compact_execution(eval_criteria: Dict, execution: Dict, count: bool = True) -> Tuple[Dict, Optional[Dict]]:
+    """The execution as this criterion's judge sees it, and what compaction dropped (None if nothing)."""
+    spec = eval_criteria.get("_compaction")
+    item_input = execution.get("llm-input")
+    if spec is None or not isinstance(item_input, str):
+        return execution, None
+    item_input, compaction = spec.compact(item_input, count)
+    if compaction is None:
+        return execution, None
+    return {**execution, "llm-input": item_input}, compaction
+
+
+def with_compaction(eval_result: Optional[Dict], compaction: Optional[Dict]) -> Optional[Dict]:
+    if eval_result is not None and compaction is not None:
+        eval_result["compaction"] = compaction
+    return eval_result
+
+
+def parse_eval_response(eval_criteria: Dict, result_text: str) -> Dict:
+    """Turn a judge response into an eval result entry."""
+    # Parse result based on eval type
+    # For score_model, try to extract integer or JSON
+    if eval_criteria["type"] == "score_model":
+        # Check if response is JSON (for evals that request JSON output)
+        try:
+            result_json = json.loads(result_text)
+            if isinstance(result_json, dict) and "result" in result_json:
+                score = result_json["result"]
+                explanation = result_json.get("explanation", "")
+            else:
+                score = result_json
+                explanation = ""
+        except json.JSONDecodeError:
+            # Try to extract integer from text
+            match = re.search(r'\b(\d+)\b', result_text)
+            if match:
+                score = int(match.group(1))
+                explanation = result_text
+            else:
+                score = None
+                explanation = result_text
+
         return {
             "eval_name": eval_criteria["name"],
-            "score": None,
-            "explanation": f"Error: {str(e)}",
+            "score": score,
+            "explanation": explanation,
             "pass_threshold": eval_criteria["pass_threshold"],
-            "passed": None,
+            "passed": score >= eval_criteria["pass_threshold"] if score is not None else None,
             "range": eval_criteria["range"]
         }
 
 
-def load_existing_results(output_path: Path) -> List[Dict]:
-    results = []
+def error_result(eval_criteria: Dict, error: Exception) -> Dict:
+    result = {
+        "eval_name": eval_criteria["name"],
+        "score": None,
+        "explanation": f"Error: {str(error)}",
+        "pass_threshold": eval_criteria["pass_threshold"],
+        "passed": None,
+        "range": eval_criteria["range"]
+    }
+    if isinstance(error, JudgeCallError):
+        result["call"] = error.call_info()
+    return result
+
+
+def judged_result(
+    eval_criteria: Dict,
+    response: JudgeResponse,
+    profiler: Optional[RunProfiler] = None,
+) -> Dict:
+    with (profiler or NULL_PROFILER).stage("parse"):
+        result = parse_eval_response(eval_criteria, response.text)
+    if result is None:
+        return result
+    result["call"] = response.call_info()
+    if response.usage is not None:
+        result["usage"] = response.usage
+    return result
+
+
+def run_eval(
+    eval_criteria: Dict,
+    execution: Dict,
+    judge_client: Optional[JudgeClient] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """
+    Run a single evaluation criterion against one execution. A failed call becomes an
+    error result (retried on resume); only a circuit breaker giving up stops the run.
+    """
+    judge_client = judge_client or judge
+    with judge_client.profiler.stage("render"):
+        execution, compaction = compact_execution(eval_criteria, execution)
+        messages = build_messages(eval_criteria, execution)
+
+    # Make API call
+    try:
+        response = judge_client.complete(eval_criteria["model"], messages, deadline=deadline)
+        return with_compaction(judged_result(eval_criteria, response, judge_client.profiler), compaction)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        return with_compaction(error_result(eval_criteria, e), compaction)
+
+
+async def run_eval_async(
+    eval_criteria: Dict,
+    execution: Dict,
+    scheduler: CallScheduler,
+    judge_client: Optional[JudgeClient] = None,
+    deadline: Optional[Deadline] = None,
+) -> Dict:
+    """Async variant of run_eval; the scheduler bounds and orders in-flight judge calls."""
+    judge_client = judge_client or judge
+    with judge_client.profiler.stage("render"):
+        execution, compaction = compact_execution(eval_criteria, execution)
+        messages = build_messages(eval_criteria, execution)
+
+    try:
+        async with scheduler.slot(prompt_chars(messages)):
+            response = await judge_client.complete_async(
+                eval_criteria["model"], messages, deadline=deadline, scheduler=scheduler
+            )
+        return with_compaction(judged_result(eval_criteria, response, judge_client.profiler), compaction)
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        return with_compaction(error_result(eval_criteria, e), compaction)
+
+
+def combined_results(
+    group: List[Dict],
+    response: JudgeResponse,
+    profiler: Optional[RunProfiler] = None,
+    compaction: Optional[Dict] = None,
+) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Valid per-criterion results of a combined call, and the call's share for each
+    criterion whose entry was missing or invalid (to go on the result judged in its
+    place). Every criterion in the group takes a share, so the call is counted once
+    however many entries were usable.
+    """
+    with (profiler or NULL_PROFILER).stage("parse"):
+        parsed = parse_combined_response(group, response.text)
+    call = response.call_info()
+    call["combined"] = len(group)
+    results: Dict[str, Dict] = {}
+    unusable: Dict[str, Dict] = {}
+    for eval_criteria, usage in zip(group, split_usage(response.usage, len(group))):
+        eval_name = eval_criteria["name"]
+        eval_result = parsed.get(eval_name)
+        if eval_result is None:
+            eval_result = unusable[eval_name] = {"call": {**call, "error": "InvalidCombinedEntry"}}
+        else:
+            results[eval_name] = with_compaction(eval_result, compaction)
+            eval_result["call"] = dict(call)
+        if usage is not None:
+            eval_result["usage"] = usage
+    return results, unusable
+
+
+def failed_combined(group: List[Dict], error: Exception, compaction: Optional[Dict]) -> Dict[str, Dict]:
+    """Error results for every criterion of a combined call that failed, sharing the call."""
+    results = {}
+    for eval_criteria in group:
+        eval_result = with_compaction(error_result(eval_criteria, error), compaction)
+        if "call" in eval_result:
+            eval_result["call"]["combined"] = len(group)
+        results[eval_criteria["name"]] = eval_result
+    return results
+
+
+def with_share(eval_result: Dict, share: Optional[Dict]) -> Dict:
+    if share is not None:
+        eval_result["combined_share"] = share
+    return eval_result
+
+
+def compact_group(group: List[Dict], execution: Dict) -> Tuple[Dict, Optional[Dict]]:
+    """Compact once for a combined call (the group shares one spec); counted for each criterion."""
+    compacted, compaction = compact_execution(group[0], execution)
+    item_input = execution.get("llm-input")
+    for eval_criteria in group[1:]:
+        spec = eval_criteria.get("_compaction")
+        if spec is not None and isinstance(item_input, str):
+            spec.tally(item_input, compaction)
+    return compacted, compaction
+
+
+def judge_combined(
+    group: List[Dict],
+    execution: Dict,
+    judge_client: JudgeClient,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Score a same-model group in one call: (results, shares of unusable entries), as in
+    combined_results. A failed call becomes error results for the whole group.
+    """
+    with judge_client.profiler.stage("render"):
+        execution, compaction = compact_group(group, execution)
+        messages = build_combined_messages(group, execution)
+    try:
+        response = judge_client.complete(
+            group[0]["model"], messages, response_format=JSON_RESPONSE_FORMAT, deadline=deadline
+        )
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        return failed_combined(group, e, compaction), {}
+    return combined_results(group, response, judge_client.profiler, compaction)
+
+
+async def judge_combined_async(
+    group: List[Dict],
+    execution: Dict,
+    scheduler: CallScheduler,
+    judge_client: JudgeClient,
+    deadline: Optional[Deadline] = None,
+) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    with judge_client.profiler.stage("render"):
+        execution, compaction = compact_group(group, execution)
+        messages = build_combined_messages(group, execution)
+    try:
+        async with scheduler.slot(prompt_chars(messages)):
+            response = await judge_client.complete_async(
+                group[0]["model"],
+                messages,
+                response_format=JSON_RESPONSE_FORMAT,
+                deadline=deadline,
+                scheduler=scheduler,
+            )
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        return failed_combined(group, e, compaction), {}
+    return combined_results(group, response, judge_client.profiler, compaction)
+
+
+def new_result(execution_id: int, execution: Dict) -> Dict:
+    return {
+        "execution_id": execution_id,
+        "input": execution.get("llm-input"),
+        "output": execution.get("llm-output"),
+        "evals": []
+    }
+
+
+def reuse_cell(eval_criteria: Dict, done: Dict[str, Dict]) -> Optional[Dict]:
+    """
+    Return a previously finished result for this criterion, with pass/fail
+    recomputed against the current threshold, or None if it must be judged.
+    """
+    eval_result = done.get(eval_criteria["name"])
+    if is_error_result(eval_result):
+        return None
+    eval_result = dict(eval_result)
+    score = eval_result.get("score")
+    eval_result["pass_threshold"] = eval_criteria["pass_threshold"]
+    eval_result["range"] = eval_criteria["range"]
+    eval_result["passed"] = score >= eval_criteria["pass_threshold"] if score is not None else None
+    return eval_result
+
+
+def evaluate_execution(
+    execution_id: int,
+    execution: Dict,
+    evals: List[Dict],
+    judge_client: JudgeClient,
+    done: Dict[str, Dict],
+    checkpoint: CellCheckpoint,
+    combine: bool = False,
+) -> Dict:
+    deadline = judge_client.execution_deadline()
+    judged: Dict[str, Dict] = {}
+    shares: Dict[str, Dict] = {}
+    if combine:
+        # One call per model for the criteria still needed; unusable entries are judged alone below.
+        pending = [c for c in evals if reuse_cell(c, done) is None]
+        for group in combinable_groups(pending):
+            results, unusable = judge_combined(group, execution, judge_client, deadline)
+            for eval_result in results.values():
+                checkpoint.record(execution_id, eval_result)
+            judged.update(results)
+            shares.update(unusable)
+    result = new_result(execution_id, execution)
+    for eval_criteria in evals:
+        eval_name = eval_criteria["name"]
+        eval_result = judged.get(eval_name) or reuse_cell(eval_criteria, done)
+        if eval_result is None:
+            eval_result = with_share(
+                run_eval(eval_criteria, execution, judge_client, deadline), shares.get(eval_name)
+            )
+            checkpoint.record(execution_id, eval_result)
+        result["evals"].append(eval_result)
+    return result
+
+
+async def evaluate_execution_async(
+    execution_id: int,
+    execution: Dict,
+    evals: List[Dict],
+    scheduler: CallScheduler,
+    judge_client: JudgeClient,
+    done: Dict[str, Dict],
+    checkpoint: CellCheckpoint,
+    combine: bool = False,
+) -> Dict:
+    deadline = judge_client.execution_deadline()
+    judged: Dict[str, Dict] = {}
+    shares: Dict[str, Dict] = {}
+    if combine:
+        pending = [c for c in evals if reuse_cell(c, done) is None]
+        for results, unusable in await asyncio.gather(*(
+            judge_combined_async(group, execution, scheduler, judge_client, deadline)
+            for group in combinable_groups(pending)
+        )):
+            for eval_result in results.values():
+                checkpoint.record(execution_id, eval_result)
+            judged.update(results)
+            shares.update(unusable)
+
+    async def evaluate(eval_criteria: Dict) -> Dict:
+        eval_name = eval_criteria["name"]
+        eval_result = judged.get(eval_name) or reuse_cell(eval_criteria, done)
+        if eval_result is None:
+            eval_result = with_share(
+                await run_eval_async(eval_criteria, execution, scheduler, judge_client, deadline),
+                shares.get(eval_name),
+            )
+            checkpoint.record(execution_id, eval_result)
+        return eval_result
+
+    result = new_result(execution_id, execution)
+    result["evals"] = list(await asyncio.gather(*(evaluate(c) for c in evals)))
+    return result
+
+
+async def run_concurrent(
+    pending: Iterable[Tuple[int, Dict]],
+    evals: List[Dict],
+    concurrency: int,
+    on_result,
+    judge_client: JudgeClient,
+    cells: Dict[int, Dict[str, Dict]],
+    checkpoint: CellCheckpoint,
+    combine: bool = False,
+    longest_first: bool = False,
+    schedule_window: Optional[int] = None,
+) -> None:
+    """
+    Evaluate executions with up to `concurrency` judge calls in flight.
+    Results are handed to `on_result` in execution order; the pending window
+    (`schedule_window` executions) is capped so memory stays bounded and the output
+    file never has gaps. With `longest_first`, free slots go to the calls with the
+    longest rendered prompts among the window, so a wider window gets closer to a
+    global longest-first order.
+    """
+    scheduler = CallScheduler(concurrency, longest_first, record=judge_client.profiler.enabled)
+    window: deque = deque()
+    max_window = schedule_window or concurrency * (16 if longest_first else 2)
+    try:
+        for execution_id, execution in pending:
+            window.append(asyncio.create_task(evaluate_execution_async(
+                execution_id,
+                execution,
+                evals,
+                scheduler,
+                judge_client,
+                cells.pop(execution_id, {}),
+                checkpoint,
+                combine,
+            )))
+            if len(window) >= max_window:
+                on_result(await window.popleft())
+        while window:
+            on_result(await window.popleft())
+        schedule = scheduler.report()
+        if schedule is not None:
+            schedule["window"] = max_window
+            judge_client.profiler.extra["schedule"] = schedule
+    finally:
+        for task in window:
+            task.cancel()
+        # Collect the cancelled (or already failed) executions so their errors are not reported again.
+        await asyncio.gather(*window, return_exceptions=True)
+        await judge_client.aclose()
+
+
+def run_batch(
+    iter_pending: Callable[[], Iterable[Tuple[int, Dict]]],
+    evals: List[Dict],
+    on_result,
+    judge_client: JudgeClient,
+    batch_client: BatchClient,
+    work_dir: Path,
+    cells: Dict[int, Dict[str, Dict]],
+    checkpoint: CellCheckpoint,
+    poll_interval: float = 60.0,
+    resume: bool = False,
+) -> None:
+    """
+    Evaluate executions through the Batch API: render every (execution, criterion)
+    request into batch-input files, submit and poll, then join the outputs back into
+    per-execution results (in execution order) with the same parsing as run_eval.
+    Cached responses and checkpointed cells are answered locally and never sent. `iter_pending` is called
+    once to render and once to join, so executions are streamed rather than held.
+    Only a resumed run whose rendered requests match the recorded fingerprint picks up
+    earlier batches; the batch files are removed once the outputs are joined.
+    """
+    cached: Dict[str, str] = {}
+    cache_keys: Dict[str, str] = {}
+    fingerprint = ""
+
+    def render():
+        nonlocal fingerprint
+        hasher = hashlib.sha256()
+        for execution_id, execution in iter_pending():
+            for eval_criteria in evals:
+                if reuse_cell(eval_criteria, cells.get(execution_id, {})) is not None:
+                    continue
+                request_id = custom_id(execution_id, eval_criteria)
+                with judge_client.profiler.stage("render"):
+                    compacted, _ = compact_execution(eval_criteria, execution)
+                    messages = build_messages(eval_criteria, compacted)
+                hasher.update(json.dumps([request_id, eval_criteria["model"], messages]).encode("utf-8"))
+                key, hit = judge_client.cached_response(eval_criteria["model"], messages)
+                if hit is not None:
+                    cached[request_id] = hit.text
+                    continue
+                if key is not None:
+                    cache_keys[request_id] = key
+                yield batch_request(request_id, eval_criteria["model"], messages)
+        fingerprint = hasher.hexdigest()
+
+    input_paths = None
+    if resume and (work_dir / STATE_FILENAME).exists():
+        # Already submitted: keep polling the recorded batches, only rebuild the cache hits.
+        for _ in render():
+            pass
+        if load_state(work_dir, fingerprint) is not None:
+            input_paths = []
+            print(f"Resuming batch job in {work_dir}")
+        else:
+            print(f"Batch job in {work_dir} was for other requests; discarding it")
+    if input_paths is None:
+        clear_state(work_dir)
+        input_paths = write_batch_inputs(render(), work_dir)
+        print(f"Wrote {len(input_paths)} batch input file(s) to {work_dir} ({len(cached)} cached)")
+
+    with judge_client.profiler.stage("request"):
+        output_paths = submit_and_wait(batch_client, input_paths, work_dir, fingerprint, poll_interval)
+    with judge_client.profiler.stage("load"):
+        outputs = read_batch_outputs(output_paths)
+
+    for execution_id, execution in iter_pending():
+        result = new_result(execution_id, execution)
+        done = cells.pop(execution_id, {})
+        for eval_criteria in evals:
+            request_id = custom_id(execution_id, eval_criteria)
+            eval_result = reuse_cell(eval_criteria, done)
+            if eval_result is not None:
+                result["evals"].append(eval_result)
+                continue
+            model = eval_criteria["model"]
+            if request_id in cached:
+                response = JudgeResponse(text=cached[request_id], model=model, attempts=0, cached=True)
+                try:
+                    eval_result = judged_result(eval_criteria, response, judge_client.profiler)
+                except Exception as e:
+                    eval_result = error_result(eval_criteria, e)
+            elif request_id in outputs and outputs[request_id][0] is not None:
+                text, _, usage = outputs[request_id]
+                response = JudgeResponse(text=text, model=model, usage=extract_usage(usage))
+                try:
+                    eval_result = judged_result(eval_criteria, response, judge_client.profiler)
+                except Exception as e:
+                    # As in run_eval: an unparseable answer is an error result, retried on resume.
+                    eval_result = error_result(eval_criteria, e)
+                else:
+                    # Cached only once it parses, so a resume does not serve it again.
+                    judge_client.store(cache_keys.get(request_id), model, text)
+                    if eval_result is not None:
+                        eval_result["call"]["batch"] = True
+            else:
+                error = outputs.get(request_id, (None, "No batch result returned", None))[1]
+                eval_result = error_result(eval_criteria, Exception(error))
+            with_compaction(eval_result, compact_execution(eval_criteria, execution, count=False)[1])
+            checkpoint.record(execution_id, eval_result)
+            result["evals"].append(eval_result)
+        on_result(result)
+    clear_state(work_dir)
+
+
+def run_sampled(
+    pending: Iterable[Tuple[int, Dict]],
+    evals: List[Dict],
+    sampler: SequentialSampler,
+    concurrency: int,
+    on_result,
+    judge_client: JudgeClient,
+    checkpoint: CellCheckpoint,
+    combine: bool = False,
+) -> None:
+    """
+    Evaluate executions (already in random order) with only the criteria the sampler
+    still needs, until every criterion's interval is narrow enough. Results are
+    handed to `on_result` as they finish, so the output is in sample order.
+    """
+    def accept(result: Dict) -> None:
+        for eval_result in result["evals"]:
+            sampler.record(eval_result)
+        on_result(result)
+
+    if concurrency <= 1:
+        for execution_id, execution in pending:
+            active = sampler.active(evals)
+            if not active:
+                break
+            accept(evaluate_execution(
+                execution_id, execution, active, judge_client, {}, checkpoint, combine
+            ))
+        return
+    asyncio.run(run_sampled_async(
+        iter(pending), evals, sampler, concurrency, accept, judge_client, checkpoint, combine
+    ))
+
+
+async def run_sampled_async(
+    pending: Iterator[Tuple[int, Dict]],
+    evals: List[Dict],
+    sampler: SequentialSampler,
+    concurrency: int,
+    accept,
+    judge_client: JudgeClient,
+    checkpoint: CellCheckpoint,
+    combine: bool = False,
+) -> None:
+    scheduler = CallScheduler(concurrency)
+    tasks = set()
+    try:
+        while True:
+            # Keep about `concurrency` judge calls queued for the criteria still open.
+            active = sampler.active(evals)
+            while active and len(tasks) * len(active) < concurrency:
+                item = next(pending, None)
+                if item is None:
+                    break
+                execution_id, execution = item
+                tasks.add(asyncio.create_task(evaluate_execution_async(
+                    execution_id, execution, active, scheduler, judge_client, {}, checkpoint, combine
+                )))
+            if not tasks:
+                break
+            finished, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                accept(task.result())
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await judge_client.aclose()
+
+
+def iter_existing_results(output_path: Path) -> Iterator[Dict]:
     if not output_path.exists():
-        return results
-    with output_path.open("r") as handle:
-        for line_num, line in enumerate(handle, 1):
-            line = line.strip()
-            if not line:
+        return
+    yield from iter_jsonl(output_path, "existing result line")
+
+
+def scan_existing_results(
+    output_path: Path,
+    evals: List[Dict],
+    cells: Dict[int, Dict[str, Dict]],
+    checkpoint: CellCheckpoint,
+    prices: Optional[Dict[str, Dict[str, float]]] = None,
+    member: Callable[[int], Optional[int]] = lambda position: position + 1,
+    records: Optional[List[Tuple[int, int]]] = None,
+) -> Tuple[int, RunningSummary]:
+    """
+    Fold every finished cell in an existing results file into `cells` (and the
+    checkpoint), and find the leading lines that already match a fresh run: the
+    first k ids the run evaluates, in order (`member(k)` is the k-th, 0-based;
+    1..k for a plain run), each with exactly the current criteria and no failed calls.
+
+    Returns (end byte offset of that prefix, its summary); the lines after it are
+    judged again, reusing their finished cells. (execution_id, end offset) of each
+    prefix line is appended to `records`.
+    """
+    expected = expected_criteria(evals)
+    prefix = RunningSummary(prices)
+    prefix_end = 0
+    extending = True
+    offset = 0
+    with output_path.open("rb") as handle:
+        for line_num, raw in enumerate(handle, 1):
+            offset += len(raw)
+            terminated = raw.endswith(b"\n")
+            if not raw.strip():
                 continue
             try:
-                results.append(json.loads(line))
-            except json.JSONDecodeError as e:
+                result = loads(raw)
+            except DecodeError as e:
                 print(f"Warning: Skipping existing result line {line_num} due to JSON error: {e}")
+                extending = False
                 continue
-    return results
+            execution_id = result.get("execution_id")
+            evals_done = [e for e in result.get("evals", []) if e]
+            done = cells.setdefault(execution_id, {})
+            for eval_result in evals_done:
+                if eval_result.get("eval_name") not in done and not is_error_result(eval_result):
+                    done[eval_result.get("eval_name")] = eval_result
+                    checkpoint.record(execution_id, eval_result)
+            complete = execution_id == member(prefix.executions) and is_complete(result, expected)
+            if extending and complete and terminated:
+                prefix.add(result)
+                prefix_end = offset
+                if records is not None:
+                    records.append((execution_id, offset))
+            else:
+                extending = False
+    return prefix_end, prefix
+
+
+def resume_from_index(
+    output_path: Path,
+    index: ResultsIndex,
+    prices: Optional[Dict[str, Dict[str, float]]] = None,
+    member: Callable[[int], Optional[int]] = lambda position: position + 1,
+) -> Optional[Tuple[int, RunningSummary]]:
+    """
+    The finished prefix of a results file (as in scan_existing_results) read from its
+    index: only lines after the last summary snapshot, and any the index missed, are
+    parsed. Returns (prefix end offset, prefix summary) with the index reopened for
+    appending, or None when the file needs a full scan.
+    """
+    snapshot = index.load_snapshot()
+    found = index.prefix(member, snapshot[0] if snapshot else None)
+    if found is None:
+        return None
+    kept, indexed_end, marked = found
+    if indexed_end > output_path.stat().st_size:
+        return None
+    prefix = RunningSummary(prices)
+    start = 0
+    if snapshot is not None and marked == snapshot[1]:
+        restored = RunningSummary.from_state(snapshot[2], prices)
+        if restored is not None:
+            # Otherwise (another state version, other prices) the whole prefix is re-read.
+            start = snapshot[0]
+            prefix = restored
+    prefix_end = indexed_end
+    tail: List[Tuple[int, int]] = []
+    with output_path.open("rb") as handle:
+        if indexed_end:
+            handle.seek(indexed_end - 1)
+            if handle.read(1) != b"\n":
+                return None
+        handle.seek(start)
+        offset = start
+        for raw in handle:
+            offset += len(raw)
+            if offset > indexed_end and not raw.endswith(b"\n"):
+                break
+            if not raw.strip():
+                continue
+            try:
+                result = loads(raw)
+            except DecodeError:
+                if offset > indexed_end:
+                    break
+                return None
+            if offset > indexed_end:
+                # Not indexed as complete: extends the prefix only if it is the next finished line.
+                execution_id = result.get("execution_id")
+                if execution_id != member(prefix.executions) or not is_complete(result, index.expected):
+                    break
+                tail.append((execution_id, offset))
+                prefix_end = offset
+            prefix.add(result)
+    if prefix.executions != kept + len(tail):
+        return None
+    index.reopen(kept, indexed_end)
+    index.extend(tail)
+    return prefix_end, prefix
 
 
 def run_evaluations(
@@ -142,105 +997,575 @@ def run_evaluations(
     executions_path: Path,
     output_path: Path,
     resume: bool = False,
-) -> List[Dict]:
-    """Run all evaluation criteria against executions and write results."""
+    concurrency: int = 1,
+    judge_client: Optional[JudgeClient] = None,
+    mode: str = "live",
+    batch_client: Optional[BatchClient] = None,
+    batch_dir: Optional[Path] = None,
+    poll_interval: float = 60.0,
+    dedupe_payload: bool = False,
+    prices: Optional[Dict[str, Dict[str, float]]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    sampler: Optional[SequentialSampler] = None,
+    strata: Optional[StratifiedSample] = None,
+    combine: bool = False,
+    carried: Optional[Dict[int, Dict[str, Dict]]] = None,
+    dedupe_executions: bool = False,
+    store: Optional[RunStore] = None,
+    run_id: Optional[str] = None,
+    input_token_budget: Optional[int] = None,
+    longest_first: bool = False,
+    schedule_window: Optional[int] = None,
+    metrics_port: Optional[int] = None,
+    fence: Optional[Callable[[], None]] = None,
+) -> RunningSummary:
+    """
+    Run all evaluation criteria against executions and write results.
+    Executions are streamed from disk and each result is written then dropped;
+    the returned RunningSummary holds the aggregates. With `shard=(i, N)` only
+    execution ids i, i+N, ... are evaluated. With a `sampler`, executions are
+    judged in random order until each criterion's pass-rate interval is narrow enough.
+    With `strata`, only the drawn executions are evaluated and each result records
+    its `sampling_weight`. With `combine`, criteria sharing a model are scored in one
+    call per execution, falling back to per-criterion calls for unusable entries.
+    `carried` holds finished results from an earlier run ({execution_id: {eval_name:
+    result}}), reused like resumed cells with `passed` recomputed for the current threshold.
+    With `dedupe_executions`, executions with the same llm-input/llm-output as an
+    earlier one in the run are not judged; the earlier result is copied (`copied_from`).
+    With a `store`, every result is also written to the SQLite run store under `run_id`
+    (default: derived from the output path). `input_token_budget` caps the estimated
+    tokens of each llm-input sent to a judge, for criteria without their own
+    `input_compaction.max_tokens`; what compaction drops is recorded on each result.
+    With `longest_first` (concurrent live runs), the calls with the longest rendered
+    prompts among the next `schedule_window` executions are dispatched first.
+    Live progress is written to <RUN_ID>_status.json, and served in Prometheus
+    format on `metrics_port` when given. `fence` is called before every result is
+    written and raises to stop a worker that no longer owns its shard.
+    """
+    if sampler is not None and (resume or shard or mode != "live"):
+        raise ValueError("Sampling runs cannot be resumed, sharded or batched")
+    if strata is not None and (shard or sampler is not None):
+        raise ValueError("Stratified runs cannot be sharded or sequentially sampled")
+    if carried and sampler is not None:
+        raise ValueError("Sampling runs cannot carry over results from an earlier run")
+    if combine and mode != "live":
+        raise ValueError("Combined judging is only supported in live mode")
+    judge_client = judge_client or judge
+    profiler = judge_client.profiler
+    shard = shard or (1, 1)
     
     # Load data
     print("Loading evaluation criteria...")
-    evals = load_evals(evals_path)
+    with profiler.stage("load"):
+        evals = compile_evals(load_evals(evals_path), dedupe_payload, input_token_budget)
     print(f"Loaded {len(evals)} evaluation criteria")
     
-    print("\nLoading executions...")
-    executions = load_executions(executions_path)
-    print(f"Loaded {len(executions)} executions")
+    print("\nCounting executions...")
+    duplicates = None
+    with profiler.stage("load"):
+        if sampler is not None:
+            offsets = index_executions(executions_path)
+            total_executions = len(offsets)
+        elif dedupe_executions:
+            duplicates = DuplicateIndex.scan(iter_executions(executions_path))
+            total_executions = duplicates.total
+        else:
+            total_executions = count_executions(executions_path)
+    print(f"Found {total_executions} executions (streamed from disk)")
+    if shard != (1, 1):
+        total_executions = shard_size(total_executions, *shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {total_executions} executions")
+
+    if strata is not None:
+        weights = strata.weights
+        selected = sorted(weights)
+        total_executions = len(selected)
+        print(f"Stratified sample: {total_executions} executions from {len(strata.population)} strata")
+
+        def member(position: int) -> Optional[int]:
+            return selected[position] if position < len(selected) else None
+    else:
+        def member(position: int) -> Optional[int]:
+            return shard_member(position, *shard)
     
     print("\nRunning evaluations...")
     print("=" * 80)
     
-    # Run evaluations with incremental saving
-    results: List[Dict[str, Any]] = []
+    # Run evaluations with incremental saving. Finished (execution, criterion) cells are
+    # checkpointed as they complete, so a resumed run only issues the missing calls.
+    summary = RunningSummary(prices)
     completed_ids = set()
-    if resume and output_path.exists():
-        results = load_existing_results(output_path)
-        completed_ids = {
-            result.get("execution_id")
-            for result in results
-            if result.get("execution_id") is not None
-        }
+    cells: Dict[int, Dict[str, Dict]] = {}
+    checkpoint = CellCheckpoint(checkpoint_path(output_path))
+    # Byte offsets of written lines go to <stem>.index, so a resume need not parse the results.
+    index = ResultsIndex(output_path, evals)
+    output_mode = "w"
+    if resume:
+        resumed = None
+        if output_path.exists():
+            with profiler.stage("load"):
+                resumed = resume_from_index(output_path, index, prices, member)
+        if resumed is not None:
+            prefix_end, summary = resumed
+            completed_ids = {member(k) for k in range(summary.executions)}
+            with profiler.stage("load"):
+                cells = checkpoint.load(skip=completed_ids.__contains__)
+            checkpoint.open(resume=True)
+            with output_path.open("rb+") as handle:
+                handle.truncate(prefix_end)
+            output_mode = "a"
+        else:
+            with profiler.stage("load"):
+                cells = checkpoint.load()
+            checkpoint.open(resume=True)
+        if resumed is None and output_path.exists():
+            if index.other_criteria():
+                print("\nResuming: existing results do not match the current criteria; "
+                      "rewriting them from checkpointed cells.")
+            records: List[Tuple[int, int]] = []
+            with profiler.stage("load"):
+                prefix_end, summary = scan_existing_results(
+                    output_path, evals, cells, checkpoint, prices, member, records
+                )
+            with output_path.open("rb+") as handle:
+                handle.truncate(prefix_end)
+            completed_ids = {member(k) for k in range(summary.executions)}
+            for execution_id in completed_ids:
+                cells.pop(execution_id, None)
+            index.rewrite(records)
+            output_mode = "a"
         if completed_ids:
             print(f"\nResuming: {len(completed_ids)} executions already completed.")
-    total_evals = len(executions) * len(evals)
+        partial = sum(len(done) for done in cells.values())
+        if partial:
+            print(f"Resuming: {partial} finished judge calls will be reused.")
+    else:
+        checkpoint.open(resume=False)
+    if output_mode == "w":
+        index.rewrite()
+    if carried:
+        for execution_id, done in carried.items():
+            if execution_id in completed_ids:
+                continue
+            merged = cells.setdefault(execution_id, {})
+            for eval_name, eval_result in done.items():
+                merged.setdefault(eval_name, eval_result)
+    if duplicates is not None:
+        duplicates.restrict(
+            lambda idx: idx not in completed_ids and in_shard(idx, *shard) and (strata is None or idx in weights)
+        )
+        if duplicates.saved_executions:
+            print(f"Duplicates: {duplicates.saved_executions} executions repeat an earlier input/output "
+                  "and will be copied instead of judged.")
+    if store is not None:
+        run_id = run_id or run_id_for(output_path)
+        store.start_run(run_id, output_path, reset=not resume)
+    total_evals = total_executions * len(evals)
     current = len(completed_ids) * len(evals)
-    
-    # Open output file for incremental writes
-    output_mode = "a" if resume and output_path.exists() else "w"
-    with open(output_path, output_mode) as output_file:
-        for idx, execution in enumerate(executions, 1):
-            if idx in completed_ids:
+
+    def iter_pending() -> Iterator[Tuple[int, Dict]]:
+        if sampler is not None:
+            order = shuffled_order(total_executions, sampler.seed)
+            yield from iter_executions_by_id(executions_path, offsets, order)
+            return
+        for idx, execution in profiler.timed_iter(iter_executions(executions_path), "load"):
+            if idx in completed_ids or not in_shard(idx, *shard):
                 continue
-            print(f"\nExecution {idx}/{len(executions)}")
-            
-            result = {
-                "execution_id": idx,
-                "input": execution.get("llm-input"),
-                "output": execution.get("llm-output"),
-                "evals": []
-            }
-            
-            for eval_criteria in evals:
-                current += 1
-                # Less verbose - print progress once per execution (after all criteria).
-                if len(evals) and current % len(evals) == 0:
-                    print(f"  Progress: {current}/{total_evals} API calls ({current*100//total_evals}%)")
+            if duplicates is not None and duplicates.source(idx) is not None:
+                continue
+            if strata is None or idx in weights:
+                yield idx, execution
+    
+    # Open output file for incremental writes; live progress goes to <RUN_ID>_status.json
+    # (and http://127.0.0.1:<metrics_port>/metrics).
+    metrics = judge_client.metrics
+    with metrics.publish(
+        run_id or run_id_for(output_path),
+        total_executions,
+        total_evals,
+        len(completed_ids),
+        current,
+        status_path_for(output_path),
+        metrics_port,
+    ), index.writing(summary), open(output_path, output_mode + "b") as output_file:
+        def emit(result: Dict) -> None:
+            nonlocal current
+            current += len(result["evals"])
+            metrics.written(len(result["evals"]))
+            if strata is not None:
+                result["sampling_weight"] = weights[result["execution_id"]]
+            if fence is not None:
+                fence()
+            summary.add(result)
+            with profiler.stage("write"):
+                line = dump_line(result)
+                output_file.write(line)
+                output_file.flush()
+                index.append(result, len(line))
+                index.snapshot(summary)
+                if store is not None:
+                    store.add_result(run_id, result)
+            print(
+                f"  Execution {result['execution_id']} written ({summary.executions}/{total_executions}). "
+                f"Progress: {current}/{total_evals} API calls ({current*100//max(total_evals, 1)}%)"
+            )
+
+        def write_result(result: Dict) -> None:
+            # Copies of earlier executions go out in id order, just before the next judged one.
+            if duplicates is not None:
+                for copy in duplicates.copies_before(result["execution_id"]):
+                    emit(copy)
+                duplicates.keep(result)
+            emit(result)
+
+        if mode == "batch":
+            batch_client = batch_client or OpenAIBatchClient(judge_client.client)
+            batch_dir = batch_dir or output_path.with_name(output_path.stem + "_batch")
+            run_batch(
+                iter_pending,
+                evals,
+                write_result,
+                judge_client,
+                batch_client,
+                batch_dir,
+                cells,
+                checkpoint,
+                poll_interval,
+                resume,
+            )
+        elif sampler is not None:
+            sampler.start(evals)
+            print(f"Sampling: random order until each pass-rate interval is under {sampler.target_width}")
+            run_sampled(
+                iter_pending(), evals, sampler, concurrency, write_result, judge_client, checkpoint, combine
+            )
+            sampler.finish()
+        elif concurrency > 1:
+            print(f"Concurrency: {concurrency} judge calls in flight"
+                  + (" (longest prompts first)" if longest_first else ""))
+            asyncio.run(run_concurrent(
+                iter_pending(),
+                evals,
+                concurrency,
+                write_result,
+                judge_client,
+                cells,
+                checkpoint,
+                combine,
+                longest_first,
+                schedule_window,
+            ))
+        else:
+            for idx, execution in iter_pending():
+                print(f"\nExecution {idx} ({summary.executions + 1}/{total_executions})")
+                result = evaluate_execution(
+                    idx, execution, evals, judge_client, cells.pop(idx, {}), checkpoint, combine
+                )
                 
-                eval_result = run_eval(eval_criteria, execution)
-                result["evals"].append(eval_result)
-            
-            results.append(result)
-            
-            # Write result immediately after each execution completes
-            output_file.write(json.dumps(result) + '\n')
-            output_file.flush()
+                # Write result immediately after each execution completes
+                write_result(result)
+        if duplicates is not None:
+            for copy in duplicates.copies_before():
+                emit(copy)
+    checkpoint.close()
+    if store is not None:
+        store.flush()
     
     # Results already saved incrementally
     print("\n" + "=" * 80)
     print(f"\nResults saved incrementally to {output_path}")
     
     # Print summary statistics
+    print_eval_summary(evals, summary)
+    if sampler is not None:
+        print_sampling(sampler)
+    print_payload_savings(evals, dedupe_payload)
+    print_compaction(evals)
+    print_usage(summary)
+    if summary.carried:
+        print(f"\nCarried over {summary.carried} results from an earlier run (no judge calls).")
+    if summary.copied:
+        print(f"\nDuplicates: {summary.copied} executions copied from identical ones, "
+              f"{summary.calls_saved:.0f} judge calls saved.")
+
+    if summary.retries or summary.wait_seconds:
+        print("\nRate limiting:")
+        print(f"  Retries: {summary.retries:.0f}")
+        print(f"  Time spent waiting: {summary.wait_seconds:.1f}s across {summary.calls:.0f} calls")
+    if summary.timeouts:
+        print(f"\nTimeouts: {summary.timeouts:.0f} judge calls ran past their deadline "
+              "(scored as errors; --resume retries them)")
+    breaker = judge_client.breaker.to_dict()
+    if any(stats["trips"] for stats in breaker.values()):
+        print_breaker(breaker)
+        profiler.extra["circuit_breaker"] = breaker
+
+    if judge_client.hedger is not None:
+        print_hedging(judge_client.hedger)
+        profiler.extra["hedging"] = judge_client.hedger.to_dict()
+
+    if judge_client.cache is not None:
+        cache_stats = judge_client.cache.stats()
+        print("\nResponse cache:")
+        print(f"  Hits: {cache_stats['hits']}  Misses: {cache_stats['misses']} "
+              f"({cache_stats['hit_rate']*100:.1f}% hit rate)")
+    
+    print("\n" + "=" * 80)
+    print(f"✓ Complete! Results saved to: {output_path}")
+    print("=" * 80)
+
+    return summary
+
+
+def print_eval_summary(evals: List[Dict], summary: RunningSummary) -> None:
     print("\n" + "=" * 80)
     print("EVALUATION SUMMARY")
     print("=" * 80)
     
     for eval_criteria in evals:
         eval_name = eval_criteria["name"]
-        scores = [
-            e["score"]
-            for r in results
-            for e in r.get("evals", [])
-            if e.get("eval_name") == eval_name and e.get("score") is not None
-        ]
+        stats = summary.criteria.get(eval_name)
         
-        if scores:
-            avg_score = sum(scores) / len(scores)
-            passed_count = sum(
-                1
-                for r in results
-                for e in r.get("evals", [])
-                if e.get("eval_name") == eval_name and e.get("passed")
-            )
-            total_count = len(results)
+        if stats and stats["scored"]:
+            passed_count = stats["passed"]
+            total_count = stats["total"]
             pass_rate = (passed_count / total_count) * 100
             
             print(f"\n{eval_name}:")
-            print(f"  Average Score: {avg_score:.2f}/{eval_criteria['range'][1]}")
+            print(f"  Average Score: {summary.avg_score(eval_name):.2f}/{eval_criteria['range'][1]}")
             print(f"  Pass Rate: {pass_rate:.1f}% ({passed_count}/{total_count})")
+            if summary.weighted:
+                print(f"  Weighted (population) Average Score: {summary.weighted_avg_score(eval_name):.2f}")
+                print(f"  Weighted (population) Pass Rate: {summary.weighted_pass_rate(eval_name)*100:.1f}%")
             print(f"  Pass Threshold: {eval_criteria['pass_threshold']}")
-    
-    print("\n" + "=" * 80)
-    print(f"✓ Complete! Results saved to: {output_path}")
-    print("=" * 80)
 
-    return results
+
+def run_shards(
+    evals_path: Path,
+    executions_path: Path,
+    output_path: Path,
+    shard_spec: str,
+    lease_ttl: float = DEFAULT_LEASE_TTL,
+    **run_kwargs,
+) -> int:
+    """
+    Claim and evaluate shards of a run ('i/N' for one shard, 'any/N' for every shard
+    that is neither finished nor leased by a live worker). Each shard resumes from
+    its own partial results, so a shard taken over from a dead worker is not redone.
+    Returns the number of shards this worker finished.
+    """
+    index, count = parse_shard(shard_spec)
+    prepare_shard_dir(output_path, count)
+    finished = 0
+    for shard_index in ([index] if index else range(1, count + 1)):
+        lease = ShardLease(output_path, shard_index, count, lease_ttl)
+        if not lease.acquire():
+            state = "finished" if lease.done_path.exists() else f"leased by {lease.holder()}"
+            print(f"Shard {shard_index}/{count}: {state}, skipping")
+            continue
+        print(f"\nShard {shard_index}/{count}: claimed by {lease.owner}")
+        shard_kwargs = dict(run_kwargs)
+        if shard_kwargs.get("batch_dir"):
+            shard_kwargs["batch_dir"] = shard_kwargs["batch_dir"] / shard_name(shard_index, count)
+        try:
+            run_evaluations(
+                evals_path,
+                executions_path,
+                shard_output_path(output_path, shard_index, count),
+                resume=True,
+                shard=(shard_index, count),
+                fence=lease.check,
+                **shard_kwargs,
+            )
+            lease.release(done=True)
+        except LeaseLostError as e:
+            lease.release(done=False)
+            print(f"{e}; leaving the shard to it")
+            continue
+        except BaseException:
+            lease.release(done=False)
+            raise
+        finished += 1
+    return finished
+
+
+def merge_shards(
+    evals_path: Path,
+    output_path: Path,
+    count: int,
+    prices: Optional[Dict[str, Dict[str, float]]] = None,
+    store: Optional[RunStore] = None,
+    run_id: Optional[str] = None,
+) -> RunningSummary:
+    """
+    Merge finished shard files into the canonical, execution_id-ordered results file
+    (and the run store, if given; shard workers do not write to it).
+    """
+    missing = missing_shards(output_path, count)
+    if missing:
+        raise RuntimeError(f"Shards not finished yet: {', '.join(map(str, missing))} of {count}")
+    summary = RunningSummary(prices)
+    if store is not None:
+        run_id = run_id or run_id_for(output_path)
+        store.start_run(run_id, output_path)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with tmp_path.open("wb") as output_file:
+        for result in iter_merged_results(output_path, count):
+            summary.add(result)
+            output_file.write(dump_line(result))
+            if store is not None:
+                store.add_result(run_id, result)
+    tmp_path.replace(output_path)
+    discard_index(output_path)
+    if store is not None:
+        store.flush()
+    print(f"Merged {count} shards ({summary.executions} executions) into {output_path}")
+    print_eval_summary(load_evals(evals_path), summary)
+    print_usage(summary)
+    return summary
+
+
+def print_sampling(sampler: SequentialSampler) -> None:
+    print(f"\nSampled pass rates ({sampler.confidence:.0%} Wilson intervals):")
+    for eval_name, stats in sampler.to_dict()["criteria"].items():
+        rate = stats["pass_rate"] if stats["pass_rate"] is not None else 0.0
+        print(
+            f"  {eval_name}: {rate*100:.1f}% [{stats['ci_low']*100:.1f}%, {stats['ci_high']*100:.1f}%] "
+            f"from {stats['samples']} samples (stopped: {stats['stopped']})"
+        )
+
+
+def print_usage(summary: RunningSummary) -> None:
+    if not summary.usage_total.calls:
+        return
+    print("\nUsage (estimated cost):")
+    for label, totals in list(summary.usage_by_criterion.items()) + [("Total", summary.usage_total)]:
+        usage = totals.to_dict()
+        print(
+            f"  {label}: {usage['prompt_tokens']} prompt / {usage['completion_tokens']} completion "
+            f"/ {usage['cached_tokens']} cached tokens, avg {usage['avg_latency_seconds']:.2f}s, "
+            f"${usage['estimated_cost_usd']:.4f}"
+        )
+
+
+def print_breaker(breaker: Dict[str, Dict]) -> None:
+    print("\nCircuit breaker:")
+    for model, stats in breaker.items():
+        if stats["trips"]:
+            print(
+                f"  {model}: opened {stats['trips']} times, paused {stats['open_seconds']:.1f}s, "
+                f"{stats['probes']} probes ({stats['failed_probes']} failed)"
+            )
+
+
+def print_hedging(hedger: HedgePolicy) -> None:
+    print(f"\nHedged requests (duplicate after p{hedger.percentile:g} latency, budget {hedger.budget:.0%}):")
+    for model, stats in hedger.to_dict().items():
+        print(
+            f"  {model}: {stats['hedges']} of {stats['requests']} requests hedged "
+            f"({stats['hedge_rate']*100:.1f}%), {stats['hedge_wins']} answered by the duplicate, "
+            f"~{stats['estimated_saved_seconds']:.1f}s latency saved "
+            f"(threshold {stats['threshold_seconds']:.2f}s)"
+        )
+
+
+def print_payload_savings(evals: List[Dict], dedupe_payload: bool) -> None:
+    rows = [(c["name"], c["_template"].savings()) for c in evals]
+    if not any(savings["duplicate_tokens"] for _, savings in rows):
+        return
+    print("\nDuplicated payload (estimated tokens):")
+    for eval_name, savings in rows:
+        duplicate = savings["duplicate_tokens"]
+        if dedupe_payload:
+            sent = savings["rendered_tokens"]
+            saved_pct = duplicate * 100 / max(sent + duplicate, 1)
+            print(f"  {eval_name}: saved ~{duplicate} of {sent + duplicate} ({saved_pct:.1f}%)")
+        else:
+            sent = savings["rendered_tokens"]
+            print(f"  {eval_name}: ~{duplicate} of {sent} sent twice")
+    if not dedupe_payload:
+        print("  Pass --dedupe-payload to send each variable in only one message.")
+
+
+def print_compaction(evals: List[Dict]) -> None:
+    rows = [(c["name"], c["_compaction"].summary()) for c in evals if c.get("_compaction")]
+    if not any(compaction["compacted"] for _, compaction in rows):
+        return
+    print("\nInput compaction (estimated tokens):")
+    for eval_name, compaction in rows:
+        print(
+            f"  {eval_name}: {compaction['compacted']} of {compaction['inputs']} inputs compacted, "
+            f"~{compaction['sent_tokens']} of {compaction['input_tokens']} sent"
+        )
+
+
+def default_cache_path() -> Path:
+    return Path(__file__).parent.parent / ".cache" / "judge_cache.sqlite"
+
+
+def build_judge_client(
+    rate_limits_path: Optional[str] = None,
+    max_retries: int = 6,
+    cache_path: Optional[str] = None,
+    profiler: Optional[RunProfiler] = None,
+    hedge_percentile: Optional[float] = None,
+    hedge_budget: float = 0.05,
+    call_timeout: Optional[float] = None,
+    execution_timeout: Optional[float] = None,
+    breaker_failures: int = 10,
+    breaker_cooldown: float = 5.0,
+    breaker_give_up: float = 600.0,
+) -> JudgeClient:
+    limits = load_rate_limits(Path(rate_limits_path) if rate_limits_path else None)
+    return JudgeClient(
+        limiter=RateLimiter(limits),
+        retry_policy=RetryPolicy(max_retries=max_retries),
+        cache=JudgeCache(Path(cache_path)) if cache_path else None,
+        profiler=profiler,
+        hedger=HedgePolicy(hedge_percentile, hedge_budget) if hedge_percentile is not None else None,
+        breaker=CircuitBreaker(
+            breaker_failures,
+            breaker_cooldown,
+            give_up_after=breaker_give_up or None,
+            probe_timeout=call_timeout or 60.0,
+        ),
+        call_timeout=call_timeout,
+        execution_timeout=execution_timeout,
+    )
+
+
+def build_sampler(args: argparse.Namespace) -> Optional[SequentialSampler]:
+    if not args.sample:
+        return None
+    return SequentialSampler(
+        target_width=args.ci_width,
+        confidence=args.confidence,
+        max_samples=args.max_samples,
+        seed=args.sample_seed,
+    )
+
+
+def build_strata(args: argparse.Namespace, executions_path: Path) -> Optional[StratifiedSample]:
+    if not args.strata_fields:
+        return None
+    fields = [field.strip() for field in args.strata_fields.split(",") if field.strip()]
+    quotas = json.loads(Path(args.quotas).read_text()) if args.quotas else None
+    strata = stratify(
+        iter_executions(executions_path), fields, args.stratum_quota, quotas, args.sample_seed
+    )
+    print(f"Stratified by {', '.join(fields)}:")
+    for label, stats in strata.to_dict()["strata"].items():
+        print(f"  {label}: {stats['sampled']}/{stats['population']} (weight {stats['weight']})")
+    return strata
+
+
+def write_profile(profiler: RunProfiler, profile_path: Path) -> None:
+    if not profiler.enabled:
+        return
+    pstats_path = profiler.write(profile_path)
+    print(f"Profile written to {profile_path}")
+    if pstats_path:
+        print(f"cProfile stats written to {pstats_path} (inspect with: python -m pstats {pstats_path})")
 
 
 def main():
@@ -267,13 +1592,310 @@ def main():
         action="store_true",
         help="Resume by skipping executions already present in the output file.",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum judge calls in flight. Values above 1 use the async client.",
+    )
+    parser.add_argument(
+        "--rate-limits",
+        default=None,
+        help='Optional JSON file of per-model budgets, e.g. {"gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}}.',
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=6,
+        help="Retries per judge call for 429s and transient API errors.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=str(default_cache_path()),
+        help="SQLite file caching judge responses by (model, messages, sampling params).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the judge; do not read or write the response cache.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["live", "batch"],
+        default="live",
+        help="live calls the judge directly; batch submits requests through the Batch API.",
+    )
+    parser.add_argument(
+        "--batch-dir",
+        default=None,
+        help="Working folder for batch input/output files (default: <output stem>_batch next to the output).",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between batch status checks.",
+    )
+    parser.add_argument(
+        "--dedupe-payload",
+        action="store_true",
+        help="Send each template variable (e.g. {{item.input}}) in only one message per judge call.",
+    )
+    parser.add_argument(
+        "--input-token-budget",
+        type=int,
+        default=None,
+        help="Compact each llm-input to about this many tokens before judging "
+             "(criteria with input_compaction.max_tokens in Evals.json keep their own).",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        help="With --concurrency, send one duplicate of a judge request still running at this "
+             "latency percentile of its model (learned during the run), keeping the first answer.",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.05,
+        help="Maximum duplicate requests as a fraction of requests per model (default: 0.05).",
+    )
+    parser.add_argument(
+        "--call-timeout",
+        type=float,
+        default=None,
+        help="Seconds a judge call may take, including throttling, retries and backoff; "
+             "a call past it is cancelled and scored as an error (retried on --resume).",
+    )
+    parser.add_argument(
+        "--execution-timeout",
+        type=float,
+        default=None,
+        help="Seconds all judge calls for one execution may take together.",
+    )
+    parser.add_argument(
+        "--breaker-failures",
+        type=int,
+        default=10,
+        help="Consecutive transient failures of a model that open its circuit breaker, pausing "
+             "its calls while one probe call at a time checks for recovery (0 disables; default: 10).",
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=5.0,
+        help="Seconds before the first probe of an open breaker; doubles per failed probe up to 60s.",
+    )
+    parser.add_argument(
+        "--breaker-give-up",
+        type=float,
+        default=600.0,
+        help="Stop the run (resumable with --resume) when a breaker stays open this long "
+             "(0 waits indefinitely; default: 600).",
+    )
+    parser.add_argument(
+        "--longest-first",
+        action="store_true",
+        help="With --concurrency, dispatch the judge calls with the longest rendered prompts first.",
+    )
+    parser.add_argument(
+        "--schedule-window",
+        type=int,
+        default=None,
+        help="Executions in flight at once (default: 2x concurrency, 16x with --longest-first). "
+             "Results are held in memory until earlier executions finish.",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve live run metrics in Prometheus text format at http://127.0.0.1:PORT/metrics "
+             "(JSON at /status). A <RUN_ID>_status.json file is written either way.",
+    )
+    parser.add_argument(
+        "--prices",
+        default=None,
+        help='Optional JSON price table (USD per 1M tokens), e.g. {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6}}.',
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-stage timings and per-model request latency percentiles to <RUN_ID>_profile.json.",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        action="store_true",
+        help="With --profile, also dump a cProfile of the CPU-bound stages to <RUN_ID>_profile.pstats.",
+    )
+    parser.add_argument(
+        "--run-store",
+        nargs="?",
+        const=str(default_store_path()),
+        default=None,
+        metavar="PATH",
+        help="Also write results to a SQLite run store (default outputs/runs.sqlite), keyed by the "
+             "<RUN_ID> of <RUN_ID>_eval_results.jsonl. Shard workers leave this to --merge-shards.",
+    )
+    parser.add_argument(
+        "--dedupe-executions",
+        action="store_true",
+        help="Judge only the first execution with a given llm-input/llm-output pair and copy its "
+             "result to later ones (copied_from).",
+    )
+    parser.add_argument(
+        "--combine-criteria",
+        action="store_true",
+        help="Score all criteria that share a model in one JSON-mode call per execution "
+             "(per-criterion calls only for entries that come back missing or invalid).",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Judge executions in random order and stop each criterion once its pass-rate interval is narrow enough.",
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.1,
+        help="With --sample, target full width of each criterion's pass-rate interval (0.1 = +/-5 points).",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="With --sample, confidence level of the Wilson interval.",
+    )
+    parser.add_argument(
+        "--max-samples",
+        type=int,
+        default=None,
+        help="With --sample, stop a criterion after this many judged executions regardless of width.",
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=0,
+        help="With --sample, seed for the random execution order.",
+    )
+    parser.add_argument(
+        "--strata-fields",
+        default=None,
+        help="Comma-separated llm-input dot paths to stratify on, e.g. briefing_info.portfolio_currency,holdings[].sector.",
+    )
+    parser.add_argument(
+        "--stratum-quota",
+        type=int,
+        default=50,
+        help="With --strata-fields, executions drawn per stratum (all of a smaller stratum).",
+    )
+    parser.add_argument(
+        "--quotas",
+        default=None,
+        help='With --strata-fields, optional JSON of per-stratum quotas keyed by label, e.g. {"EUR | Energy": 200}.',
+    )
+    parser.add_argument(
+        "--shard",
+        default=None,
+        help="Evaluate one slice of the run: i/N (ids i, i+N, ...) or any/N to claim free shards via lease files.",
+    )
+    parser.add_argument(
+        "--lease-ttl",
+        type=float,
+        default=DEFAULT_LEASE_TTL,
+        help="Seconds without a heartbeat before another worker may take over a shard lease.",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Merge N finished shards into --output-path and exit.",
+    )
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.sample and (args.resume or args.shard or args.mode != "live"):
+        parser.error("--sample cannot be combined with --resume, --shard or --mode batch")
+    if args.combine_criteria and args.mode != "live":
+        parser.error("--combine-criteria is only supported with --mode live")
+    if args.strata_fields and (args.sample or args.shard):
+        parser.error("--strata-fields cannot be combined with --sample or --shard")
 
     evals_path = Path(args.evals_path)
     executions_path = Path(args.executions_path)
     output_path = Path(args.output_path)
 
-    run_evaluations(evals_path, executions_path, output_path, resume=args.resume)
+    store = RunStore(Path(args.run_store)) if args.run_store else None
+    if args.merge_shards:
+        try:
+            merge_shards(evals_path, output_path, args.merge_shards, load_prices(args.prices), store)
+        finally:
+            if store is not None:
+                store.close()
+        return
+
+    profiler = RunProfiler(args.profile or args.profile_cprofile, args.profile_cprofile)
+    judge_client = build_judge_client(
+        args.rate_limits,
+        args.max_retries,
+        None if args.no_cache else args.cache_path,
+        profiler,
+        args.hedge_percentile,
+        args.hedge_budget,
+        args.call_timeout,
+        args.execution_timeout,
+        args.breaker_failures,
+        args.breaker_cooldown,
+        args.breaker_give_up,
+    )
+    run_kwargs = dict(
+        concurrency=args.concurrency,
+        judge_client=judge_client,
+        mode=args.mode,
+        batch_dir=Path(args.batch_dir) if args.batch_dir else None,
+        poll_interval=args.poll_interval,
+        dedupe_payload=args.dedupe_payload,
+        input_token_budget=args.input_token_budget,
+        longest_first=args.longest_first,
+        schedule_window=args.schedule_window,
+        metrics_port=args.metrics_port,
+        prices=load_prices(args.prices),
+        combine=args.combine_criteria,
+        dedupe_executions=args.dedupe_executions,
+    )
+    try:
+        if args.shard:
+            run_shards(
+                evals_path, executions_path, output_path, args.shard, args.lease_ttl, **run_kwargs
+            )
+            worker = f"worker-{socket.gethostname()}-{os.getpid()}"
+            write_profile(profiler, shard_dir(output_path) / f"{worker}_profile.json")
+        else:
+            sampler = build_sampler(args)
+            strata = build_strata(args, executions_path)
+            run_evaluations(
+                evals_path,
+                executions_path,
+                output_path,
+                resume=args.resume,
+                sampler=sampler,
+                strata=strata,
+                store=store,
+                **run_kwargs,
+            )
+            write_profile(profiler, profile_path_for(output_path))
+    except CircuitOpenError as e:
+        raise SystemExit(f"\nStopped: {e}. Finished judge calls are checkpointed; rerun with --resume.")
+    finally:
+        judge_client.close()
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
@@ -14,6 +14,11 @@ from typing import Dict, List, Optional, Tuple
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from create_slim_results import slim_input
+from eval_stats import ScoreMatrix
+from jsonl_codec import iter_jsonl
+from run_store import RunStore
+
 
 SEVERITY_WEIGHTS = {
     "High": 3,
@@ -42,52 +47,29 @@ def find_run_file(run_dir: Path, run_id: str, suffix: str) -> Optional[Path]:
 
 
 def load_jsonl(path: Path) -> List[Dict]:
-    results = []
-    with path.open("r") as handle:
-        for line in handle:
-            if line.strip():
-                results.append(json.loads(line))
-    return results
+    return list(iter_jsonl(path))
 
 
 def compute_stats(results: List[Dict]) -> Dict[str, Dict[str, float]]:
-    if not results:
-        return {}
-    stats = {}
-    criteria = [e["eval_name"] for e in results[0].get("evals", [])]
-    for name in criteria:
-        scores = []
-        passed = 0
-        total = 0
-        for result in results:
-            for eval_result in result.get("evals", []):
-                if eval_result.get("eval_name") == name:
-                    score = eval_result.get("score")
-                    if score is not None:
-                        scores.append(score)
-                    if eval_result.get("passed"):
-                        passed += 1
-                    total += 1
-        avg = sum(scores) / len(scores) if scores else 0
-        pass_rate = (passed / total) if total else 0
-        stats[name] = {
-            "avg_score": avg,
-            "pass_rate": pass_rate,
-            "failures": total - passed,
-            "total": total,
-        }
-    return stats
+    return ScoreMatrix.from_results(results).to_dict()
+
+
+def format_histogram(histogram: Dict[str, int]) -> str:
+    return " ".join(f"{score}:{count}" for score, count in histogram.items())
 
 
 def stats_table(stats: Dict[str, Dict[str, float]]) -> str:
     if not stats:
         return ""
-    header = "| Criterion | Avg Score | Pass Rate | Failures |"
-    sep = "|---|---|---|---|"
+    header = "| Criterion | Avg Score | Pass Rate | Pass Rate 95% CI | Failures | Scores |"
+    sep = "|---|---|---|---|---|---|"
     lines = [header, sep]
     for name, values in stats.items():
+        interval = values.get("pass_rate_ci")
+        ci = f"{interval[0]*100:.1f}-{interval[1]*100:.1f}%" if interval else "n/a"
         lines.append(
-            f"| {name} | {values['avg_score']:.2f} | {values['pass_rate']*100:.1f}% | {values['failures']} |"
+            f"| {name} | {values['avg_score']:.2f} | {values['pass_rate']*100:.1f}% | {ci} "
+            f"| {values['failures']} | {format_histogram(values.get('histogram', {}))} |"
         )
     return "\n".join(lines)
 
@@ -115,6 +97,35 @@ def collect_entries(results: List[Dict]) -> Dict[str, List[Dict]]:
     return entries
 
 
+def collect_store_entries(
+    store: RunStore, run_id: str, thresholds: Dict[str, Optional[float]]
+) -> Dict[str, List[Dict]]:
+    """
+    Failures and at-threshold passes per criterion (all build_failure_payload uses),
+    read from the run store's indexes instead of the whole results file.
+    """
+    entries: Dict[str, List[Dict]] = {}
+    for name, threshold in thresholds.items():
+        matches = store.query(run_id, eval_name=name, passed=False, with_input=True)
+        if threshold is not None:
+            matches += store.query(
+                run_id, eval_name=name, passed=True, min_score=threshold, max_score=threshold, with_input=True
+            )
+        entries[name] = [
+            {
+                "execution_id": match["execution_id"],
+                "score": match.get("score"),
+                "pass_threshold": match.get("pass_threshold"),
+                "passed": match.get("passed"),
+                "explanation": match.get("explanation", ""),
+                "output": match.get("output"),
+                "input": slim_input(match.get("input")),
+            }
+            for match in matches
+        ]
+    return entries
+
+
 def identify_near_fails(entries: List[Dict], pass_threshold: int) -> List[Dict]:
     passing = [e for e in entries if e.get("passed") is True and e.get("score") is not None]
     if not passing:
@@ -575,11 +586,13 @@ def generate_report(
     run_id: str,
     output_path: Path,
     model: str,
+    store: Optional[RunStore] = None,
 ) -> None:
     base_dir = Path(__file__).parent.parent
 
+    use_store = store is not None and store.has_run(run_id)
     slim_path = find_run_file(run_dir, run_id, "eval_results_slim.jsonl")
-    if not slim_path:
+    if not slim_path and not use_store:
         raise FileNotFoundError("Slim eval results not found for run.")
 
     system_prompt_path = find_run_file(run_dir, run_id, "system_prompt.md") or (
@@ -592,10 +605,16 @@ def generate_report(
     feature_context = (base_dir / "context" / "feature_context.md").read_text()
     system_prompt = system_prompt_path.read_text()
 
-    results = load_jsonl(slim_path)
-    stats = compute_stats(results)
-    entries = collect_entries(results)
     evals_map = load_evals_map(evals_path)
+    if use_store:
+        stats = ScoreMatrix.from_results(store.iter_scores(run_id)).to_dict()
+        entries = collect_store_entries(
+            store, run_id, {name: evals_map.get(name, {}).get("pass_threshold") for name in stats}
+        )
+    else:
+        results = load_jsonl(slim_path)
+        stats = compute_stats(results)
+        entries = collect_entries(results)
 
     load_dotenv()
     client = OpenAI()
@@ -663,12 +682,22 @@ def main() -> None:
         default="gpt-4o-mini",
         help="Model to use for meta-analysis generation.",
     )
+    parser.add_argument(
+        "--run-store",
+        default=None,
+        help="Read the run from this SQLite run store (see run_evals.py --run-store) instead of the slim file.",
+    )
     args = parser.parse_args()
 
     run_dir = Path(args.run_dir)
     output_path = Path(args.output_path)
 
-    generate_report(run_dir, args.run_id, output_path, args.model)
+    store = RunStore(Path(args.run_store)) if args.run_store else None
+    try:
+        generate_report(run_dir, args.run_id, output_path, args.model, store)
+    finally:
+        if store is not None:
+            store.close()
     print(f"Meta-analysis report saved to {output_path}")
 
 
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Optional SQLite store of eval runs, kept alongside the JSONL artifacts.
+One database can hold many runs: executions, per-criterion eval results and manifests,
+with eval results indexed on (run_id, eval_name, score, passed) so questions like
+"executions failing Numerical fidelity with score <= 5" do not re-parse results files.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from create_slim_results import slim_result
+from jsonl_codec import loads
+
+
+COMMIT_EVERY = 200
+COMMIT_SECONDS = 2.0
+
+
+def default_store_path() -> Path:
+    return Path(__file__).parent.parent / "outputs" / "runs.sqlite"
+
+
+def run_id_for(output_path: Path) -> str:
+    """<RUN_ID> for <RUN_ID>_eval_results.jsonl, else the results file stem."""
+    name = Path(output_path).name
+    if name.endswith("_eval_results.jsonl"):
+        return name[: -len("_eval_results.jsonl")]
+    return Path(output_path).stem
+
+
+class RunStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                results_path TEXT,
+                manifest TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS executions (
+                run_id TEXT NOT NULL,
+                execution_id INTEGER NOT NULL,
+                input TEXT,
+                output TEXT,
+                sampling_weight REAL,
+                copied_from INTEGER,
+                PRIMARY KEY (run_id, execution_id)
+            );
+            CREATE TABLE IF NOT EXISTS eval_results (
+                run_id TEXT NOT NULL,
+                execution_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                eval_name TEXT NOT NULL,
+                score REAL,
+                passed INTEGER,
+                pass_threshold REAL,
+                model TEXT,
+                result TEXT NOT NULL,
+                PRIMARY KEY (run_id, execution_id, eval_name)
+            );
+            CREATE INDEX IF NOT EXISTS eval_results_lookup
+                ON eval_results (run_id, eval_name, score, passed);
+            """
+        )
+        self.conn.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    def start_run(self, run_id: str, results_path: Optional[Path] = None, reset: bool = True) -> None:
+        """Register a run; `reset` drops rows left by an earlier run with the same id."""
+        with self.lock:
+            if reset:
+                for table in ("eval_results", "executions", "runs"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+            self.conn.execute(
+                "INSERT INTO runs (run_id, results_path, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET results_path = excluded.results_path, "
+                "updated_at = excluded.updated_at",
+                (run_id, str(results_path) if results_path else None, time.time()),
+            )
+            self.conn.commit()
+
+    def add_result(self, run_id: str, result: Dict) -> None:
+        """Insert or replace one execution and its eval results (committed in batches)."""
+        execution_id = result["execution_id"]
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    execution_id,
+                    json.dumps(result.get("input")),
+                    json.dumps(result.get("output")),
+                    result.get("sampling_weight"),
+                    result.get("copied_from"),
+                ),
+            )
+            self.conn.execute(
+                "DELETE FROM eval_results WHERE run_id = ? AND execution_id = ?", (run_id, execution_id)
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO eval_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        execution_id,
+                        position,
+                        eval_result.get("eval_name"),
+                        eval_result.get("score"),
+                        None if eval_result.get("passed") is None else int(bool(eval_result["passed"])),
+                        eval_result.get("pass_threshold"),
+                        (eval_result.get("call") or {}).get("model"),
+                        json.dumps(eval_result),
+                    )
+                    for position, eval_result in enumerate(result.get("evals", []))
+                    if eval_result
+                ],
+            )
+            self.uncommitted += 1
+            if self.uncommitted >= COMMIT_EVERY or time.monotonic() - self.last_commit > COMMIT_SECONDS:
+                self._commit()
+
+    def flush(self) -> None:
+        with self.lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        self.conn.commit()
+        self.uncommitted = 0
+        self.last_commit = time.monotonic()
+
+    def set_manifest(self, run_id: str, manifest: Dict) -> None:
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, manifest, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET manifest = excluded.manifest, "
+                "updated_at = excluded.updated_at",
+                (run_id, json.dumps(manifest), time.time()),
+            )
+            self._commit()
+
+    def has_run(self, run_id: str) -> bool:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM executions WHERE run_id = ? LIMIT 1", (run_id,)
+            ).fetchone() is not None
+
+    def manifest(self, run_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT manifest FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return loads(row[0]) if row and row[0] else None
+
+    def query(
+        self,
+        run_id: str,
+        eval_name: Optional[str] = None,
+        passed: Optional[bool] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        limit: Optional[int] = None,
+        with_input: bool = False,
+    ) -> List[Dict]:
+        """
+        Eval results matching the filters, each with its execution_id and output
+        (and input if asked), in execution order.
+        """
+        where = ["r.run_id = ?"]
+        params: List = [run_id]
+        for clause, value in (
+            ("r.eval_name = ?", eval_name),
+            ("r.passed = ?", None if passed is None else int(passed)),
+            ("r.score >= ?", min_score),
+            ("r.score <= ?", max_score),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = (
+            "SELECT r.execution_id, r.result, e.output, e.input FROM eval_results r "
+            "JOIN executions e ON e.run_id = r.run_id AND e.execution_id = r.execution_id "
+            f"WHERE {' AND '.join(where)} ORDER BY r.execution_id, r.position"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        matches = []
+        for execution_id, result, output, item_input in rows:
+            match = dict(loads(result), execution_id=execution_id, output=loads(output))
+            if with_input:
+                match["input"] = loads(item_input)
+            matches.append(match)
+        return matches
+
+    def iter_scores(self, run_id: str) -> Iterator[Dict]:
+        """Result-shaped dicts with only scores and pass flags (enough for a ScoreMatrix)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT r.execution_id, e.sampling_weight, r.eval_name, r.score, r.passed "
+                "FROM eval_results r JOIN executions e "
+                "ON e.run_id = r.run_id AND e.execution_id = r.execution_id "
+                "WHERE r.run_id = ? ORDER BY r.execution_id, r.position",
+                (run_id,),
+            ).fetchall()
+        for execution_id, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield {
+                "execution_id": execution_id,
+                "sampling_weight": group[0][1],
+                "evals": [
+                    {"eval_name": eval_name, "score": score, "passed": None if passed is None else bool(passed)}
+                    for _, _, eval_name, score, passed in group
+                ],
+            }
+
+    def load_results(self, run_id: str, slim: bool = False) -> List[Dict]:
+        """Every result of a run in execution order, as in the (slim) results file."""
+        with self.lock:
+            executions = self.conn.execute(
+                "SELECT execution_id, input, output, sampling_weight, copied_from FROM executions "
+                "WHERE run_id = ? ORDER BY execution_id",
+                (run_id,),
+            ).fetchall()
+            evals = self.conn.execute(
+                "SELECT execution_id, result FROM eval_results WHERE run_id = ? ORDER BY execution_id, position",
+                (run_id,),
+            ).fetchall()
+        evals_by_id = {
+            execution_id: [loads(row[1]) for row in group]
+            for execution_id, group in groupby(evals, key=lambda row: row[0])
+        }
+        results = []
+        for execution_id, item_input, output, sampling_weight, copied_from in executions:
+            result = {
+                "execution_id": execution_id,
+                "input": loads(item_input),
+                "output": loads(output),
+                "evals": evals_by_id.get(execution_id, []),
+            }
+            if sampling_weight is not None:
+                result["sampling_weight"] = sampling_weight
+            if copied_from is not None:
+                result["copied_from"] = copied_from
+            results.append(slim_result(result) if slim else result)
+        return results
+
+    def close(self) -> None:
+        with self.lock:
+            self._commit()
+            self.conn.close()
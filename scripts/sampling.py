@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Sequential sampling for pass-rate estimation.
+Executions are judged in random order while a Wilson score interval is kept per
+criterion; a criterion stops being judged once its interval is narrower than the
+target width (or it reaches the sample cap), and the run stops when all have.
+"""
+
+import math
+import random
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+
+def wilson_interval(passed: int, samples: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion; (0, 1) with no samples."""
+    if samples == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = passed / samples
+    denominator = 1 + z * z / samples
+    centre = (rate + z * z / (2 * samples)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / samples + z * z / (4 * samples * samples)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def shuffled_order(total: int, seed: Optional[int] = None) -> List[int]:
+    """Execution ids 1..total in a reproducible random order."""
+    order = list(range(1, total + 1))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+class SequentialSampler:
+    def __init__(
+        self,
+        target_width: float = 0.1,
+        confidence: float = 0.95,
+        max_samples: Optional[int] = None,
+        min_samples: int = 20,
+        seed: Optional[int] = None,
+    ):
+        self.target_width = target_width
+        self.confidence = confidence
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.seed = seed
+        self.counts: Dict[str, List[int]] = {}
+        self.stopped: Dict[str, str] = {}
+
+    def start(self, evals: List[Dict]) -> None:
+        for eval_criteria in evals:
+            self.counts.setdefault(eval_criteria["name"], [0, 0])
+
+    def active(self, evals: List[Dict]) -> List[Dict]:
+        return [c for c in evals if c["name"] not in self.stopped]
+
+    def done(self) -> bool:
+        return len(self.stopped) == len(self.counts)
+
+    def interval(self, eval_name: str) -> Tuple[float, float]:
+        passed, samples = self.counts[eval_name]
+        return wilson_interval(passed, samples, self.confidence)
+
+    def record(self, eval_result: Dict) -> None:
+        """Count a judged result (failed calls are not samples) and stop its criterion if settled."""
+        eval_name = eval_result.get("eval_name")
+        if eval_name not in self.counts or eval_result.get("passed") is None:
+            return
+        counts = self.counts[eval_name]
+        counts[0] += 1 if eval_result["passed"] else 0
+        counts[1] += 1
+        if eval_name in self.stopped:
+            return
+        low, high = self.interval(eval_name)
+        if counts[1] >= self.min_samples and high - low <= self.target_width:
+            self.stopped[eval_name] = "width"
+        elif self.max_samples is not None and counts[1] >= self.max_samples:
+            self.stopped[eval_name] = "max_samples"
+
+    def finish(self) -> None:
+        """Mark criteria still open when the executions ran out."""
+        for eval_name in self.counts:
+            self.stopped.setdefault(eval_name, "exhausted")
+
+    def to_dict(self) -> Dict:
+        criteria = {}
+        for eval_name, (passed, samples) in self.counts.items():
+            low, high = self.interval(eval_name)
+            criteria[eval_name] = {
+                "samples": samples,
+                "passed": passed,
+                "pass_rate": passed / samples if samples else None,
+                "ci_low": round(low, 4),
+                "ci_high": round(high, 4),
+                "ci_width": round(high - low, 4),
+                "stopped": self.stopped.get(eval_name),
+            }
+        return {
+            "method": "wilson",
+            "target_width": self.target_width,
+            "confidence": self.confidence,
+            "max_samples": self.max_samples,
+            "min_samples": self.min_samples,
+            "seed": self.seed,
+            "criteria": criteria,
+        }
+
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Concurrency slots for live judge calls.
+CallScheduler bounds in-flight calls like a semaphore. Each call is queued with an
+estimated cost (its rendered prompt length). With `longest_first`, a freed slot goes
+to the most expensive waiting call instead of the oldest one, so large executions do
+not end up alone at the tail of the run. With `record`, per-call costs and durations
+are kept so the profile can replay the run's calls under other dispatch orders.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def prompt_chars(messages: List[Dict]) -> int:
+    """Cost estimate of a judge call: characters in its rendered messages."""
+    return sum(len(message.get("content") or "") for message in messages)
+
+
+def fit_latency(samples: List[Tuple[int, float]]) -> Tuple[float, float]:
+    """Least-squares seconds = intercept + slope * chars over (chars, seconds) samples."""
+    count = len(samples)
+    mean_cost = sum(cost for cost, _ in samples) / count
+    mean_seconds = sum(seconds for _, seconds in samples) / count
+    variance = sum((cost - mean_cost) ** 2 for cost, _ in samples)
+    if not variance:
+        return mean_seconds, 0.0
+    slope = sum((cost - mean_cost) * (seconds - mean_seconds) for cost, seconds in samples) / variance
+    slope = max(slope, 0.0)
+    return max(mean_seconds - slope * mean_cost, 0.0), slope
+
+
+def simulate_makespan(durations: List[float], slots: int) -> float:
+    """Finish time of list scheduling: each call, in order, starts on the first free slot."""
+    free = [0.0] * max(1, min(slots, len(durations)))
+    for duration in durations:
+        heapq.heapreplace(free, free[0] + duration)
+    return max(free) if durations else 0.0
+
+
+class _Slot:
+    __slots__ = ("scheduler", "cost", "arrival", "started")
+
+    def __init__(self, scheduler: "CallScheduler", cost: int):
+        self.scheduler = scheduler
+        self.cost = cost
+        self.arrival = 0
+        self.started = 0.0
+
+    async def __aenter__(self):
+        self.arrival = await self.scheduler.acquire(self.cost)
+        self.started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.scheduler.release(self, time.perf_counter())
+        return False
+
+
+class CallScheduler:
+    def __init__(self, concurrency: int, longest_first: bool = False, record: bool = False):
+        self.concurrency = concurrency
+        self.longest_first = longest_first
+        self.record = record
+        self.free = concurrency
+        self.waiting: List[Tuple[int, int, asyncio.Future]] = []
+        self.arrivals = itertools.count()
+        # (arrival, cost, seconds) per finished call, in dispatch order.
+        self.calls: List[Tuple[int, int, float]] = []
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def slot(self, cost: int) -> _Slot:
+        return _Slot(self, cost)
+
+    async def acquire(self, cost: int) -> int:
+        arrival = next(self.arrivals)
+        if self.free and not self.waiting:
+            self.free -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self.waiting, (-cost if self.longest_first else 0, arrival, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted a slot at the moment of cancellation: pass it on.
+                    self._grant()
+                raise
+        if self.first_start is None:
+            self.first_start = time.perf_counter()
+        return arrival
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without waiting or queueing (for hedge duplicates); release with give_back."""
+        if self.free and not self.waiting:
+            self.free -= 1
+            return True
+        return False
+
+    def give_back(self) -> None:
+        """Release a slot taken with try_acquire (not recorded as a call)."""
+        self._grant()
+
+    def release(self, slot: _Slot, ended: float) -> None:
+        if self.record:
+            self.calls.append((slot.arrival, slot.cost, ended - slot.started))
+            self.last_end = ended
+        self._grant()
+
+    def _grant(self) -> None:
+        while self.waiting:
+            _, _, future = heapq.heappop(self.waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free += 1
+
+    def report(self) -> Optional[Dict]:
+        """
+        Post-hoc replay of the recorded calls next to the actual makespan. Durations come
+        from a linear fit of cost over this same run's calls, then are list-scheduled on
+        the concurrency slots in the order the calls were dispatched (and in arrival and
+        global longest-first order). The fit is not held out, so the replays compare
+        orders on this run; they are not forecasts for another run.
+        """
+        if not self.calls:
+            return None
+        intercept, slope = fit_latency([(cost, seconds) for _, cost, seconds in self.calls])
+
+        def replayed(calls: List[Tuple[int, int, float]]) -> float:
+            return round(simulate_makespan([intercept + slope * cost for _, cost, _ in calls], self.concurrency), 4)
+
+        return {
+            "policy": "longest-first" if self.longest_first else "fifo",
+            "concurrency": self.concurrency,
+            "calls": len(self.calls),
+            "latency_model": {
+                "fitted_on": "this run's calls",
+                "intercept_seconds": round(intercept, 4),
+                "seconds_per_1k_chars": round(slope * 1000, 4),
+            },
+            "replayed_makespan_seconds": replayed(self.calls),
+            "replayed_fifo_makespan_seconds": replayed(sorted(self.calls)),
+            "replayed_longest_first_makespan_seconds": replayed(
+                sorted(self.calls, key=lambda call: -call[1])
+            ),
+            "actual_makespan_seconds": round(self.last_end - self.first_start, 4),
+            "busy_seconds": round(sum(seconds for _, _, seconds in self.calls), 4),
+        }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Sharded execution of one eval run across processes or hosts.
+
+Shard i/N (1-based) owns execution ids i, i+N, i+2N, ... and writes its partial
+results under <output stem>.shards/ next to the canonical results file. Shards are
+claimed through lease files on the shared filesystem: a lease is created exclusively,
+kept fresh by a heartbeat, and may be taken over once it is older than its TTL
+(the previous holder is assumed dead). A finished shard leaves a .done marker.
+
+Each lease holds its taker's unique token. The heartbeat and every write check the
+token is still there, so a stalled worker whose lease was taken over stops instead
+of writing alongside the new owner.
+"""
+
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from jsonl_codec import loads
+
+
+DEFAULT_LEASE_TTL = 600.0
+# A lease that cannot be read is re-read this many times, this far apart, before it is
+# given up: a taker checking whether it is stale moves it aside for a moment.
+LEASE_READ_ATTEMPTS = 5
+LEASE_READ_INTERVAL = 0.2
+LAYOUT_FILENAME = "shards.json"
+
+
+def parse_shard(spec: str) -> Tuple[Optional[int], int]:
+    """'3/8' -> (3, 8); 'any/8' -> (None, 8), meaning claim whichever shards are free."""
+    try:
+        index, count = spec.split("/")
+        count = int(count)
+        index = None if index == "any" else int(index)
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N or any/N, got {spec!r}")
+    if count < 1 or (index is not None and not 1 <= index <= count):
+        raise ValueError(f"Shard index must be between 1 and N, got {spec!r}")
+    return index, count
+
+
+def in_shard(execution_id: int, index: int, count: int) -> bool:
+    return (execution_id - index) % count == 0
+
+
+def shard_member(position: int, index: int, count: int) -> int:
+    """Execution id of the shard's `position`-th (0-based) execution."""
+    return index + position * count
+
+
+def shard_size(total: int, index: int, count: int) -> int:
+    return (total - index) // count + 1 if total >= index else 0
+
+
+def shard_dir(output_path: Path) -> Path:
+    return output_path.with_name(output_path.stem + ".shards")
+
+
+def shard_name(index: int, count: int) -> str:
+    width = len(str(count))
+    return f"shard-{index:0{width}d}-of-{count}"
+
+
+def shard_output_path(output_path: Path, index: int, count: int) -> Path:
+    return shard_dir(output_path) / f"{shard_name(index, count)}.jsonl"
+
+
+def prepare_shard_dir(output_path: Path, count: int) -> Path:
+    """Create the shard folder, refusing to mix shard counts within one run."""
+    directory = shard_dir(output_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    layout_path = directory / LAYOUT_FILENAME
+    # Written aside and linked into place, so a worker starting alongside never reads it half-written.
+    tmp_path = directory / f"{LAYOUT_FILENAME}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+    tmp_path.write_text(json.dumps({"count": count}))
+    try:
+        os.link(tmp_path, layout_path)
+    except FileExistsError:
+        existing = json.loads(layout_path.read_text()).get("count")
+        if existing != count:
+            raise ValueError(f"{directory} was created for {existing} shards, not {count}")
+    finally:
+        tmp_path.unlink()
+    return directory
+
+
+def missing_shards(output_path: Path, count: int) -> List[int]:
+    """Shard indexes that have not written their .done marker yet."""
+    return [
+        index for index in range(1, count + 1)
+        if not ShardLease(output_path, index, count).done_path.exists()
+    ]
+
+
+def iter_merged_results(output_path: Path, count: int) -> Iterator[Dict]:
+    """Stream every shard's results in execution_id order (each shard file is already ordered)."""
+    handles = [shard_output_path(output_path, index, count).open("rb") for index in range(1, count + 1)]
+    try:
+        streams = [
+            (loads(line) for line in handle if line.strip())
+            for handle in handles
+        ]
+        yield from heapq.merge(*streams, key=lambda result: result["execution_id"])
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+class LeaseLostError(Exception):
+    """Another worker took over this shard's lease."""
+
+
+class ShardLease:
+    def __init__(self, output_path: Path, index: int, count: int, ttl: float = DEFAULT_LEASE_TTL):
+        name = shard_name(index, count)
+        directory = shard_dir(output_path)
+        self.index = index
+        self.count = count
+        self.ttl = ttl
+        self.path = directory / f"{name}.lease"
+        self.done_path = directory / f"{name}.done"
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lost = False
+        self.verified_at = 0.0
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def holder(self) -> Optional[str]:
+        try:
+            return json.loads(self.path.read_text()).get("owner")
+        except (OSError, ValueError):
+            return None
+
+    def _stale(self) -> bool:
+        try:
+            return time.time() - self.path.stat().st_mtime > self.ttl
+        except FileNotFoundError:
+            return True
+
+    def _take_over(self) -> bool:
+        """
+        Move an expired lease aside under a name only this taker uses. If the file moved
+        turns out to be fresh (it was replaced after the staleness check), put it back
+        and give up. True when the lease path is free to create.
+        """
+        expired = self.path.with_name(f"{self.path.name}.expired.{self.owner}")
+        try:
+            os.rename(self.path, expired)
+        except FileNotFoundError:
+            return True
+        try:
+            fresh = time.time() - expired.stat().st_mtime <= self.ttl
+            if fresh:
+                try:
+                    os.link(expired, self.path)
+                except FileExistsError:
+                    # Someone created a new lease meanwhile; the moved lease's owner will see it lost.
+                    pass
+        finally:
+            expired.unlink()
+        return not fresh
+
+    def acquire(self) -> bool:
+        """Claim the shard; False if it is finished or another live worker holds it."""
+        if self.done_path.exists():
+            return False
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._stale() or not self._take_over():
+                    return False
+                continue
+            with os.fdopen(fd, "w") as handle:
+                json.dump({"owner": self.owner, "acquired_at": time.time()}, handle)
+            # A taker that judged the previous lease stale may have moved ours aside.
+            if self.holder() != self.owner:
+                return False
+            if self.done_path.exists():
+                self._unlink_own()
+                return False
+            self.lost = False
+            self.verified_at = time.monotonic()
+            self._start_heartbeat()
+            return True
+        return False
+
+    def _touch(self) -> Optional[bool]:
+        """
+        Refresh the lease if it still holds our token: True when refreshed, False when
+        another token holds it, None when it could not be read (missing or half-written).
+        """
+        try:
+            with self.path.open("rb") as handle:
+                if loads(handle.read()).get("owner") != self.owner:
+                    return False
+                # Touch the file just read, not whatever the path points to by now.
+                os.utime(handle.fileno() if os.utime in os.supports_fd else self.path)
+        except (OSError, ValueError):
+            return None
+        self.verified_at = time.monotonic()
+        return True
+
+    def _confirm(self) -> bool:
+        """Refresh the lease; False once another token holds it or it stays unreadable."""
+        for attempt in range(LEASE_READ_ATTEMPTS):
+            touched = self._touch()
+            if touched is not None:
+                return touched
+            if attempt + 1 < LEASE_READ_ATTEMPTS:
+                time.sleep(LEASE_READ_INTERVAL)
+        return False
+
+    def check(self) -> None:
+        """
+        Raise LeaseLostError if the lease was taken over. Called before each write; the
+        file is only re-read when the last verification is older than a heartbeat, so a
+        worker that stalled past its TTL finds out before writing again.
+        """
+        if not self.lost and time.monotonic() - self.verified_at > self.ttl / 4:
+            self.lost = not self._confirm()
+        if self.lost:
+            raise LeaseLostError(
+                f"Shard {self.index}/{self.count}: lease taken over by {self.holder() or 'another worker'}"
+            )
+
+    def _start_heartbeat(self) -> None:
+        def beat():
+            while not self._stop.wait(self.ttl / 4):
+                if not self._confirm():
+                    self.lost = True
+                    return
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=beat, daemon=True)
+        self._heartbeat.start()
+
+    def _unlink_own(self) -> None:
+        if self.holder() == self.owner:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def release(self, done: bool) -> None:
+        """Stop the heartbeat and drop the lease; marking the shard done needs the lease to be ours."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if done:
+            self.lost = self.lost or not self._confirm()
+            self.check()
+            self.done_path.write_text(json.dumps({"owner": self.owner, "finished_at": time.time()}))
+        self._unlink_own()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Stratified subsampling of an executions file.
+Executions are grouped by fields of their parsed `llm-input` (dot paths as produced by
+input_fields.flatten_scalar_fields, plus 'list[].field' for the set of values across a
+list, e.g. 'holdings[].sector'), and up to a quota of each stratum is drawn uniformly.
+Each drawn execution carries the weight population / sampled of its stratum, so
+weighted summaries estimate the full population.
+"""
+
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from input_fields import flatten_scalar_fields, list_field_values, parse_input
+
+
+MISSING = "(missing)"
+
+
+def stratum_label(execution: Dict, fields: List[str]) -> str:
+    data = parse_input(execution.get("llm-input"))
+    depth = max(3, max((field.count(".") + 1 for field in fields), default=0))
+    flat = flatten_scalar_fields(data, max_depth=depth)
+    values = []
+    for field in fields:
+        if "[]." in field:
+            members = sorted({str(value) for value in list_field_values(data, field)})
+            values.append("+".join(members) if members else MISSING)
+        else:
+            value = flat.get(field)
+            values.append(MISSING if value is None else str(value))
+    return " | ".join(values)
+
+
+class StratifiedSample:
+    """Per-stratum reservoirs filled in one pass over the executions."""
+
+    def __init__(
+        self,
+        fields: List[str],
+        default_quota: int,
+        quotas: Optional[Dict[str, int]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.fields = fields
+        self.default_quota = default_quota
+        self.quotas = quotas or {}
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.population: Dict[str, int] = {}
+        self.reservoirs: Dict[str, List[int]] = {}
+        self._weights: Optional[Dict[int, float]] = None
+
+    def quota(self, label: str) -> int:
+        return self.quotas.get(label, self.default_quota)
+
+    def add(self, execution_id: int, execution: Dict) -> None:
+        label = stratum_label(execution, self.fields)
+        seen = self.population.get(label, 0) + 1
+        self.population[label] = seen
+        reservoir = self.reservoirs.setdefault(label, [])
+        quota = self.quota(label)
+        if len(reservoir) < quota:
+            reservoir.append(execution_id)
+        else:
+            slot = self.rng.randrange(seen)
+            if slot < quota:
+                reservoir[slot] = execution_id
+        self._weights = None
+
+    @property
+    def weights(self) -> Dict[int, float]:
+        """execution_id -> sampling weight for every drawn execution."""
+        if self._weights is None:
+            self._weights = {
+                execution_id: self.population[label] / len(reservoir)
+                for label, reservoir in self.reservoirs.items()
+                for execution_id in reservoir
+            }
+        return self._weights
+
+    def to_dict(self) -> Dict:
+        strata = {
+            label: {
+                "population": self.population[label],
+                "sampled": len(self.reservoirs[label]),
+                "weight": round(self.population[label] / len(self.reservoirs[label]), 6)
+                if self.reservoirs[label] else None,
+            }
+            for label in sorted(self.population, key=lambda label: (-self.population[label], label))
+        }
+        return {
+            "fields": self.fields,
+            "default_quota": self.default_quota,
+            "quotas": self.quotas,
+            "seed": self.seed,
+            "population": sum(self.population.values()),
+            "sampled": len(self.weights),
+            "strata": strata,
+        }
+
+
+def stratify(
+    executions: Iterable[Tuple[int, Dict]],
+    fields: List[str],
+    default_quota: int,
+    quotas: Optional[Dict[str, int]] = None,
+    seed: Optional[int] = None,
+) -> StratifiedSample:
+    sample = StratifiedSample(fields, default_quota, quotas, seed)
+    for execution_id, execution in executions:
+        sample.add(execution_id, execution)
+    return sample
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Token usage, latency and estimated cost accounting for judge calls.
+
+Price table format (JSON, USD per 1M tokens), keyed by model:
+    {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60}}
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# Defaults for the models used in the bundled Evals.json; override with --prices.
+DEFAULT_PRICES = {
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+}
+
+# Batch API calls are billed at half the live price.
+BATCH_DISCOUNT = 0.5
+
+
+def _field(obj, name: str):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def extract_usage(usage) -> Dict[str, int]:
+    """Normalise an SDK usage object (or a batch output usage dict) into plain counts."""
+    details = _field(usage, "prompt_tokens_details")
+    return {
+        "prompt_tokens": _field(usage, "prompt_tokens") or 0,
+        "completion_tokens": _field(usage, "completion_tokens") or 0,
+        "cached_tokens": _field(details, "cached_tokens") or 0,
+    }
+
+
+def load_prices(path: Optional[Path]) -> Dict[str, Dict[str, float]]:
+    prices = {model: dict(price) for model, price in DEFAULT_PRICES.items()}
+    if path:
+        with Path(path).open("r") as handle:
+            prices.update(json.load(handle))
+    return prices
+
+
+def estimate_cost(usage: Dict[str, int], price: Optional[Dict[str, float]], batch: bool = False) -> Optional[float]:
+    if not price:
+        return None
+    cached = usage.get("cached_tokens", 0)
+    uncached = usage.get("prompt_tokens", 0) - cached
+    cost = (
+        uncached * price.get("input", 0)
+        + cached * price.get("cached_input", price.get("input", 0))
+        + usage.get("completion_tokens", 0) * price.get("output", 0)
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+def split_usage(usage: Optional[Dict[str, int]], parts: int) -> List[Optional[Dict[str, int]]]:
+    """Split one call's token counts across the `parts` results it produced (remainder to the first)."""
+    if usage is None:
+        return [None] * parts
+    shares = [{} for _ in range(parts)]
+    for field, value in usage.items():
+        for index, share in enumerate(shares):
+            share[field] = value // parts + (value % parts if index == 0 else 0)
+    return shares
+
+
+class UsageTotals:
+    """Running totals for a group of judge calls (one criterion or one model)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.latency_seconds = 0.0
+        self.cost_usd = 0.0
+        self.unpriced_calls = 0
+
+    def add(self, eval_result: Dict, prices: Dict[str, Dict[str, float]]) -> None:
+        call = eval_result.get("call") or {}
+        usage = eval_result.get("usage")
+        # A combined call scores several criteria; each result counts as its share of the call.
+        share = 1 / call.get("combined", 1)
+        self.calls += share
+        if call.get("cached"):
+            self.cached_calls += share
+        self.latency_seconds += call.get("latency_seconds", 0.0) * share
+        if not usage:
+            return
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        self.cached_tokens += usage.get("cached_tokens", 0)
+        cost = estimate_cost(usage, prices.get(call.get("model")), bool(call.get("batch")))
+        if cost is None:
+            self.unpriced_calls += 1
+        else:
+            self.cost_usd += cost
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": round(self.calls),
+            "cached_calls": round(self.cached_calls),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "avg_latency_seconds": round(self.latency_seconds / self.calls, 3) if self.calls else 0,
+            "estimated_cost_usd": round(self.cost_usd, 6),
+            "unpriced_calls": self.unpriced_calls,
+        }
+
+    STATE_FIELDS = (
+        "calls", "cached_calls", "prompt_tokens", "completion_tokens",
+        "cached_tokens", "latency_seconds", "cost_usd", "unpriced_calls",
+    )
+
+    def to_state(self) -> Dict[str, float]:
+        """Exact running totals (unrounded, unlike to_dict), for a summary snapshot."""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, float]) -> "UsageTotals":
+        """Inverse of to_state; raises KeyError when a field is missing."""
+        totals = cls()
+        for field in cls.STATE_FIELDS:
+            setattr(totals, field, state[field])
+        return totals